@@ -0,0 +1,141 @@
+# apps/assets/build.py
+"""
+Build step for the frontend (`manage.py build_frontend`).
+
+frontend/ is copied to FRONTEND_BUILD_ROOT with:
+
+- fingerprinted copies of every asset: style.css -> style.<hash>.css, the
+  hash being the first HASH_LENGTH hex digits of the SHA-256 of the content.
+  A changed file gets a new name, so assets are served with a one year
+  `immutable` Cache-Control (serving.py) and browsers never revalidate them.
+- references rewritten to those names in HTML (src/href) and CSS (url(),
+  @import). Assets are fingerprinted after the assets they refer to, so a
+  CSS file's hash covers the names of its images. HTML pages keep their
+  names (they are the URLs people visit) and are served with `no-cache`.
+  The plain asset names are kept too, for references built in JavaScript.
+- a gzip (level 9) and, when the optional `brotli` package is installed,
+  a brotli variant next to each text file, kept only when smaller.
+  serving.py picks one per request by Accept-Encoding; nothing is
+  compressed while serving.
+- manifest.json: { source name: fingerprinted name }.
+
+The build is written next to the target and swapped in when complete.
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_LENGTH = 12
+COMPRESSIBLE = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.map'}
+MIN_COMPRESS_BYTES = 256 # Below this the headers outweigh the saving
+REFERENCES = {
+    '.html': re.compile(r'''(?P<prefix>\b(?:src|href)=["'])(?P<ref>[^"'#?]+)'''),
+    '.css': re.compile(r'''(?P<prefix>url\(\s*["']?|@import\s+["'])(?P<ref>[^"')#?]+)'''),
+}
+
+def _is_local(ref):
+    return not (ref.startswith(('/', '#', 'data:')) or '//' in ref or ':' in ref.split('/')[0])
+
+def compress(path):
+    """Write path.gz (and path.br) when they come out smaller. Returns the encodings written."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return []
+    variants = {'gzip': ('.gz', gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        variants['br'] = ('.br', brotli.compress(data, quality=11))
+    written = []
+    for encoding, (suffix, packed) in variants.items():
+        if len(packed) < len(data):
+            with open(path + suffix, 'wb') as file:
+                file.write(packed)
+            written.append(encoding)
+    return written
+
+
+class FrontendBuild:
+    """Fingerprints, rewrites and compresses one source tree into a target directory."""
+
+    def __init__(self, source, target):
+        self.source = str(source)
+        self.target = str(target)
+        self.manifest = {} # source name -> fingerprinted name, both relative and '/'-separated
+        self.compressed = 0
+
+    def names(self):
+        for root, dirs, files in os.walk(self.source):
+            dirs.sort()
+            for filename in sorted(files):
+                yield posixpath.relpath(os.path.join(root, filename).replace(os.sep, '/'), self.source.replace(os.sep, '/'))
+
+    def content(self, name, building=()):
+        """The file's bytes with its references rewritten to fingerprinted names."""
+        with open(os.path.join(self.source, name), 'rb') as file:
+            data = file.read()
+        pattern = REFERENCES.get(posixpath.splitext(name)[1])
+        if pattern is None:
+            return data
+        folder = posixpath.dirname(name)
+
+        def replace(match):
+            ref = match.group('ref').strip()
+            target = posixpath.normpath(posixpath.join(folder, ref))
+            if not _is_local(ref) or not os.path.isfile(os.path.join(self.source, target)):
+                return match.group(0)
+            hashed = self.fingerprint(target, building + (name,))
+            if hashed is None:
+                return match.group(0)
+            return match.group('prefix') + posixpath.relpath(hashed, folder or '.')
+        return pattern.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+    def fingerprint(self, name, building=()):
+        """Write the fingerprinted copy of an asset (once). Returns its name, None for pages and cycles."""
+        if name in self.manifest:
+            return self.manifest[name]
+        if name.endswith('.html') or name in building:
+            return None
+        data = self.content(name, building)
+        base, ext = posixpath.splitext(name)
+        hashed = f'{base}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        self.write(hashed, data)
+        self.manifest[name] = hashed
+        return hashed
+
+    def write(self, name, data):
+        path = os.path.join(self.target, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        if posixpath.splitext(name)[1] in COMPRESSIBLE and compress(path):
+            self.compressed += 1
+
+    def run(self):
+        """Build into `target` (replacing it). Returns the manifest."""
+        final, self.target = self.target, self.target.rstrip('/\\') + '.new'
+        shutil.rmtree(self.target, ignore_errors=True)
+        os.makedirs(self.target)
+        for name in self.names():
+            if name.endswith('.html'):
+                self.write(name, self.content(name))
+            else:
+                self.fingerprint(name)
+                shutil.copyfile(os.path.join(self.source, name), os.path.join(self.target, name))
+                if posixpath.splitext(name)[1] in COMPRESSIBLE:
+                    compress(os.path.join(self.target, name))
+        with open(os.path.join(self.target, 'manifest.json'), 'w') as file:
+            json.dump(self.manifest, file, indent=2, sort_keys=True)
+
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(self.target, final)
+        self.target = final
+        return self.manifest
@@ -0,0 +1,62 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.views import static
+from apps.assets import serving
+
+BROWSER_ENCODINGS = 'gzip, deflate, br'
+
+
+class Command(BaseCommand):
+    help = 'Compare apps.assets.serving.serve with django.views.static.serve on the frontend files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per file and case')
+        parser.add_argument('--root', help='Directory to serve (default: the /site/ root)')
+
+    def fetch(self, view, root, path, **headers):
+        response = view(RequestFactory().get(f'/site/{path}', **headers), path, document_root=root)
+        size = sum(len(chunk) for chunk in response) if response.streaming else len(response.content)
+        response.close()
+        return response, size
+
+    def measure(self, view, root, paths, count, headers):
+        """(requests per second, bytes sent per request) over all paths."""
+        requests = [(path, headers(view, root, path) if callable(headers) else headers) for path in paths]
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            for path, request_headers in requests:
+                sent += self.fetch(view, root, path, **request_headers)[1]
+        elapsed = time.perf_counter() - started
+        total = count * len(paths)
+        return total / elapsed, sent / total
+
+    def handle(self, *args, **options):
+        root = options['root'] or serving.frontend_root()
+        paths = sorted(
+            os.path.relpath(os.path.join(folder, name), root).replace(os.sep, '/')
+            for folder, _, files in os.walk(root) for name in files
+            if not name.endswith(('.gz', '.br', '.json'))
+        )
+        largest = max(paths, key=lambda path: os.path.getsize(os.path.join(root, path)))
+
+        def revalidate(view, root, path):
+            # What a browser sends for a page it has cached
+            response, _ = self.fetch(view, root, path)
+            return {'HTTP_IF_NONE_MATCH': response.get('ETag', '"none"'), 'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+
+        cases = [
+            ('full GET', paths, {}),
+            ('browser GET', paths, {'HTTP_ACCEPT_ENCODING': BROWSER_ENCODINGS}),
+            ('revalidation', paths, revalidate),
+            (f'range 0-1023 of {largest}', [largest], {'HTTP_RANGE': 'bytes=0-1023'}),
+        ]
+        self.stdout.write(f'{len(paths)} files from {root}, {options["requests"]} rounds per case\n')
+        self.stdout.write(f'{"case":<40} {"view":<22} {"req/s":>10} {"bytes/req":>12}')
+        for label, case_paths, headers in cases:
+            for name, view in (('django.views.static', static.serve), ('apps.assets.serving', serving.serve)):
+                rate, size = self.measure(view, root, case_paths, options['requests'], headers)
+                self.stdout.write(f'{label:<40} {name:<22} {rate:>10.0f} {size:>12.0f}')
+        self.stdout.write(self.style.SUCCESS('Done.'))
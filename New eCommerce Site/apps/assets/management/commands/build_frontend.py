@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.assets.build import FrontendBuild, brotli
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint and precompress frontend/ into FRONTEND_BUILD_ROOT, which /site/ then serves'
+
+    def handle(self, *args, **options):
+        build = FrontendBuild(settings.FRONTEND_ROOT, settings.FRONTEND_BUILD_ROOT)
+        manifest = build.run()
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed, only gzip variants were written.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(manifest)} assets fingerprinted, {build.compressed} files precompressed into {build.target}.'
+        ))
@@ -0,0 +1,182 @@
+# apps/assets/serving.py
+"""
+File serving for the frontend and media, in place of django.views.static.serve.
+
+On top of what that view does, serve():
+
+- answers conditional requests (If-None-Match / If-Modified-Since, and
+  If-Match / If-Unmodified-Since) with 304/412, through
+  django.utils.cache.get_conditional_response;
+- serves the precompressed .br/.gz file written by build.py when the client
+  accepts it, with Vary: Accept-Encoding and an ETag per encoding;
+- answers a single `Range: bytes=...` with 206 (honouring If-Range), an
+  unsatisfiable one with 416, and several ranges with the whole file;
+- sends fingerprinted names (build.py) and content-addressed media with a
+  one year `immutable` Cache-Control, everything else with `no-cache`, so
+  pages are revalidated with a cheap 304 instead of downloaded again;
+- returns a FileResponse over the open file, so the WSGI server's
+  wsgi.file_wrapper can sendfile() it (gunicorn, uWSGI) instead of Python
+  reading every byte. A range is a FileRange: the file positioned at the
+  first byte plus Content-Length, which is what those servers send from.
+"""
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.core.exceptions import SuspiciousFileOperation
+from .build import HASH_LENGTH
+
+FINGERPRINTED = re.compile(r'\.[0-9a-f]{%d}\.\w+$' % HASH_LENGTH)
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+# Content-Encoding, suffix of the precompressed file; first accepted wins
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class FileRange:
+    """Bytes [start, start + length) of an open file, for FileResponse and wsgi.file_wrapper."""
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+def accepted_encodings(header):
+    """Content codings of an Accept-Encoding header with a non-zero q."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def byte_range(header, size):
+    """(start, end) inclusive of a single-range header; None to send the whole file; ValueError if unsatisfiable."""
+    match = BYTE_RANGE.match(header.strip().replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None # Malformed or several ranges: ignore, as RFC 9110 allows
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('Empty suffix range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    if start >= size:
+        raise ValueError('Range starts past the end')
+    end = min(int(last), size - 1) if last else size - 1
+    if end < start:
+        return None
+    return start, end
+
+def _if_range_matches(request, etag, mtime):
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag # Strong comparison only
+    since = parse_http_date_safe(value)
+    return since is not None and int(mtime) <= since
+
+def frontend_root():
+    """FRONTEND_BUILD_ROOT once `manage.py build_frontend` has written it, frontend/ until then."""
+    return settings.FRONTEND_BUILD_ROOT if os.path.isdir(settings.FRONTEND_BUILD_ROOT) else settings.FRONTEND_ROOT
+
+def serve_frontend(request, path):
+    """/site/: the root is picked per request, so a build (or its removal) shows without a restart."""
+    return serve(request, path, frontend_root())
+
+def serve(request, path, document_root, immutable=False, hidden=()):
+    """
+    Serve document_root/path. `immutable` marks every file of the root as
+    never changing under its name (content-addressed media); otherwise only
+    fingerprinted names are. Nothing under the `hidden` directories of the
+    root ('blobs/tmp/') is served, however the path spells them.
+    """
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    if hidden and (os.path.relpath(full_path, document_root).replace(os.sep, '/') + '/').startswith(tuple(hidden)):
+        raise Http404('Not found')
+    try:
+        info = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found')
+    if not stat.S_ISREG(info.st_mode) or path.endswith(tuple(suffix for _, suffix in PRECOMPRESSED)):
+        raise Http404('Not found')
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    variants = [(coding, suffix) for coding, suffix in PRECOMPRESSED if os.path.isfile(full_path + suffix)]
+
+    # Ranges are taken on the file as stored, so they are only served uncompressed
+    encoding, suffix = None, ''
+    if 'Range' not in request.headers:
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding, suffix = next(((coding, sfx) for coding, sfx in variants if coding in accepted), (None, ''))
+    if encoding:
+        info = os.stat(full_path + suffix)
+
+    headers = HttpResponse()
+    headers['ETag'] = f'"{info.st_mtime_ns:x}-{info.st_size:x}{"-" + encoding if encoding else ""}"'
+    headers['Last-Modified'] = http_date(info.st_mtime)
+    headers['Cache-Control'] = IMMUTABLE if immutable or FINGERPRINTED.search(path) else REVALIDATE
+    if variants:
+        headers['Vary'] = 'Accept-Encoding'
+    conditional = get_conditional_response(
+        request, etag=headers['ETag'], last_modified=int(info.st_mtime), response=headers,
+    )
+    if conditional is not headers:
+        return conditional # 304 or 412, with the headers above
+
+    file = open(full_path + suffix, 'rb')
+    start, end = 0, info.st_size - 1
+    partial = None
+    if 'Range' in request.headers and _if_range_matches(request, headers['ETag'], info.st_mtime):
+        try:
+            partial = byte_range(request.headers['Range'], info.st_size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{info.st_size}'
+            return response
+    if partial:
+        start, end = partial
+        response = FileResponse(FileRange(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+    else:
+        response = FileResponse(file, content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response.headers.pop('Content-Disposition', None) # FileResponse names the file; a page URL needs no name
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Vary'):
+        if header in headers:
+            response[header] = headers[header]
+    return response
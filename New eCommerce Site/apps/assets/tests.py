@@ -0,0 +1,156 @@
+# apps/assets/tests.py
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from django.test import TestCase, RequestFactory, override_settings
+from django.http import Http404
+from .build import FrontendBuild
+from .serving import serve, IMMUTABLE, REVALIDATE
+
+class FrontendBuildTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.target = os.path.join(tempfile.mkdtemp(), 'build')
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.target), ignore_errors=True)
+        self.files = {
+            'style.css': "@import 'theme.css';\nbody { background: url(\"img/dot.svg\"); }\n" + '.card { padding: 1rem; }\n' * 40,
+            'theme.css': ':root { --primary: #2563eb; }\n',
+            'img/dot.svg': '<svg xmlns="http://www.w3.org/2000/svg"></svg>',
+            'app.js': 'console.log("app");\n' * 50,
+            'buyer/index.html': (
+                '<link rel="stylesheet" href="../style.css">\n<link href="https://fonts.example.com/x.css" rel="stylesheet">\n'
+                '<a href="products.html?category=moda">Moda</a>\n<script src="../app.js"></script>\n'
+            ),
+        }
+        for name, content in self.files.items():
+            os.makedirs(os.path.dirname(os.path.join(self.source, name)), exist_ok=True)
+            with open(os.path.join(self.source, name), 'w') as file:
+                file.write(content)
+        self.factory = RequestFactory()
+
+    def read(self, name):
+        with open(os.path.join(self.target, name)) as file:
+            return file.read()
+
+    def get(self, path, immutable=False, **headers):
+        response = serve(self.factory.get(f'/site/{path}', **headers), path, document_root=self.target, immutable=immutable)
+        body = b''.join(response) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_build_fingerprints_rewrites_and_compresses(self):
+        manifest = FrontendBuild(self.source, self.target).run()
+        self.assertEqual(set(manifest), {'style.css', 'theme.css', 'img/dot.svg', 'app.js'})
+        self.assertRegex(manifest['style.css'], r'^style\.[0-9a-f]{12}\.css$')
+        self.assertEqual(json.loads(self.read('manifest.json')), manifest)
+
+        # References point at the fingerprinted names; external and page links are left alone
+        page = self.read('buyer/index.html')
+        self.assertIn(f'href="../{manifest["style.css"]}"', page)
+        self.assertIn(f'src="../{manifest["app.js"]}"', page)
+        self.assertIn('https://fonts.example.com/x.css', page)
+        self.assertIn('href="products.html?category=moda"', page)
+        style = self.read(manifest['style.css'])
+        self.assertIn(f"@import '{manifest['theme.css']}'", style)
+        self.assertIn(f'url("{manifest["img/dot.svg"]}")', style)
+        self.assertEqual(self.read('style.css'), self.files['style.css']) # Plain name kept as is
+
+        with open(os.path.join(self.target, manifest['app.js'] + '.gz'), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()).decode(), self.files['app.js'])
+        self.assertFalse(os.path.exists(os.path.join(self.target, manifest['theme.css'] + '.gz'))) # Too small
+
+        # A changed dependency changes the name of the file referring to it
+        with open(os.path.join(self.source, 'img/dot.svg'), 'a') as file:
+            file.write('\n')
+        rebuilt = FrontendBuild(self.source, self.target).run()
+        self.assertNotEqual(rebuilt['style.css'], manifest['style.css'])
+        self.assertEqual(rebuilt['app.js'], manifest['app.js'])
+        self.assertFalse(os.path.exists(os.path.join(self.target, manifest['style.css'])))
+
+    def test_serve_negotiates_caches_and_revalidates(self):
+        manifest = FrontendBuild(self.source, self.target).run()
+        response, body = self.get(manifest['app.js'], HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(gzip.decompress(body).decode(), self.files['app.js'])
+
+        plain, body = self.get(manifest['app.js'])
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(body.decode(), self.files['app.js'])
+        self.assertNotEqual(plain['ETag'], response['ETag'])
+
+        page, _ = self.get('buyer/index.html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(page['Cache-Control'], REVALIDATE)
+        revalidated, body = self.get('buyer/index.html', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual((revalidated.status_code, body), (304, b''))
+        self.assertEqual(revalidated['ETag'], page['ETag'])
+        revalidated, _ = self.get('buyer/index.html', HTTP_IF_MODIFIED_SINCE=page['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+        with self.assertRaises(Http404):
+            self.get('../../etc/passwd')
+        with self.assertRaises(Http404):
+            self.get(manifest['app.js'] + '.gz')
+        with self.assertRaises(Http404):
+            self.get('buyer')
+
+    def test_serve_ranges(self):
+        FrontendBuild(self.source, self.target).run()
+        content = self.files['app.js'].encode()
+        size = len(content)
+
+        response, body = self.get('app.js', HTTP_RANGE='bytes=10-29', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, content[10:30])
+        self.assertEqual(response['Content-Range'], f'bytes 10-29/{size}')
+        self.assertEqual(response['Content-Length'], '20')
+        self.assertNotIn('Content-Encoding', response)
+
+        response, body = self.get('app.js', HTTP_RANGE='bytes=-5')
+        self.assertEqual((response.status_code, body), (206, content[-5:]))
+        response, body = self.get('app.js', HTTP_RANGE=f'bytes={size - 3}-')
+        self.assertEqual(body, content[-3:])
+
+        response, _ = self.get('app.js', HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{size}'))
+        # Several ranges, or an If-Range that no longer matches: the whole file
+        response, body = self.get('app.js', HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual((response.status_code, body), (200, content))
+        response, body = self.get('app.js', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, content))
+        etag = self.get('app.js')[0]['ETag']
+        response, body = self.get('app.js', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, content[:2]))
+
+    def test_hidden_directories_are_not_served(self):
+        os.makedirs(os.path.join(self.source, 'blobs', 'tmp'))
+        with open(os.path.join(self.source, 'blobs', 'tmp', 'upload-1.part'), 'w') as file:
+            file.write('half')
+        request = self.factory.get('/media/')
+        for path in ('blobs/tmp/upload-1.part', 'blobs/./tmp/upload-1.part', 'blobs//tmp/upload-1.part', 'img/../blobs/tmp/upload-1.part'):
+            with self.assertRaises(Http404):
+                serve(request, path, self.source, hidden=('blobs/tmp/',))
+        self.assertEqual(serve(request, 'theme.css', self.source, hidden=('blobs/tmp/',)).status_code, 200)
+
+    def test_site_root_is_picked_per_request(self):
+        manifest = FrontendBuild(self.source, self.target).run()
+        with override_settings(FRONTEND_BUILD_ROOT=self.target):
+            self.assertEqual(self.client.get(f'/site/{manifest["app.js"]}').status_code, 200)
+        shutil.rmtree(self.target)
+        with override_settings(FRONTEND_BUILD_ROOT=self.target, FRONTEND_ROOT=self.source):
+            self.assertEqual(self.client.get(f'/site/{manifest["app.js"]}').status_code, 404)
+            self.assertEqual(self.client.get('/site/app.js').status_code, 200)
+
+    def test_site_url(self):
+        response = self.client.get('/site/buyer/index.html')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], REVALIDATE)
+        self.assertEqual(self.client.get('/site/buyer/index.html', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/site/../config/settings.py').status_code, 404)
@@ -0,0 +1,24 @@
+# blobs/admin.py
+from django.contrib import admin
+from .models import Blob, UploadSession
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'touched_at', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('name', 'digest')
+    readonly_fields = ('name', 'digest', 'size', 'ref_count', 'touched_at', 'created_at')
+
+    # Rows follow the files: written by the storage, removed by collect_blobs
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'owner', 'filename', 'size', 'received', 'status', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('owner__email', 'filename')
+    readonly_fields = ('owner', 'filename', 'size', 'sha256', 'received', 'status', 'blob_name', 'created_at', 'updated_at')
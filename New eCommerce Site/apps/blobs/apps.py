@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+class BlobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.blobs'
+
+    def ready(self):
+        from apps.blobs.signals import connect_receivers
+        connect_receivers()
+
+    verbose_name = 'Dosya Deposu'
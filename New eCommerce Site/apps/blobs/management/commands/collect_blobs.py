@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.blobs.references import recount, collect_garbage
+from apps.blobs.uploads import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Drop expired upload sessions, recount blob references and delete blobs nothing has referred to for the grace period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24, help='Keep unreferenced blobs this long (uploads not saved yet)')
+
+    def handle(self, *args, **options):
+        uploads = purge_expired_uploads()
+        corrected = recount()
+        freed, size = collect_garbage(timedelta(hours=options['grace_hours']))
+        self.stdout.write(self.style.SUCCESS(
+            f'{uploads} expired uploads dropped, {corrected} reference counts corrected, {freed} blobs deleted ({size} bytes freed).'
+        ))
@@ -0,0 +1,56 @@
+import os
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from apps.blobs.references import registered_fields, recount
+from apps.blobs.signals import media_moved
+from apps.blobs.storage import PREFIX, blob_name, blob_storage, hash_chunks
+
+
+class Command(BaseCommand):
+    help = 'Move existing media of blob fields into the content-addressed store, store duplicates once and report the space reclaimed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only hash the files and report what would be reclaimed')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        legacy = FileSystemStorage() # MEDIA_ROOT, where the files were written so far
+        storage = blob_storage()
+        moved = {} # old name -> blob name
+        before = 0
+        blob_sizes = {}
+
+        for model, field in registered_fields():
+            rows = (
+                model._base_manager.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .exclude(**{f'{field}__startswith': f'{PREFIX}/'}).values_list('pk', field)
+            )
+            for pk, name in rows.iterator():
+                if name not in moved:
+                    if not legacy.exists(name):
+                        self.stdout.write(self.style.WARNING(f'{model._meta.label}.{field} #{pk}: {name} is missing, left as is'))
+                        continue
+                    size = legacy.size(name)
+                    before += size
+                    with legacy.open(name, 'rb') as file:
+                        if dry_run:
+                            moved[name] = blob_name(hash_chunks(File(file).chunks())[0], name)
+                        else:
+                            moved[name] = storage.save(name, File(file, name=os.path.basename(name)))
+                    blob_sizes[moved[name]] = size
+                if not dry_run:
+                    model._base_manager.filter(pk=pk).update(**{field: moved[name]})
+
+        after = sum(blob_sizes.values())
+        if not dry_run:
+            media_moved.send(sender=self.__class__, moved=moved)
+            recount()
+            for name in moved:
+                legacy.delete(name)
+
+        verb = 'would be' if dry_run else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(moved)} files ({before} bytes) {verb} stored as {len(blob_sizes)} blobs ({after} bytes): '
+            f'{before - after} bytes reclaimed.'
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='dosya yolu')),
+                ('digest', models.CharField(max_length=64, verbose_name='SHA-256 özeti')),
+                ('size', models.BigIntegerField(verbose_name='boyut (bayt)')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='kullanım sayısı')),
+                ('touched_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='son kullanım')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+            ],
+            options={
+                'verbose_name': 'Dosya',
+                'verbose_name_plural': 'Dosyalar',
+                'indexes': [models.Index(fields=['ref_count', 'touched_at'], name='blob_gc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blobs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='dosya adı')),
+                ('size', models.BigIntegerField(verbose_name='toplam boyut (bayt)')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256 özeti')),
+                ('received', models.BigIntegerField(default=0, verbose_name='alınan bayt')),
+                ('status', models.CharField(choices=[('OPEN', 'Yükleniyor'), ('COMPLETE', 'Tamamlandı'), ('FAILED', 'Başarısız')], default='OPEN', max_length=10, verbose_name='durum')),
+                ('blob_name', models.CharField(blank=True, max_length=255, verbose_name='dosya yolu')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='güncellenme tarihi')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='yükleyen')),
+            ],
+            options={
+                'verbose_name': 'Yükleme Oturumu',
+                'verbose_name_plural': 'Yükleme Oturumları',
+            },
+        ),
+    ]
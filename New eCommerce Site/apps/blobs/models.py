@@ -0,0 +1,62 @@
+# blobs/models.py
+import uuid
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from apps.accounts.models import User
+
+class Blob(models.Model):
+    """
+    A file of ContentAddressedStorage (see blobs/storage.py), shared by every
+    field value with the same content. ref_count is the number of rows
+    pointing at it; blobs left at zero are deleted by `manage.py collect_blobs`
+    once touched_at is older than the grace period.
+    """
+    name = models.CharField(_('dosya yolu'), max_length=255, unique=True)
+    digest = models.CharField(_('SHA-256 özeti'), max_length=64)
+    size = models.BigIntegerField(_('boyut (bayt)'))
+    ref_count = models.IntegerField(_('kullanım sayısı'), default=0)
+    # Last upload of this content or release of a reference, the start of the grace period
+    touched_at = models.DateTimeField(_('son kullanım'), default=timezone.now)
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Garbage collection: WHERE ref_count <= 0 AND touched_at < cutoff
+            models.Index(fields=['ref_count', 'touched_at'], name='blob_gc_idx'),
+        ]
+        verbose_name = _('Dosya')
+        verbose_name_plural = _('Dosyalar')
+
+    def __str__(self):
+        return self.name
+
+class UploadSession(models.Model):
+    """
+    A resumable upload (see blobs/uploads.py): chunks are appended to a part
+    file until `received` reaches `size`; completing it checks the SHA-256
+    and moves the file into the blob store as blob_name.
+    """
+    class Status(models.TextChoices):
+        OPEN = 'OPEN', _('Yükleniyor')
+        COMPLETE = 'COMPLETE', _('Tamamlandı')
+        FAILED = 'FAILED', _('Başarısız')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name=_('yükleyen'))
+    filename = models.CharField(_('dosya adı'), max_length=255)
+    size = models.BigIntegerField(_('toplam boyut (bayt)'))
+    sha256 = models.CharField(_('SHA-256 özeti'), max_length=64)
+    received = models.BigIntegerField(_('alınan bayt'), default=0)
+    status = models.CharField(_('durum'), max_length=10, choices=Status.choices, default=Status.OPEN)
+    blob_name = models.CharField(_('dosya yolu'), max_length=255, blank=True)
+
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Yükleme Oturumu')
+        verbose_name_plural = _('Yükleme Oturumları')
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}, {self.status})"
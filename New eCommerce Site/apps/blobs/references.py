@@ -0,0 +1,78 @@
+# apps/blobs/references.py
+"""
+Reference counting and garbage collection of blobs.
+
+Saves and deletes of rows with blob fields adjust Blob.ref_count through
+blobs/signals.py. Queryset update()/delete() send no signals, so recount()
+recomputes the counts from the tables; collect_garbage() runs it first.
+"""
+import functools
+from collections import Counter
+from datetime import timedelta
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Blob
+from .storage import ContentAddressedStorage, blob_storage
+
+@functools.lru_cache(maxsize=None)
+def blob_fields(model):
+    """Names of the file fields of `model` stored in ContentAddressedStorage."""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage)
+    )
+
+def registered_fields():
+    """[(model, field name)] of every blob field in the project."""
+    return [(model, field) for model in apps.get_models() for field in blob_fields(model)]
+
+def adjust_references(names, delta):
+    """Add `delta` to the count of each name (once per occurrence)."""
+    now = timezone.now()
+    for name, times in Counter(name for name in names if name).items():
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + delta * times, touched_at=now)
+
+def referenced_names():
+    """{ blob name: number of rows pointing at it } over every blob field."""
+    counts = Counter()
+    for model, field in registered_fields():
+        rows = (
+            model._base_manager.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .values(field).annotate(rows=Count('pk')).order_by().values_list(field, 'rows')
+        )
+        for name, rows in rows:
+            counts[name] += rows
+    return counts
+
+def recount():
+    """Set every ref_count from the tables. Returns the number of blobs corrected."""
+    counts = referenced_names()
+    corrected = 0
+    for pk, name, ref_count in Blob.objects.values_list('pk', 'name', 'ref_count').iterator():
+        if ref_count != counts.get(name, 0):
+            Blob.objects.filter(pk=pk).update(ref_count=counts.get(name, 0), touched_at=timezone.now())
+            corrected += 1
+    return corrected
+
+def collect_garbage(grace=timedelta(hours=24)):
+    """
+    Delete blobs without references whose last use is older than `grace`,
+    which covers uploads whose row is not committed yet. Returns (blobs, bytes) freed.
+    """
+    cutoff = timezone.now() - grace
+    storage = blob_storage()
+    freed = size = 0
+    candidates = Blob.objects.filter(ref_count__lte=0, touched_at__lt=cutoff).values_list('pk', flat=True)
+    for pk in list(candidates.iterator()):
+        with transaction.atomic():
+            # Re-checked under the row lock: an upload of the same content touches the row first
+            blob = Blob.objects.select_for_update().filter(pk=pk, ref_count__lte=0, touched_at__lt=cutoff).first()
+            if blob is None:
+                continue
+            storage.purge(blob.name)
+            blob.delete()
+        freed += 1
+        size += blob.size
+    return freed, size
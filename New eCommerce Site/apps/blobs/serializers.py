@@ -0,0 +1,26 @@
+# apps/blobs/serializers.py
+from rest_framework import serializers
+from .models import UploadSession
+from .uploads import max_upload_bytes, max_chunk_bytes
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    max_chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'sha256', 'received', 'status', 'max_chunk_size', 'created_at', 'updated_at']
+        read_only_fields = ['received', 'status', 'created_at', 'updated_at']
+
+    def get_max_chunk_size(self, obj):
+        return max_chunk_bytes()
+
+    def validate_size(self, value):
+        if not 0 < value <= max_upload_bytes():
+            raise serializers.ValidationError(f'Size must be between 1 and {max_upload_bytes()} bytes.')
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not all(c in '0123456789abcdef' for c in value) or len(value) != 64:
+            raise serializers.ValidationError('Hex SHA-256 digest of the whole file expected.')
+        return value
@@ -0,0 +1,46 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal
+from .references import blob_fields, registered_fields, adjust_references
+
+# Sent by `manage.py migrate_media` with moved={ old name: blob name } after rows were
+# repointed with update(), for apps keeping copies of file names elsewhere
+media_moved = Signal()
+
+def remember_blobs(sender, instance, raw=False, **kwargs):
+    fields = blob_fields(sender)
+    if not fields or raw:
+        return
+    previous = {}
+    if not instance._state.adding and instance.pk is not None:
+        previous = sender._base_manager.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._previous_blobs = previous
+
+def count_blob_references(sender, instance, raw=False, **kwargs):
+    fields = blob_fields(sender)
+    if not fields or raw:
+        return
+    previous = getattr(instance, '_previous_blobs', {})
+    acquired, released = [], []
+    for field in fields:
+        old, new = previous.get(field) or '', getattr(instance, field).name or ''
+        if old != new:
+            acquired.append(new)
+            released.append(old)
+    adjust_references(acquired, 1)
+    adjust_references(released, -1)
+
+def release_blobs(sender, instance, **kwargs):
+    fields = blob_fields(sender)
+    if fields:
+        adjust_references([getattr(instance, field).name for field in fields], -1)
+
+def connect_receivers():
+    """
+    Connect the receivers above for the models with blob fields only (BlobsConfig.ready).
+    A post_delete receiver without a sender would make Django collect and signal
+    every row of every queryset delete() in the project instead of one DELETE.
+    """
+    for model in {model for model, _ in registered_fields()}:
+        pre_save.connect(remember_blobs, sender=model, dispatch_uid=f'blobs:remember:{model._meta.label}')
+        post_save.connect(count_blob_references, sender=model, dispatch_uid=f'blobs:count:{model._meta.label}')
+        post_delete.connect(release_blobs, sender=model, dispatch_uid=f'blobs:release:{model._meta.label}')
@@ -0,0 +1,99 @@
+# apps/blobs/storage.py
+"""
+Content-addressed file storage.
+
+An upload is hashed (SHA-256) while it is streamed chunk by chunk into a
+temporary file next to the store, so memory stays flat whatever its size.
+The file is then renamed (atomically) to blobs/<2 hex>/<digest><ext>, or
+dropped if that blob exists already and the existing name is returned: the
+same photo uploaded for ten products is stored once.
+
+Every blob has a Blob row. Fields using this storage (storage=blob_storage)
+are reference-counted by blobs/signals.py; delete() never removes a file,
+since other rows may share it, `manage.py collect_blobs` does once nothing
+refers to it any more.
+"""
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+PREFIX = 'blobs'
+
+def hash_chunks(chunks, out=None):
+    """(SHA-256 hex digest, size) of an iterable of byte chunks, copying them to `out` if given."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+        if out is not None:
+            out.write(chunk)
+    return digest.hexdigest(), size
+
+def blob_name(digest, name):
+    """Store name of content `digest` uploaded as `name` (the extension is kept for content types)."""
+    extension = os.path.splitext(name)[1].lower()[:10]
+    return f'{PREFIX}/{digest[:2]}/{digest}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return name
+
+    def temp_path(self, label=''):
+        """A new empty file in the store's temp directory (same filesystem, so adopt() is a rename)."""
+        temp_dir = self.path(f'{PREFIX}/tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=temp_dir, prefix=label)
+        os.close(fd)
+        return path
+
+    def _save(self, name, content):
+        temp_path = self.temp_path()
+        try:
+            with open(temp_path, 'wb') as out:
+                digest, size = hash_chunks(content.chunks(), out)
+            return self.adopt(temp_path, name, digest, size)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def adopt(self, temp_path, name, digest, size):
+        """
+        Move a temp file with known SHA-256 `digest` into the store (or drop it if the
+        blob exists already). Returns the blob name.
+        """
+        from .models import Blob # The storage is created while models are still loading
+
+        name = blob_name(digest, name)
+        path = self.path(name)
+        # Touching the row locks it and restarts its grace period, so collect_blobs
+        # either deleted it before this point or leaves it alone now
+        touched = Blob.objects.filter(name=name).update(touched_at=timezone.now())
+        if touched and os.path.exists(path):
+            os.remove(temp_path)
+            return name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        os.replace(temp_path, path)
+        if not touched:
+            Blob.objects.get_or_create(name=name, defaults={'digest': digest, 'size': size})
+        return name
+
+    def delete(self, name):
+        # Shared: references are released through the count, the file goes with collect_blobs
+        pass
+
+    def purge(self, name):
+        super().delete(name)
+
+
+_storage = ContentAddressedStorage()
+
+def blob_storage():
+    """Callable for FileField(storage=...), so migrations refer to it by path."""
+    return _storage
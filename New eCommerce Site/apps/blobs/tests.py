@@ -0,0 +1,211 @@
+# apps/blobs/tests.py
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models.deletion import Collector
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from apps.orders.models import Order, SellerOrder
+from apps.disputes.models import Dispute, DisputeMessage
+from apps.products.models import Product, ProductImage, InventoryMovement
+from apps.tasks.models import Task
+from .models import Blob, UploadSession
+from .references import collect_garbage, recount
+
+User = get_user_model()
+
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.product = Product.objects.create(seller=seller, name='Vazo', slug='vazo', status='ACTIVE', description='')
+        self.other = Product.objects.create(seller=seller, name='Vazo Büyük', slug='vazo-buyuk', status='ACTIVE', description='')
+
+    def photo(self, color=(10, 120, 200), name='photo.png'):
+        out = BytesIO()
+        Image.new('RGB', (40, 30), color).save(out, format='PNG')
+        return SimpleUploadedFile(name, out.getvalue())
+
+    def blob_files(self):
+        return sorted(
+            name for root, _, files in os.walk(os.path.join(self.media, 'blobs'))
+            if not root.endswith('tmp') for name in files
+        )
+
+    def test_same_content_is_stored_once_and_counted(self):
+        photo = self.photo()
+        digest = hashlib.sha256(photo.read()).hexdigest()
+        first = ProductImage.objects.create(product=self.product, image=photo)
+        second = ProductImage.objects.create(product=self.other, image=self.photo(name='IMG_0001.PNG'))
+
+        self.assertEqual(first.image.name, f'blobs/{digest[:2]}/{digest}.png')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(self.blob_files(), [f'{digest}.png'])
+        blob = Blob.objects.get()
+        self.assertEqual((blob.digest, blob.size, blob.ref_count), (digest, first.image.size, 2))
+
+        # Replacing an image releases the old blob
+        second.image = self.photo(color=(0, 0, 0))
+        second.save()
+        self.assertEqual(Blob.objects.get(name=first.image.name).ref_count, 1)
+        self.assertEqual(Blob.objects.get(name=second.image.name).ref_count, 1)
+
+        first.delete()
+        self.assertEqual(Blob.objects.get(name=first.image.name).ref_count, 0)
+        self.assertEqual(collect_garbage(), (0, 0)) # Still in its grace period
+        self.assertEqual(collect_garbage(timedelta(0)), (1, blob.size))
+        self.assertEqual(self.blob_files(), [os.path.basename(second.image.name)])
+        self.assertFalse(Blob.objects.filter(name=first.image.name).exists())
+
+    def test_recount_catches_bulk_deletes(self):
+        ProductImage.objects.create(product=self.product, image=self.photo())
+        ProductImage.objects.create(product=self.other, image=self.photo())
+        ProductImage.objects.filter(product=self.other).delete() # Signals fire per row here
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+        ProductImage.objects.filter(product=self.product).update(image='') # No signal
+        self.assertEqual(recount(), 1)
+        self.assertEqual(Blob.objects.get().ref_count, 0)
+
+    def test_models_without_blobs_keep_fast_deletes(self):
+        collector = Collector(using='default')
+        self.assertTrue(collector.can_fast_delete(Task.objects.all()))
+        self.assertTrue(collector.can_fast_delete(InventoryMovement.objects.all()))
+        self.assertFalse(collector.can_fast_delete(ProductImage.objects.all()))
+
+    def test_migrate_media_deduplicates_existing_files(self):
+        os.makedirs(os.path.join(self.media, 'products'))
+        content = self.photo().read()
+        for name in ('a.png', 'b.png'):
+            with open(os.path.join(self.media, 'products', name), 'wb') as file:
+                file.write(content)
+        first = ProductImage.objects.create(product=self.product, image=self.photo(color=(1, 1, 1)))
+        second = ProductImage.objects.create(product=self.other, image=self.photo(color=(1, 1, 1)))
+        ProductImage.objects.filter(pk=first.pk).update(image='products/a.png', is_main=True)
+        ProductImage.objects.filter(pk=second.pk).update(image='products/b.png')
+
+        out = StringIO()
+        call_command('migrate_media', '--dry-run', stdout=out)
+        self.assertIn(f'2 files ({2 * len(content)} bytes) would be stored as 1 blobs ({len(content)} bytes)', out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.media, 'products', 'a.png')))
+
+        out = StringIO()
+        call_command('migrate_media', stdout=out)
+        self.assertIn(f'{len(content)} bytes reclaimed', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image.read(), content)
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'products', 'a.png')))
+        self.assertEqual(Blob.objects.get(name=first.image.name).ref_count, 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.main_image, first.image.name)
+
+
+class ResumableUploadTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media, UPLOAD_CHUNK_MAX_BYTES=4096)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.product = Product.objects.create(seller=self.seller, name='Vazo', slug='vazo', status='ACTIVE', description='')
+        self.client.force_authenticate(user=self.seller)
+
+        out = BytesIO()
+        Image.effect_noise((120, 90), 64).convert('RGB').save(out, format='PNG')
+        self.content = out.getvalue()
+
+    def start(self, content, sha256=None):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'photo.png', 'size': len(content), 'sha256': sha256 or hashlib.sha256(content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['received'], 0)
+        return response.data['id']
+
+    def put(self, upload_id, content, start, end):
+        return self.client.put(
+            f'/api/uploads/{upload_id}/', data=content[start:end], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(content)}',
+        )
+
+    def send(self, upload_id, content, chunk=4096):
+        for start in range(0, len(content), chunk):
+            self.assertEqual(self.put(upload_id, content, start, min(start + chunk, len(content))).status_code, 200)
+        return self.client.post(f'/api/uploads/{upload_id}/complete/')
+
+    def test_chunks_resume_and_attach_to_product(self):
+        content = self.content
+        self.assertGreater(len(content), 8192)
+        upload_id = self.start(content)
+
+        self.assertEqual(self.put(upload_id, content, 0, 4096).data['received'], 4096)
+        # A chunk past the received bytes is refused with the offset to resume from
+        response = self.put(upload_id, content, 8192, 12288)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 4096)
+        # Too large, and too early to complete
+        self.assertEqual(self.put(upload_id, content, 4096, 4096 + 5000).status_code, 400)
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/').status_code, 409)
+
+        # After a dropped connection the client asks where to resume
+        resume = self.client.get(f'/api/uploads/{upload_id}/').data['received']
+        for start in range(resume, len(content), 4096):
+            self.assertEqual(self.put(upload_id, content, start, min(start + 4096, len(content))).status_code, 200)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'COMPLETE')
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(Blob.objects.get().digest, digest)
+        self.assertFalse(os.listdir(os.path.join(self.media, 'blobs', 'tmp')))
+
+        response = self.client.post(f'/api/products/{self.product.id}/upload_image/', {'upload': upload_id, 'is_main': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        image = ProductImage.objects.get(product=self.product)
+        self.assertEqual(image.image.name, f'blobs/{digest[:2]}/{digest}.png')
+        self.assertEqual(image.image.read(), content)
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+        # Someone else cannot use the upload
+        other = User.objects.create_user(email='other@test.com', password='password', role='SELLER')
+        theirs = Product.objects.create(seller=other, name='Kase', slug='kase', status='ACTIVE', description='')
+        self.client.force_authenticate(user=other)
+        response = self.client.post(f'/api/products/{theirs.id}/upload_image/', {'upload': upload_id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_checksum_mismatch_fails_the_upload(self):
+        upload_id = self.start(self.content, sha256='0' * 64)
+        response = self.send(upload_id, self.content)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().status, 'FAILED')
+        self.assertFalse(Blob.objects.exists())
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/').status_code, 409)
+
+    def test_upload_as_dispute_attachment(self):
+        buyer = User.objects.create_user(email='buyer@test.com', role='BUYER')
+        order = Order.objects.create(buyer=buyer, total_amount=100, status='PAID', shipping_address={}, billing_address={})
+        seller_order = SellerOrder.objects.create(order=order, seller=self.seller, total_amount=100, status='SHIPPED')
+        dispute = Dispute.objects.create(order=seller_order, created_by=buyer, reason='DAMAGED', description='Broken')
+
+        self.client.force_authenticate(user=buyer)
+        receipt = b'%PDF-1.4 receipt' * 100
+        upload_id = self.start(receipt)
+        self.assertEqual(self.send(upload_id, receipt).status_code, 200)
+        response = self.client.post(f'/api/disputes/{dispute.id}/message/', {'content': 'Fatura ekte', 'upload': upload_id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DisputeMessage.objects.get().attachment.read(), receipt)
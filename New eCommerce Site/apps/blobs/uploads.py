@@ -0,0 +1,140 @@
+# apps/blobs/uploads.py
+"""
+Resumable uploads, so a large photo over a slow mobile link does not start
+over from zero after a dropped connection.
+
+    POST   /api/uploads/                {filename, size, sha256}    -> session, received = 0
+    PUT    /api/uploads/<id>/           raw bytes + Content-Range: bytes <start>-<end>/<size>
+    GET    /api/uploads/<id>/           -> received, the offset to resume from
+    POST   /api/uploads/<id>/complete/  checks size and SHA-256, stores the blob
+    DELETE /api/uploads/<id>/           abort
+
+Each chunk is streamed from the request into the part file at its offset,
+STREAM_BLOCK bytes at a time. A chunk may start anywhere up to `received`
+(resending a chunk overwrites the same bytes) but not past it, so the bytes
+up to `received` are always contiguous. Completing moves the part file into
+the blob store with a rename; the blob is then attached by sending the
+session id as `upload` instead of a file to products/<id>/upload_image/ or
+disputes/<id>/message/.
+"""
+import os
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadSession
+from .storage import PREFIX, blob_storage, hash_chunks
+
+STREAM_BLOCK = 64 * 1024
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+class UploadError(Exception):
+    """A request the upload session cannot accept; the message is returned to the client."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def max_upload_bytes():
+    return getattr(settings, 'UPLOAD_MAX_BYTES', 50 * 1024 * 1024)
+
+def max_chunk_bytes():
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_BYTES', 8 * 1024 * 1024)
+
+def part_path(session):
+    return blob_storage().path(f'{PREFIX}/tmp/upload-{session.pk}.part')
+
+def start_upload(owner, filename, size, sha256):
+    session = UploadSession.objects.create(owner=owner, filename=filename, size=size, sha256=sha256.lower())
+    os.makedirs(os.path.dirname(part_path(session)), exist_ok=True)
+    open(part_path(session), 'wb').close()
+    return session
+
+def write_chunk(session, content_range, stream):
+    """Stream one chunk into the part file. Returns the session with `received` updated."""
+    if session.status != UploadSession.Status.OPEN:
+        raise UploadError('Upload is not open', status=409)
+    match = CONTENT_RANGE.match(content_range or '')
+    if not match:
+        raise UploadError('Content-Range: bytes <start>-<end>/<size> required')
+    start, end, total = map(int, match.groups())
+    if total != session.size or end < start or end >= total:
+        raise UploadError(f'Content-Range must lie within the {session.size} bytes of the upload')
+    length = end - start + 1
+    if length > max_chunk_bytes():
+        raise UploadError(f'Chunks may be at most {max_chunk_bytes()} bytes')
+    if start > session.received:
+        raise UploadError(f'Expected a chunk starting at byte {session.received}', status=409)
+
+    written = 0
+    try:
+        with open(part_path(session), 'r+b') as part:
+            part.seek(start)
+            while written < length:
+                block = stream.read(min(STREAM_BLOCK, length - written)) if stream else b''
+                if not block:
+                    break
+                part.write(block)
+                written += len(block)
+    except FileNotFoundError:
+        raise UploadError('Upload expired, start a new one', status=404)
+    if written != length or (stream and stream.read(1)):
+        raise UploadError('Chunk length does not match Content-Range')
+
+    # Only ever moves forward, whatever order concurrent chunks finish in
+    UploadSession.objects.filter(pk=session.pk, received__lt=end + 1).update(received=end + 1, updated_at=timezone.now())
+    session.refresh_from_db()
+    return session
+
+def complete_upload(session):
+    """Check size and checksum, then move the part file into the blob store. Returns the session."""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return session
+        if session.status != UploadSession.Status.OPEN:
+            raise UploadError('Upload failed, start a new one', status=409)
+        if session.received != session.size:
+            raise UploadError(f'Received {session.received} of {session.size} bytes', status=409)
+
+        path = part_path(session)
+        try:
+            with open(path, 'rb') as part:
+                digest, size = hash_chunks(iter(lambda: part.read(STREAM_BLOCK), b''))
+        except FileNotFoundError:
+            raise UploadError('Upload expired, start a new one', status=404)
+        if size == session.size and digest == session.sha256:
+            session.blob_name = blob_storage().adopt(path, session.filename, digest, size)
+            session.status = UploadSession.Status.COMPLETE
+        else:
+            os.remove(path)
+            session.status = UploadSession.Status.FAILED
+        session.save(update_fields=['blob_name', 'status', 'updated_at'])
+    if session.status == UploadSession.Status.FAILED:
+        raise UploadError('Checksum does not match the uploaded bytes, upload the file again')
+    return session
+
+def abort_upload(session):
+    if os.path.exists(part_path(session)):
+        os.remove(part_path(session))
+    session.delete()
+
+def completed_upload(owner, upload_id):
+    """Blob name of a completed upload of `owner`, ready to assign to a blob field."""
+    try:
+        session = UploadSession.objects.get(pk=upload_id, owner=owner, status=UploadSession.Status.COMPLETE)
+    except (UploadSession.DoesNotExist, ValidationError):
+        raise UploadError('Unknown or unfinished upload')
+    if not blob_storage().exists(session.blob_name):
+        raise UploadError('Upload expired, start a new one')
+    return session.blob_name
+
+def purge_expired_uploads():
+    """Delete sessions untouched for UPLOAD_SESSION_TTL seconds with their part files. Returns the count."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 3600))
+    purged = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        abort_upload(session)
+        purged += 1
+    return purged
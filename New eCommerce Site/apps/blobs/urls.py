@@ -0,0 +1,11 @@
+# apps/blobs/urls.py
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import UploadSessionViewSet
+
+router = DefaultRouter()
+router.register('', UploadSessionViewSet, basename='uploads')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,43 @@
+# apps/blobs/views.py
+from rest_framework import viewsets, mixins, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from .uploads import UploadError, start_upload, write_chunk, complete_upload, abort_upload
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Resumable uploads (see blobs/uploads.py): create, PUT chunks, complete; GET shows where to resume."""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = start_upload(request.user, **serializer.validated_data)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, pk=None):
+        session = self.get_object()
+        try:
+            # Raw body, read from the stream block by block (request.data is never parsed)
+            session = write_chunk(session, request.headers.get('Content-Range'), request.stream)
+        except UploadError as exc:
+            return Response({'error': str(exc), 'received': session.received}, status=exc.status)
+        return Response(self.get_serializer(session).data)
+
+    def destroy(self, request, pk=None):
+        abort_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = self.get_object()
+        try:
+            session = complete_upload(session)
+        except UploadError as exc:
+            return Response({'error': str(exc), 'received': session.received}, status=exc.status)
+        return Response(self.get_serializer(session).data)
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import apps.blobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='disputemessage',
+            name='attachment',
+            field=models.FileField(blank=True, null=True, storage=apps.blobs.storage.blob_storage, upload_to='dispute_attachments/', verbose_name='ek'),
+        ),
+    ]
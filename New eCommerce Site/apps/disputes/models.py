@@ -3,6 +3,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.accounts.models import User
 from apps.orders.models import SellerOrder
+from apps.blobs.storage import blob_storage
 
 class Dispute(models.Model):
     class Status(models.TextChoices):
@@ -53,7 +54,7 @@ class DisputeMessage(models.Model):
     dispute = models.ForeignKey(Dispute, on_delete=models.CASCADE, related_name='messages', verbose_name=_('itiraz'))
     sender = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_('gönderici'))
     content = models.TextField(_('içerik'))
-    attachment = models.FileField(_('ek'), upload_to='dispute_attachments/', blank=True, null=True)
+    attachment = models.FileField(_('ek'), upload_to='dispute_attachments/', storage=blob_storage, blank=True, null=True)
     
     created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
 
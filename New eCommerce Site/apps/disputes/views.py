@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Dispute, DisputeMessage
 from .serializers import DisputeSerializer, DisputeMessageSerializer
+from apps.blobs.uploads import UploadError, completed_upload
 
 class DisputeViewSet(viewsets.ModelViewSet):
     serializer_class = DisputeSerializer
@@ -21,15 +22,24 @@ class DisputeViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def message(self, request, pk=None):
+        """Post a message; attach a file as multipart `attachment` or as `upload` (a completed resumable upload id)"""
         dispute = self.get_object()
         content = request.data.get('content')
         
         if not content:
             return Response({'error': 'Content required'}, status=400)
 
+        attachment = request.FILES.get('attachment')
+        if not attachment and request.data.get('upload'):
+            try:
+                attachment = completed_upload(request.user, request.data['upload'])
+            except UploadError as exc:
+                return Response({'error': str(exc)}, status=400)
+
         DisputeMessage.objects.create(
             dispute=dispute,
             sender=request.user,
-            content=content
+            content=content,
+            attachment=attachment
         )
         return Response({'status': 'Message sent'})
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class MessagingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.messaging'
+
+    def ready(self):
+        import apps.messaging.signals
+
     verbose_name = 'Mesajlaşma'
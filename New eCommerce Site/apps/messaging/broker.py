@@ -0,0 +1,140 @@
+# apps/messaging/broker.py
+import asyncio
+import json
+import queue
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """
+    Receives payloads published to its channels.
+    Created inside an event loop it is awaited with `await get()`,
+    created from sync code it is read with `get_blocking()`.
+    """
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = list(channels)
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+        except RuntimeError:
+            self._loop = None
+            self._queue = queue.Queue()
+
+    def put(self, payload):
+        if self._loop is None:
+            self._queue.put_nowait(payload)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, payload)
+        except RuntimeError:
+            pass # Loop already closed, the client is gone
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_blocking(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BaseBroker:
+    """Publish/subscribe interface used for real-time message delivery."""
+    def publish(self, channel, payload):
+        raise NotImplementedError
+
+    def subscribe(self, channels):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Delivers to subscribers of the same process only.
+    Enough for tests and a single ASGI worker.
+    """
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(payload)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Fans out through Redis pub/sub so every worker receives every message.
+    Each process keeps one listener thread and hands payloads to its
+    local subscribers. Needs the `redis` package.
+    Options: url (default redis://localhost:6379/0), prefix.
+    """
+    def __init__(self, url='redis://localhost:6379/0', prefix='messaging:', **options):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker requires the "redis" package.')
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f'{prefix}*': self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def _on_message(self, message):
+        channel = message['channel'].decode()[len(self.prefix):]
+        super().publish(channel, json.loads(message['data']))
+
+    def publish(self, channel, payload):
+        self._redis.publish(f'{self.prefix}{channel}', json.dumps(payload))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'MESSAGING_BROKER', 'apps.messaging.broker.InProcessBroker')
+            _broker = import_string(path)(**getattr(settings, 'MESSAGING_BROKER_OPTIONS', {}))
+        return _broker
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_state(apps, schema_editor):
+    """Last-message pointers and read cursors from the old read_by M2M."""
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    ConversationReadState = apps.get_model('messaging', 'ConversationReadState')
+
+    for conversation in Conversation.objects.prefetch_related('participants').iterator(chunk_size=500):
+        messages = list(
+            Message.objects.filter(conversation=conversation).order_by('created_at', 'id').values('id', 'sender_id')
+        )
+        read_pairs = set(
+            Message.read_by.through.objects.filter(message__conversation=conversation)
+            .values_list('message_id', 'user_id')
+        )
+        if messages:
+            Conversation.objects.filter(pk=conversation.pk).update(last_message_id=messages[-1]['id'])
+
+        states = []
+        for user in conversation.participants.all():
+            seen = [m['id'] for m in messages if m['sender_id'] == user.pk or (m['id'], user.pk) in read_pairs]
+            last_read = max(seen, default=0)
+            unread = sum(1 for m in messages if m['id'] > last_read and m['sender_id'] != user.pk)
+            states.append(ConversationReadState(
+                conversation=conversation, user=user, last_read_message_id=last_read, unread_count=unread,
+            ))
+        ConversationReadState.objects.bulk_create(states)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_message_conv_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message', verbose_name='son mesaj'),
+        ),
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.BigIntegerField(default=0, verbose_name='son okunan mesaj')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='okunmamış mesaj sayısı')),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='messaging.conversation', verbose_name='sohbet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_read_states', to=settings.AUTH_USER_MODEL, verbose_name='kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Okunma Durumu',
+                'verbose_name_plural': 'Okunma Durumları',
+                'unique_together': {('conversation', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_read_state, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_by',
+        ),
+    ]
@@ -9,6 +9,8 @@ class Conversation(models.Model):
     order = models.ForeignKey(SellerOrder, on_delete=models.CASCADE, related_name='conversations', verbose_name=_('sipariş'))
     
     participants = models.ManyToManyField(User, related_name='conversations', verbose_name=_('katılımcılar'))
+    # Denormalized pointer for the inbox, kept current by messaging/signals.py
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name=_('son mesaj'))
     
     created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
     updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True) # Last message time
@@ -27,14 +29,34 @@ class Message(models.Model):
     content = models.TextField(_('içerik'))
     is_system_message = models.BooleanField(_('sistem mesajı mı'), default=False)
     
-    read_by = models.ManyToManyField(User, related_name='read_messages', blank=True, verbose_name=_('okuyanlar'))
-    
     created_at = models.DateTimeField(_('gönderilme tarihi'), auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Windowed history reads (since_id / before_id), see ConversationViewSet.messages
+            models.Index(fields=['conversation', 'created_at', 'id'], name='message_conv_created_idx'),
+        ]
         verbose_name = _('Mesaj')
         verbose_name_plural = _('Mesajlar')
 
     def __str__(self):
         return f"Msg {self.id} from {self.sender}"
+
+class ConversationReadState(models.Model):
+    """
+    Per participant read cursor. Everything up to last_read_message_id is read;
+    unread_count is maintained incrementally so the inbox never counts messages.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_states', verbose_name=_('sohbet'))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_read_states', verbose_name=_('kullanıcı'))
+    last_read_message_id = models.BigIntegerField(_('son okunan mesaj'), default=0)
+    unread_count = models.PositiveIntegerField(_('okunmamış mesaj sayısı'), default=0)
+
+    class Meta:
+        unique_together = ('conversation', 'user')
+        verbose_name = _('Okunma Durumu')
+        verbose_name_plural = _('Okunma Durumları')
+
+    def __str__(self):
+        return f"{self.user} @ Chat #{self.conversation_id}: {self.unread_count} unread"
@@ -1,26 +1,37 @@
 # apps/messaging/serializers.py
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
-from .models import Conversation, Message
+from apps.accounts.models import User
+from .models import Conversation, ConversationReadState, Message
 from apps.accounts.serializers import UserSerializer
 
 class MessageSerializer(serializers.ModelSerializer):
-    sender_id = serializers.IntegerField(source='sender.id', read_only=True)
+    sender_id = serializers.IntegerField(read_only=True) # FK column, no sender lookup per message
     
     class Meta:
         model = Message
         fields = ['id', 'sender_id', 'content', 'created_at', 'is_system_message']
 
 class ConversationSerializer(serializers.ModelSerializer):
-    last_message = serializers.SerializerMethodField()
-    order = serializers.IntegerField(source='order.id', read_only=True)
+    last_message = MessageSerializer(read_only=True) # Denormalized pointer, joined by prefetch_queryset
+    order = serializers.IntegerField(source='order_id', read_only=True)
     participants = UserSerializer(many=True, read_only=True)
+    unread_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Conversation
-        fields = ['id', 'order', 'participants', 'updated_at', 'last_message']
-    
-    def get_last_message(self, obj):
-        last_msg = obj.messages.last()
-        if last_msg:
-             return MessageSerializer(last_msg).data
-        return None
+        fields = ['id', 'order', 'participants', 'updated_at', 'last_message', 'unread_count']
+
+    @staticmethod
+    def prefetch_queryset(queryset, user):
+        """Inbox plan: conversations + last message in one query, participants with profiles in one more."""
+        unread = ConversationReadState.objects.filter(conversation=OuterRef('pk'), user=user).values('unread_count')[:1]
+        return queryset.select_related('last_message').annotate(
+            unread=Coalesce(Subquery(unread), 0),
+        ).prefetch_related(
+            Prefetch('participants', queryset=User.objects.select_related('seller_profile', 'buyer_profile')),
+        )
+
+    def get_unread_count(self, obj):
+        return getattr(obj, 'unread', 0)
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Conversation, ConversationReadState, Message
+from .broker import get_broker, user_channel
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def create_read_states(sender, instance, action, pk_set, reverse, **kwargs):
+    """Every participant gets a read cursor as soon as they join."""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # user.conversations.add(...): instance is the user, pk_set the conversations
+        pairs = [(conversation_id, instance.pk) for conversation_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    ConversationReadState.objects.bulk_create(
+        [ConversationReadState(conversation_id=c, user_id=u) for c, u in pairs],
+        ignore_conflicts=True,
+    )
+
+@receiver(post_save, sender=Message)
+def update_conversation_state(sender, instance, created, **kwargs):
+    """
+    Move the last-message pointer and bump the unread counters with
+    column-limited UPDATEs; the sender has read everything up to their own message.
+    """
+    if not created:
+        return
+    Conversation.objects.filter(pk=instance.conversation_id).update(
+        last_message=instance, updated_at=timezone.now(),
+    )
+    states = ConversationReadState.objects.filter(conversation_id=instance.conversation_id)
+    states.exclude(user_id=instance.sender_id).update(unread_count=F('unread_count') + 1)
+    states.filter(user_id=instance.sender_id).update(last_read_message_id=instance.id, unread_count=0)
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    """Deliver new messages (including order system messages) to every participant's stream."""
+    if not created:
+        return
+
+    def publish():
+        from .serializers import MessageSerializer
+        payload = {
+            'type': 'message',
+            'conversation': instance.conversation_id,
+            'message': MessageSerializer(instance).data,
+        }
+        broker = get_broker()
+        for user_id in instance.conversation.participants.values_list('id', flat=True):
+            broker.publish(user_channel(user_id), payload)
+
+    transaction.on_commit(publish)
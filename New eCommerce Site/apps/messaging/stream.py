@@ -0,0 +1,87 @@
+# apps/messaging/stream.py
+import json
+import time
+from collections import deque
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+from .models import Message
+from .serializers import MessageSerializer
+from .broker import get_broker, user_channel
+
+HEARTBEAT_SECONDS = 15
+REPLAY_LIMIT = 100
+# Messages saved by another process (the task workers' system messages) never reach an
+# InProcessBroker here: the database is checked for them this often
+RECHECK_SECONDS = 2
+
+@sync_to_async
+def latest_message_id(user):
+    return Message.objects.filter(conversation__participants=user).aggregate(latest=Max('id'))['latest'] or 0
+
+def format_event(payload):
+    return f"id: {payload['message']['id']}\nevent: message\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@sync_to_async
+def missed_events(user, last_event_id):
+    """Messages sent while the client was reconnecting (EventSource sends Last-Event-ID)."""
+    msgs = (
+        Message.objects.filter(conversation__participants=user, id__gt=last_event_id)
+        .order_by('id')[:REPLAY_LIMIT]
+    )
+    return [
+        {'type': 'message', 'conversation': m.conversation_id, 'message': MessageSerializer(m).data}
+        for m in msgs
+    ]
+
+async def message_stream(request):
+    """
+    Server-sent events with every new message of the user's conversations.
+    Long-lived, so it is only served by the ASGI application (config/asgi.py);
+    under WSGI it answers 501 and clients keep using the REST endpoints.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Streaming requires the ASGI server'}, status=501)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    # Subscribe before replaying so nothing falls between the two
+    subscription = get_broker().subscribe([user_channel(user.id)])
+
+    async def events():
+        # A message can come both from the broker and from the database check: sent once
+        sent = deque(maxlen=10 * REPLAY_LIMIT)
+        cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else await latest_message_id(user)
+        last_write = next_check = time.monotonic()
+        try:
+            yield 'retry: 3000\n\n'
+            payloads = await missed_events(user, cursor) if last_event_id else []
+            while True:
+                for payload in payloads:
+                    message_id = payload['message']['id']
+                    if message_id in sent:
+                        continue
+                    sent.append(message_id)
+                    cursor = max(cursor, message_id)
+                    last_write = time.monotonic()
+                    yield format_event(payload)
+                payload = await subscription.get(timeout=max(0, next_check - time.monotonic()))
+                payloads = [payload] if payload is not None else []
+                if time.monotonic() < next_check:
+                    continue
+                next_check = time.monotonic() + RECHECK_SECONDS
+                payloads += await missed_events(user, cursor)
+                if not payloads and time.monotonic() - last_write >= HEARTBEAT_SECONDS:
+                    last_write = time.monotonic()
+                    yield ': keep-alive\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Don't let a proxy buffer the stream
+    return response
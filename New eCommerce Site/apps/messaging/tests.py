@@ -1,3 +1,278 @@
-from django.test import TestCase
+# apps/messaging/tests.py
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+from asgiref.sync import sync_to_async
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from apps.orders.models import Order, SellerOrder
+from apps.tasks.queue import run_pending
+from apps.accounts.models import SellerProfile, BuyerProfile
+from .models import Conversation, ConversationReadState, Message
+from .broker import InProcessBroker, get_broker, user_channel
+from .views import ConversationViewSet
 
-# Create your tests here.
+User = get_user_model()
+
+class BrokerTests(APITestCase):
+    def test_in_process_publish_subscribe(self):
+        broker = InProcessBroker()
+        with broker.subscribe(['user:1']) as sub:
+            broker.publish('user:1', {'n': 1})
+            broker.publish('user:2', {'n': 2})
+            self.assertEqual(sub.get_blocking(timeout=1), {'n': 1})
+            self.assertIsNone(sub.get_blocking(timeout=0.01))
+        broker.publish('user:1', {'n': 3}) # No subscribers left, dropped
+
+class MessageDeliveryTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        order = Order.objects.create(buyer=self.buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        self.s_order = SellerOrder.objects.create(order=order, seller=self.seller, total_amount=10)
+
+    def test_new_message_reaches_participants(self):
+        conversation = Conversation.objects.create(order=self.s_order)
+        conversation.participants.add(self.buyer, self.seller)
+
+        with get_broker().subscribe([user_channel(self.seller.id)]) as sub:
+            self.client.force_authenticate(user=self.buyer)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/api/messaging/{conversation.id}/messages/', {'content': 'Merhaba'})
+            event = sub.get_blocking(timeout=1)
+        self.assertEqual(event['conversation'], conversation.id)
+        self.assertEqual(event['message']['content'], 'Merhaba')
+
+    def test_order_confirmation_flows_through_stream(self):
+        with get_broker().subscribe([user_channel(self.buyer.id)]) as sub:
+            self.client.force_authenticate(user=self.seller)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/orders/seller/{self.s_order.id}/confirm/')
+                self.assertFalse(Message.objects.exists()) # Queued, not sent in the request
+                run_pending()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            event = sub.get_blocking(timeout=1)
+        self.assertTrue(event['message']['is_system_message'])
+
+    def test_stream_needs_asgi(self):
+        self.client.force_login(self.buyer)
+        response = self.client.get('/api/messaging/stream/')
+        self.assertEqual(response.status_code, 501)
+
+class MessageWindowTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        order = Order.objects.create(buyer=self.buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        self.conversation = Conversation.objects.create(order=SellerOrder.objects.create(order=order, seller=self.seller, total_amount=10))
+        self.conversation.participants.add(self.buyer, self.seller)
+        self.ids = [
+            Message.objects.create(conversation=self.conversation, sender=self.seller, content=str(i)).id
+            for i in range(60)
+        ]
+        self.client.force_authenticate(user=self.buyer)
+        self.url = f'/api/messaging/{self.conversation.id}/messages/'
+
+    def ids_of(self, response):
+        return [m['id'] for m in response.data]
+
+    def test_default_window_is_latest_messages(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.ids_of(response), self.ids[-50:])
+        self.assertEqual(response['X-Has-More'], 'true')
+
+    def test_since_and_before(self):
+        response = self.client.get(self.url, {'since_id': self.ids[55]})
+        self.assertEqual(self.ids_of(response), self.ids[56:])
+        self.assertEqual(response['X-Has-More'], 'false')
+
+        response = self.client.get(self.url, {'before_id': self.ids[10], 'limit': 5})
+        self.assertEqual(self.ids_of(response), self.ids[5:10])
+
+    def test_long_poll_returns_immediately_when_messages_exist(self):
+        start = time.monotonic()
+        response = self.client.get(self.url, {'since_id': self.ids[58], 'wait': 10})
+        self.assertEqual(self.ids_of(response), self.ids[59:])
+        self.assertLess(time.monotonic() - start, 5)
+
+class InboxTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        BuyerProfile.objects.create(user=self.buyer)
+        self.client.force_authenticate(user=self.buyer)
+
+    def make_conversation(self, messages=1):
+        seller = User.objects.create_user(email=f'seller{User.objects.count()}@test.com', password='password', role='SELLER')
+        SellerProfile.objects.create(user=seller, business_name='Store')
+        order = Order.objects.create(buyer=self.buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        conversation = Conversation.objects.create(order=SellerOrder.objects.create(order=order, seller=seller, total_amount=10))
+        conversation.participants.add(self.buyer, seller)
+        for i in range(messages):
+            Message.objects.create(conversation=conversation, sender=seller, content=f'msg {i}')
+        return conversation, seller
+
+    def unread(self, conversation, user):
+        return ConversationReadState.objects.get(conversation=conversation, user=user).unread_count
+
+    def test_inbox_query_count_is_constant(self):
+        self.make_conversation()
+        with self.assertNumQueries(2):
+            self.client.get('/api/messaging/')
+        for _ in range(5):
+            self.make_conversation(messages=3)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/messaging/')
+        self.assertEqual(len(response.data), 6)
+
+    def test_last_message_and_unread_count(self):
+        conversation, seller = self.make_conversation(messages=3)
+        last = Message.objects.filter(conversation=conversation).last()
+
+        row = self.client.get('/api/messaging/').data[0]
+        self.assertEqual(row['last_message']['id'], last.id)
+        self.assertEqual(row['order'], conversation.order_id)
+        self.assertEqual(row['unread_count'], 3)
+        self.assertEqual(self.unread(conversation, seller), 0)
+
+    def test_reply_and_mark_read(self):
+        conversation, seller = self.make_conversation(messages=2)
+
+        response = self.client.post(f'/api/messaging/{conversation.id}/read/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        state = ConversationReadState.objects.get(conversation=conversation, user=self.buyer)
+        self.assertEqual(state.unread_count, 0)
+        self.assertEqual(state.last_read_message_id, Message.objects.filter(conversation=conversation).last().id)
+
+        self.client.post(f'/api/messaging/{conversation.id}/messages/', {'content': 'Tesekkurler'})
+        self.assertEqual(self.unread(conversation, seller), 1)
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message.content, 'Tesekkurler')
+
+    def test_mark_read_takes_the_cursor_in_its_update(self):
+        conversation, seller = self.make_conversation(messages=2)
+        get_object = ConversationViewSet.get_object
+
+        def reply_meanwhile(view):
+            # A message arrives after the conversation was loaded, before the cursor moves
+            found = get_object(view)
+            Message.objects.create(conversation=conversation, sender=seller, content='Az önce')
+            return found
+
+        with mock.patch.object(ConversationViewSet, 'get_object', reply_meanwhile):
+            self.client.post(f'/api/messaging/{conversation.id}/read/')
+        state = ConversationReadState.objects.get(conversation=conversation, user=self.buyer)
+        self.assertEqual((state.last_read_message_id, state.unread_count), (Message.objects.latest('id').id, 0))
+
+        # One saved without its signal yet: past the cursor, so still unread
+        Message.objects.bulk_create([Message(conversation=conversation, sender=seller, content='Yeni')])
+        self.client.post(f'/api/messaging/{conversation.id}/read/')
+        self.assertEqual(self.unread(conversation, seller), 0)
+        self.assertEqual(self.unread(conversation, self.buyer), 1)
+
+class MessageLongPollTests(TransactionTestCase):
+    def test_long_poll_wakes_up_on_new_message(self):
+        buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        order = Order.objects.create(buyer=buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        conversation = Conversation.objects.create(order=SellerOrder.objects.create(order=order, seller=seller, total_amount=10))
+        conversation.participants.add(buyer, seller)
+        last = Message.objects.create(conversation=conversation, sender=seller, content='first')
+
+        def reply():
+            time.sleep(0.3)
+            Message.objects.create(conversation=conversation, sender=seller, content='second')
+
+        threading.Thread(target=reply).start()
+        self.client.force_login(buyer)
+        start = time.monotonic()
+        response = self.client.get(f'/api/messaging/{conversation.id}/messages/', {'since_id': last.id, 'wait': 10})
+        self.assertEqual([m['content'] for m in response.json()], ['second'])
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_long_poll_sees_message_the_broker_missed(self):
+        buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        order = Order.objects.create(buyer=buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        conversation = Conversation.objects.create(order=SellerOrder.objects.create(order=order, seller=seller, total_amount=10))
+        conversation.participants.add(buyer, seller)
+        last = Message.objects.create(conversation=conversation, sender=seller, content='first')
+
+        def reply_elsewhere():
+            # Saved by another process: nothing is published to this process's broker
+            time.sleep(0.3)
+            Message.objects.bulk_create([Message(conversation=conversation, sender=seller, content='second')])
+
+        threading.Thread(target=reply_elsewhere).start()
+        self.client.force_login(buyer)
+        start = time.monotonic()
+        response = self.client.get(f'/api/messaging/{conversation.id}/messages/', {'since_id': last.id, 'wait': 10})
+        self.assertEqual([m['content'] for m in response.json()], ['second'])
+        self.assertLess(time.monotonic() - start, 5)
+
+class MessageStreamTests(TransactionTestCase):
+    def test_sse_stream_delivers_and_replays(self):
+        async def scenario():
+            buyer = await sync_to_async(User.objects.create_user)(email='buyer@test.com', password='password', role='BUYER')
+            seller = await sync_to_async(User.objects.create_user)(email='seller@test.com', password='password', role='SELLER')
+
+            @sync_to_async
+            def setup():
+                order = Order.objects.create(buyer=buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+                conversation = Conversation.objects.create(order=SellerOrder.objects.create(order=order, seller=seller, total_amount=10))
+                conversation.participants.add(buyer, seller)
+                first = Message.objects.create(conversation=conversation, sender=seller, content='Önceki')
+                return conversation, first
+            conversation, first = await setup()
+
+            await self.async_client.aforce_login(buyer)
+            response = await self.async_client.get('/api/messaging/stream/', headers={'Last-Event-ID': str(first.id - 1)})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            self.assertIn('Önceki', (await anext(stream)).decode())
+
+            await sync_to_async(Message.objects.create)(conversation=conversation, sender=seller, content='Yeni')
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+            data = json.loads(chunk.split('data: ', 1)[1])
+            self.assertEqual(data['message']['content'], 'Yeni')
+            await stream.aclose()
+
+        asyncio.run(scenario())
+
+    def test_sse_stream_gets_messages_from_task_workers(self):
+        from apps.orders.tasks import notify_buyer
+
+        async def scenario():
+            buyer = await sync_to_async(User.objects.create_user)(email='buyer@test.com', password='password', role='BUYER')
+            seller = await sync_to_async(User.objects.create_user)(email='seller@test.com', password='password', role='SELLER')
+
+            @sync_to_async
+            def place():
+                order = Order.objects.create(buyer=buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+                return SellerOrder.objects.create(order=order, seller=seller, total_amount=10)
+            seller_order = await place()
+
+            await self.async_client.aforce_login(buyer)
+            response = await self.async_client.get('/api/messaging/stream/')
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+            @sync_to_async
+            def confirm_in_worker():
+                notify_buyer.delay(seller_order.id, seller.id, 'Siparişiniz onaylandı')
+                # The worker process has a broker of its own: nothing is published to this one
+                with mock.patch('apps.messaging.signals.get_broker', return_value=InProcessBroker()):
+                    self.assertEqual(run_pending(), (1, 0))
+            await confirm_in_worker()
+
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+            data = json.loads(chunk.split('data: ', 1)[1])
+            self.assertEqual(data['message']['content'], 'Siparişiniz onaylandı')
+            await stream.aclose()
+
+        asyncio.run(scenario())
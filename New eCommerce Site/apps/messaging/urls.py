@@ -2,10 +2,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ConversationViewSet
+from .stream import message_stream
 
 router = DefaultRouter()
 router.register('', ConversationViewSet, basename='conversations')
 
 urlpatterns = [
+    path('stream/', message_stream, name='message-stream'),
     path('', include(router.urls)),
 ]
@@ -1,36 +1,120 @@
 # apps/messaging/views.py
+import time
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, permissions, mixins, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Conversation, Message
+from .models import Conversation, ConversationReadState, Message
 from .serializers import ConversationSerializer, MessageSerializer
+from .broker import get_broker, user_channel
+
+MESSAGE_WINDOW = 50
+MAX_MESSAGE_WINDOW = 200
+MAX_LONG_POLL_SECONDS = 30
+# An InProcessBroker only hears messages saved by this process: look in the database this often too
+LONG_POLL_RECHECK_SECONDS = 1.5
 
 class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-updated_at', '-id') # Inbox order: most recent activity first
 
     def get_queryset(self):
         # Users see conversations they are part of
-        return Conversation.objects.filter(participants=self.request.user).order_by('-updated_at')
+        queryset = Conversation.objects.filter(participants=self.request.user).order_by('-updated_at')
+        if self.action in ('list', 'retrieve'):
+            queryset = ConversationSerializer.prefetch_queryset(queryset, self.request.user)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """
+        Mark the whole conversation as read: one UPDATE on the caller's read cursor.
+        The cursor and the count of what is still unread past it are both read by
+        that UPDATE, so a message arriving meanwhile is either read or counted.
+        """
+        conversation = self.get_object()
+        cursor = Coalesce(Subquery(Conversation.objects.filter(pk=conversation.pk).values('last_message_id')[:1]), 0)
+        unread = (
+            Message.objects.filter(conversation=conversation, id__gt=cursor)
+            .exclude(sender=request.user).order_by().values('conversation').annotate(total=Count('id')).values('total')[:1]
+        )
+        states = ConversationReadState.objects.filter(conversation=conversation, user=request.user)
+        values = {'last_read_message_id': cursor, 'unread_count': Coalesce(Subquery(unread), 0)}
+        if not states.update(**values):
+            ConversationReadState.objects.get_or_create(conversation=conversation, user=request.user)
+            states.update(**values)
+        return Response({'status': 'Conversation marked as read'})
 
     @action(detail=True, methods=['get', 'post'])
     def messages(self, request, pk=None):
         conversation = self.get_object()
         
         if request.method == 'GET':
-            msgs = conversation.messages.all()
-            return Response(MessageSerializer(msgs, many=True).data)
+            return self._message_window(request, conversation)
         
         if request.method == 'POST':
             content = request.data.get('content')
             if not content:
                 return Response({'error': 'Content required'}, status=400)
                 
+            # Timestamp, last message and unread counters follow via messaging/signals.py
             Message.objects.create(
                 conversation=conversation,
                 sender=request.user,
                 content=content
             )
-            # Update conversion timestamp
-            conversation.save()
             return Response({'status': 'Message sent'})
+
+    def _message_window(self, request, conversation):
+        """
+        A bounded slice of the history, oldest first:
+          ?since_id=N   messages after N (incremental fetch)
+          ?before_id=N  the page just before N (scrolling back)
+          neither       the latest messages
+          &limit=      window size (default 50, max 200)
+          &wait=S      with since_id: hold the request up to S seconds
+                       (max 30) until a new message arrives
+        X-Has-More tells whether the window was cut short.
+        """
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', MESSAGE_WINDOW)), MAX_MESSAGE_WINDOW)
+            since_id = int(params['since_id']) if params.get('since_id') else None
+            before_id = int(params['before_id']) if params.get('before_id') else None
+            wait = min(float(params.get('wait', 0)), MAX_LONG_POLL_SECONDS)
+        except ValueError:
+            return Response({'error': 'since_id, before_id, limit and wait must be numbers'}, status=400)
+        limit = max(limit, 1)
+
+        def fetch():
+            # Served by the (conversation, created_at, id) index
+            qs = Message.objects.filter(conversation=conversation)
+            if since_id is not None:
+                rows = list(qs.filter(id__gt=since_id).order_by('created_at', 'id')[:limit + 1])
+                return rows[:limit], len(rows) > limit
+            if before_id is not None:
+                qs = qs.filter(id__lt=before_id)
+            rows = list(qs.order_by('-created_at', '-id')[:limit + 1])
+            return rows[:limit][::-1], len(rows) > limit
+
+        if since_id is not None and wait > 0:
+            # Subscribe first so a message created between the query and the wait is not missed
+            with get_broker().subscribe([user_channel(request.user.id)]) as subscription:
+                msgs, has_more = fetch()
+                deadline = time.monotonic() + wait
+                while not msgs:
+                    remaining = max(0, deadline - time.monotonic())
+                    if not remaining:
+                        msgs, has_more = fetch() # One last look for anything the broker did not announce
+                        break
+                    event = subscription.get_blocking(timeout=min(remaining, LONG_POLL_RECHECK_SECONDS))
+                    if event is None or event.get('conversation') == conversation.id:
+                        msgs, has_more = fetch()
+        else:
+            msgs, has_more = fetch()
+
+        response = Response(MessageSerializer(msgs, many=True).data)
+        response['X-Has-More'] = 'true' if has_more else 'false'
+        return response
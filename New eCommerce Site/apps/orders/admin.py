@@ -1,6 +1,8 @@
 # orders/admin.py
-from django.contrib import admin
-from .models import Order, SellerOrder, OrderItem, Shipment
+from django.contrib import admin, messages
+from .models import Order, SellerOrder, OrderItem, Shipment, StockHold, IdempotencyKey, OrderStatusChange, PayoutStatement
+from .cancellation import cancel_orders
+from .transitions import transition
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -15,13 +17,35 @@ class SellerOrderInline(admin.StackedInline):
     show_change_link = True
     can_delete = False
 
+class OrderStatusChangeInline(admin.TabularInline):
+    model = OrderStatusChange
+    extra = 0
+    fields = ('created_at', 'seller_order', 'transition', 'from_status', 'to_status', 'duration', 'changed_by')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'buyer', 'total_amount', 'currency', 'status', 'created_at')
     list_filter = ('status', 'created_at', 'currency')
     search_fields = ('id', 'buyer__email', 'transaction_id')
     readonly_fields = ('created_at', 'updated_at', 'total_amount', 'shipping_address', 'billing_address', 'payment_method')
-    inlines = [SellerOrderInline]
+    inlines = [SellerOrderInline, OrderStatusChangeInline]
+    actions = ['cancel_selected']
+
+    @admin.action(description='Cancel selected orders and restore stock')
+    def cancel_selected(self, request, queryset):
+        cancelled, skipped = cancel_orders(queryset.values_list('id', flat=True))
+        self.message_user(request, f"{len(cancelled)} order(s) cancelled.")
+        if skipped:
+            self.message_user(
+                request,
+                f"{len(skipped)} order(s) skipped (completed, already cancelled or shipped): {', '.join(map(str, skipped[:20]))}",
+                messages.WARNING,
+            )
 
 class ShipmentInline(admin.StackedInline):
     model = Shipment
@@ -34,6 +58,12 @@ class SellerOrderAdmin(admin.ModelAdmin):
     search_fields = ('id', 'order__id', 'seller__email')
     readonly_fields = ('total_amount', 'commission_amount')
     inlines = [OrderItemInline, ShipmentInline]
+    actions = ['mark_delivered']
+
+    @admin.action(description='Mark selected shipped packets as delivered')
+    def mark_delivered(self, request, queryset):
+        moved = transition(SellerOrder, 'deliver', queryset.values_list('id', flat=True), by=request.user)
+        self.message_user(request, f"{len(moved)} packet(s) marked as delivered.")
     
     def order_link(self, obj):
         return f"Order #{obj.order.id}"
@@ -43,3 +73,33 @@ class SellerOrderAdmin(admin.ModelAdmin):
 class ShipmentAdmin(admin.ModelAdmin):
     list_display = ('tracking_number', 'carrier_name', 'seller_order', 'shipped_at')
     search_fields = ('tracking_number', 'seller_order__id')
+
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ('id', 'buyer', 'variant', 'quantity', 'status', 'expires_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('buyer__email', 'variant__sku')
+    readonly_fields = ('buyer', 'variant', 'quantity', 'status', 'expires_at', 'created_at', 'closed_at')
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'scope', 'user', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('scope', 'status')
+    search_fields = ('key', 'user__email')
+    readonly_fields = ('user', 'scope', 'key', 'fingerprint', 'status', 'response_status', 'response_body', 'created_at', 'expires_at')
+
+@admin.register(PayoutStatement)
+class PayoutStatementAdmin(admin.ModelAdmin):
+    list_display = ('id', 'seller', 'period_start', 'period_end', 'order_count', 'gross_amount', 'commission_amount', 'net_amount', 'created_at')
+    list_filter = ('period_end',)
+    search_fields = ('seller__email',)
+
+    # Written by `manage.py build_payouts` only, never edited
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
+
+    def ready(self):
+        # Registers the stock-restoring hook of the packet cancel/reject transitions
+        import apps.orders.cancellation
+        import apps.orders.signals
+
     verbose_name = 'Sipariş Yönetimi'
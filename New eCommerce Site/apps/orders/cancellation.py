@@ -0,0 +1,61 @@
+# apps/orders/cancellation.py
+from django.db import transaction
+from django.db.models import Sum
+from apps.products.inventory import Kind, add_stock
+from .models import Order, SellerOrder, OrderItem
+from .transitions import SELLER_ORDER_TRANSITIONS, ORDER_TRANSITIONS, on_transition, transition
+
+# Packets that already left the seller cannot be cancelled
+LOCKED_STATUSES = [SellerOrder.Status.SHIPPED, SellerOrder.Status.DELIVERED]
+CANCELLABLE_STATUSES = list(SELLER_ORDER_TRANSITIONS['cancel'].sources)
+
+
+@on_transition(SellerOrder, 'cancel')
+@on_transition(SellerOrder, 'reject')
+def restore_stock(seller_order_ids):
+    """
+    Put the items of the given seller orders back on the shelf.
+    One RELEASE movement per (packet, variant) goes to the inventory ledger
+    and the quantities land on stock shard rows with set-based F() updates,
+    so neither concurrent checkouts nor other cancellations are blocked or overwritten.
+    Runs for every cancelled packet as a transition hook.
+    Returns { variant_id: restored quantity }.
+    """
+    rows = (
+        OrderItem.objects.filter(seller_order_id__in=seller_order_ids)
+        .values('seller_order_id', 'variant_id').annotate(qty=Sum('quantity'))
+    )
+    return add_stock([
+        (row['variant_id'], Kind.RELEASE, row['qty'], f"seller_order:{row['seller_order_id']}") for row in rows
+    ])
+
+
+def cancel_seller_orders(seller_order_ids, by=None):
+    """
+    Cancel every still-cancellable packet among seller_order_ids and restore its stock.
+    Packets are moved by a conditional UPDATE, so a packet is never cancelled (and restocked) twice.
+    Returns the ids that were actually cancelled.
+    """
+    return transition(SellerOrder, 'cancel', seller_order_ids, by=by)
+
+
+@transaction.atomic
+def cancel_orders(order_ids, by=None):
+    """
+    Cancel whole orders: the order and all of its open packets.
+    Orders that are completed, already cancelled or have a shipped packet are skipped.
+    Returns (cancelled order ids, skipped order ids).
+    """
+    order_ids = set(order_ids)
+    eligible = (
+        Order.objects.select_for_update()
+        .filter(pk__in=order_ids, status__in=ORDER_TRANSITIONS['cancel'].sources)
+        .exclude(seller_orders__status__in=LOCKED_STATUSES)
+        .order_by('id').values_list('id', flat=True)
+    )
+    cancelled = transition(Order, 'cancel', list(eligible), by=by)
+    if cancelled:
+        cancel_seller_orders(
+            SellerOrder.objects.filter(order_id__in=cancelled).values_list('id', flat=True), by=by
+        )
+    return cancelled, sorted(order_ids - set(cancelled))
@@ -0,0 +1,148 @@
+# apps/orders/checkout.py
+from collections import OrderedDict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, When, F, Q, Value, IntegerField
+from apps.products.models import ProductVariant
+from apps.products.summary import refresh_product_summaries
+from apps.products.inventory import Kind, fold_stock_shards, record_movements
+from .models import Order, SellerOrder, OrderItem
+from .settlement import commission_rates, commission
+from .signals import order_placed
+
+class ReservationError(Exception):
+    """Raised when one or more cart lines cannot be reserved. Nothing is changed."""
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(failures[0]['error'] if failures else 'Reservation failed')
+
+
+class ReservedLine:
+    def __init__(self, variant, quantity):
+        self.variant = variant
+        self.quantity = quantity
+        self.unit_price = variant.price
+        self.total_price = variant.price * quantity
+
+    @property
+    def seller_id(self):
+        return self.variant.product.seller_id
+
+
+def _resolve_variant_ids(items):
+    """Map cart lines to variant ids; lines given by product_id use the product's first variant."""
+    product_ids = {item['product_id'] for item in items if not item.get('variant_id') and item.get('product_id')}
+    first_variant = {}
+    if product_ids:
+        rows = ProductVariant.objects.filter(product_id__in=product_ids).order_by('product_id', 'id').values_list('product_id', 'id')
+        for product_id, variant_id in rows:
+            first_variant.setdefault(product_id, variant_id)
+
+    return [item.get('variant_id') or first_variant.get(item.get('product_id')) for item in items]
+
+
+def reserve_stock(items, reference=''):
+    """
+    Lock and decrement stock for every cart line, all-or-nothing.
+    Must run inside a transaction.
+
+    1. All variants are locked with one SELECT ... FOR UPDATE in id order,
+       so two carts sharing variants always lock them in the same order.
+    2. Stock is decremented with one conditional UPDATE
+       (stock_quantity >= qty per row); if it touches fewer rows than
+       expected another transaction got there first and nothing is kept.
+
+    3. One RESERVATION movement per variant is appended to the inventory
+       ledger, tagged with `reference`.
+
+    Returns a list of ReservedLine, raises ReservationError with one entry
+    per failing line ({'line', 'variant_id', 'error'}).
+    """
+    variant_ids = _resolve_variant_ids(items)
+    locked = {
+        v.id: v for v in
+        ProductVariant.objects.select_for_update().select_related('product')
+        .filter(id__in=[vid for vid in variant_ids if vid]).order_by('id')
+    }
+
+    # Same variant on several lines is checked against the summed quantity
+    requested = OrderedDict()
+    failures = []
+    for index, (item, variant_id) in enumerate(zip(items, variant_ids)):
+        if variant_id not in locked:
+            failures.append({'line': index, 'variant_id': variant_id, 'error': "Product/Variant not found or unavailable"})
+            continue
+        requested[variant_id] = requested.get(variant_id, 0) + item['quantity']
+
+    # Stock put back recently may still sit in shard rows, fold it in before saying no
+    short = [vid for vid, qty in requested.items() if locked[vid].stock_quantity < qty]
+    if short:
+        for variant_id, quantity in fold_stock_shards(short).items():
+            locked[variant_id].stock_quantity += quantity
+
+    for index, (item, variant_id) in enumerate(zip(items, variant_ids)):
+        variant = locked.get(variant_id)
+        if variant and variant.stock_quantity < requested[variant_id]:
+            failures.append({'line': index, 'variant_id': variant_id, 'error': f"Insufficient stock for {variant.name}"})
+
+    if failures:
+        raise ReservationError(sorted(failures, key=lambda f: f['line']))
+
+    with transaction.atomic():
+        updated = ProductVariant.objects.filter(
+            Q(*[Q(pk=vid, stock_quantity__gte=qty) for vid, qty in requested.items()], _connector=Q.OR)
+        ).update(stock_quantity=F('stock_quantity') - Case(
+            *[When(pk=vid, then=Value(qty)) for vid, qty in requested.items()],
+            output_field=IntegerField(),
+        ))
+        if updated != len(requested):
+            raise ReservationError([
+                {'line': index, 'variant_id': variant_id, 'error': f"Insufficient stock for {locked[variant_id].name}"}
+                for index, variant_id in enumerate(variant_ids) if variant_id in requested
+            ])
+        record_movements([(vid, Kind.RESERVATION, -qty, reference) for vid, qty in requested.items()])
+
+    refresh_product_summaries({locked[vid].product_id for vid in requested})
+    return [ReservedLine(locked[variant_id], item['quantity']) for item, variant_id in zip(items, variant_ids)]
+
+
+def place_order(buyer, lines, shipping_address, billing_address):
+    """Create the Order, one SellerOrder per seller and all OrderItems with bulk inserts."""
+    packets = OrderedDict() # { seller_id: [ReservedLine] }
+    for line in lines:
+        packets.setdefault(line.seller_id, []).append(line)
+
+    order = Order.objects.create(
+        buyer=buyer,
+        total_amount=sum((line.total_price for line in lines), Decimal('0')),
+        shipping_address=shipping_address,
+        billing_address=billing_address,
+        status=Order.Status.PAID # Assuming payment mocked
+    )
+
+    rates = commission_rates(packets)
+    seller_orders = []
+    for seller_id, packet in packets.items():
+        total = sum((line.total_price for line in packet), Decimal('0'))
+        seller_orders.append(SellerOrder(
+            order=order,
+            seller_id=seller_id,
+            total_amount=total,
+            commission_amount=commission(total, rates[seller_id]),
+            status=SellerOrder.Status.WAITING_CONFIRMATION # Wait for seller to confirm
+        ))
+    seller_orders = SellerOrder.objects.bulk_create(seller_orders)
+
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            seller_order=seller_order,
+            variant=line.variant,
+            quantity=line.quantity,
+            unit_price=line.unit_price,
+            total_price=line.total_price
+        )
+        for seller_order, packet in zip(seller_orders, packets.values())
+        for line in packet
+    ])
+    order_placed.send(sender=Order, order=order, seller_order_ids=[s.id for s in seller_orders])
+    return order
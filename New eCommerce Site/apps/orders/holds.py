@@ -0,0 +1,141 @@
+# apps/orders/holds.py
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from apps.products.inventory import Kind, add_stock
+from apps.products.models import ProductVariant
+from .checkout import reserve_stock, ReservationError, ReservedLine, _resolve_variant_ids
+from .models import StockHold
+
+SWEEP_BATCH = 500
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'CART_HOLD_SECONDS', 600))
+
+
+def _close(rows, status):
+    """Close (hold_id, variant_id, quantity) rows and put their stock back."""
+    if not rows:
+        return 0
+    StockHold.objects.filter(pk__in=[row[0] for row in rows], status=StockHold.Status.ACTIVE).update(
+        status=status, closed_at=timezone.now(),
+    )
+    add_stock([(variant_id, Kind.RELEASE, quantity, f'hold:{hold_id}') for hold_id, variant_id, quantity in rows])
+    return len(rows)
+
+
+@transaction.atomic
+def release_buyer_holds(buyer):
+    rows = list(
+        StockHold.objects.select_for_update()
+        .filter(buyer=buyer, status=StockHold.Status.ACTIVE).values_list('id', 'variant_id', 'quantity')
+    )
+    return _close(rows, StockHold.Status.RELEASED)
+
+
+@transaction.atomic
+def place_holds(buyer, items):
+    """
+    Hold stock for the buyer's cart lines ({'variant_id'|'product_id', 'quantity'}) for CART_HOLD_SECONDS.
+    Previous holds of the buyer are released first, so holding again refreshes the timer.
+    Raises ReservationError like reserve_stock; nothing is held then.
+    """
+    release_buyer_holds(buyer)
+    lines = reserve_stock(items, reference=f'hold:buyer:{buyer.id}')
+
+    quantities = defaultdict(int)
+    for line in lines:
+        quantities[line.variant.id] += line.quantity
+    expires_at = timezone.now() + hold_ttl()
+    return StockHold.objects.bulk_create([
+        StockHold(buyer=buyer, variant_id=variant_id, quantity=quantity, expires_at=expires_at)
+        for variant_id, quantity in quantities.items()
+    ])
+
+
+def checkout_lines(buyer, items, reference=''):
+    """
+    Reserve stock for a checkout, using the buyer's active holds first.
+    Held quantities are already out of stock and simply become the order's;
+    only the uncovered rest goes through reserve_stock. Held stock the order
+    does not need goes back. Must run inside the checkout transaction.
+    Returns ReservedLines in item order, raises ReservationError.
+    """
+    holds = list(
+        StockHold.objects.select_for_update()
+        .filter(buyer=buyer, status=StockHold.Status.ACTIVE).values_list('id', 'variant_id', 'quantity')
+    )
+    if not holds:
+        return reserve_stock(items, reference=reference)
+
+    held = defaultdict(int)
+    for _, variant_id, quantity in holds:
+        held[variant_id] += quantity
+
+    variant_ids = _resolve_variant_ids(items)
+    rest, rest_index = [], []
+    for index, (item, variant_id) in enumerate(zip(items, variant_ids)):
+        taken = min(held[variant_id], item['quantity']) if variant_id else 0
+        held[variant_id] -= taken
+        if item['quantity'] > taken:
+            rest.append(dict(item, variant_id=variant_id, quantity=item['quantity'] - taken))
+            rest_index.append(index)
+
+    if rest:
+        try:
+            reserve_stock(rest, reference=reference)
+        except ReservationError as e:
+            # Report against the caller's line numbers
+            raise ReservationError([dict(f, line=rest_index[f['line']]) for f in e.failures])
+
+    StockHold.objects.filter(pk__in=[row[0] for row in holds]).update(
+        status=StockHold.Status.CONVERTED, closed_at=timezone.now(),
+    )
+    add_stock([(variant_id, Kind.RELEASE, quantity, reference) for variant_id, quantity in held.items() if quantity > 0])
+
+    variants = ProductVariant.objects.select_related('product').in_bulk([vid for vid in variant_ids if vid])
+    return [ReservedLine(variants[variant_id], item['quantity']) for item, variant_id in zip(items, variant_ids)]
+
+
+def release_expired_holds(now=None, batch_size=SWEEP_BATCH):
+    """
+    Give the stock of expired holds back. Walks the (status, expires_at)
+    index from the oldest expiry in batches, so the cost is proportional to
+    the expired holds, never to all holds. Holds locked by a running
+    checkout are skipped and picked up next time if still active.
+    Returns the number of holds expired.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockHold.objects.select_for_update(skip_locked=True)
+                .filter(status=StockHold.Status.ACTIVE, expires_at__lte=now)
+                .order_by('expires_at').values_list('id', 'variant_id', 'quantity')[:batch_size]
+            )
+            total += _close(rows, StockHold.Status.EXPIRED)
+        if len(rows) < batch_size:
+            return total
+
+
+def hold_stats(since):
+    """Hold outcomes for holds created since `since`: counts, quantities, conversion and expiry rate."""
+    rows = (
+        StockHold.objects.filter(created_at__gte=since)
+        .values('status').annotate(holds=Count('id'), quantity=Sum('quantity'))
+    )
+    stats = {status: {'holds': 0, 'quantity': 0} for status in StockHold.Status.values}
+    for row in rows:
+        stats[row['status']] = {'holds': row['holds'], 'quantity': row['quantity']}
+
+    closed = sum(stats[s]['holds'] for s in [StockHold.Status.CONVERTED, StockHold.Status.EXPIRED, StockHold.Status.RELEASED])
+    return {
+        'since': since,
+        'by_status': stats,
+        'conversion_rate': round(stats[StockHold.Status.CONVERTED]['holds'] / closed, 4) if closed else None,
+        'expiry_rate': round(stats[StockHold.Status.EXPIRED]['holds'] / closed, 4) if closed else None,
+    }
@@ -0,0 +1,123 @@
+# apps/orders/idempotency.py
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+# A claim still in progress after this long belongs to a crashed request and may be taken over
+CLAIM_TIMEOUT = timedelta(seconds=60)
+PURGE_BATCH = 1000
+
+class ClaimLost(Exception):
+    """The claim expired and another request took the key over while this one ran."""
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+def fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim(user, scope, key, digest):
+    """
+    Insert the IN_PROGRESS row for this key, or return the row already there.
+    The insert commits on its own, so a concurrent duplicate sees the claim
+    at once and the unique constraint decides which request does the work.
+    Returns (row, claimed).
+    """
+    existing = None
+    for _ in range(2):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                row = IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, fingerprint=digest, expires_at=now + CLAIM_TIMEOUT,
+                )
+                return row, True
+        except IntegrityError:
+            pass
+        existing = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+        if existing is not None and existing.expires_at > now:
+            return existing, False
+        # Expired result or abandoned claim: drop it (unless someone else just did) and try again
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key, expires_at__lte=now).delete()
+    return existing, False
+
+
+def idempotent(scope):
+    """
+    Make a view method safe to retry with an Idempotency-Key header.
+
+    The first request runs and its response (anything below 500) is stored in
+    the same transaction as its side effects. A repeat with the same key and
+    body gets the stored response (Idempotent-Replayed: true) without running
+    again; the same key with a different body gets 422, and a repeat that
+    arrives while the first is still running gets 409 with Retry-After.
+    Requests without the header run as before.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > 255:
+                return Response({'error': 'Idempotency-Key must be at most 255 characters'}, status=status.HTTP_400_BAD_REQUEST)
+
+            digest = fingerprint(request.data)
+            row, claimed = claim(request.user, scope, key, digest)
+            if not claimed:
+                if row.fingerprint != digest:
+                    return Response({'error': 'Idempotency-Key was already used for a different request'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if row.status == IdempotencyKey.Status.IN_PROGRESS:
+                    return Response({'error': 'A request with this Idempotency-Key is still being processed'}, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+                return Response(row.response_body, status=row.response_status, headers={'Idempotent-Replayed': 'true'})
+
+            # Only this request's own claim: after CLAIM_TIMEOUT a retry may have replaced it
+            own_claim = IdempotencyKey.objects.filter(
+                pk=row.pk, status=IdempotencyKey.Status.IN_PROGRESS, expires_at=row.expires_at,
+            )
+            try:
+                with transaction.atomic():
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        completed = own_claim.update(
+                            status=IdempotencyKey.Status.COMPLETED,
+                            response_status=response.status_code,
+                            response_body=response.data,
+                            expires_at=timezone.now() + key_ttl(),
+                        )
+                        if not completed:
+                            raise ClaimLost # Roll the work back, the other request does it
+            except ClaimLost:
+                return Response({'error': 'A request with this Idempotency-Key is still being processed'}, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+            except Exception:
+                # Nothing was committed, let the client retry with the same key
+                own_claim.delete()
+                raise
+            if response.status_code >= 500:
+                own_claim.delete()
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired_keys(batch_size=PURGE_BATCH):
+    """Delete expired keys oldest first through the expires_at index. Returns the number deleted."""
+    now = timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,21 @@
+import datetime
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.orders.settlement import build_payouts
+
+
+class Command(BaseCommand):
+    help = 'Write seller payout statements for delivered, unpaid packets (defaults to the previous calendar month)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help='First day of the period (YYYY-MM-DD)')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Day after the period (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate().replace(day=1)
+        start = options['start'] or (end - datetime.timedelta(days=1)).replace(day=1)
+
+        statements = build_payouts(start, end)
+        for statement in statements:
+            self.stdout.write(f'{statement.seller}: {statement.order_count} packets, net {statement.net_amount} {statement.currency}')
+        self.stdout.write(self.style.SUCCESS(f'{len(statements)} payout statements written for {start} - {end}.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.orders.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records past IDEMPOTENCY_KEY_TTL (run periodically, e.g. hourly from cron)'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired idempotency keys deleted.'))
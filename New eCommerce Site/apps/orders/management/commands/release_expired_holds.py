@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.orders.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Give the stock of expired checkout holds back (run every minute or so, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        expired = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'{expired} expired holds released.'))
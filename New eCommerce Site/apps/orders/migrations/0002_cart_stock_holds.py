@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0009_inventory_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='güncellenme tarihi')),
+                ('buyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL, verbose_name='alıcı')),
+            ],
+            options={
+                'verbose_name': 'Sepet',
+                'verbose_name_plural': 'Sepetler',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='miktar')),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.cart', verbose_name='sepet')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.productvariant', verbose_name='varyasyon')),
+            ],
+            options={
+                'verbose_name': 'Sepet Kalemi',
+                'verbose_name_plural': 'Sepet Kalemleri',
+                'unique_together': {('cart', 'variant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='miktar')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Aktif'), ('CONVERTED', 'Siparişe Dönüştü'), ('EXPIRED', 'Süresi Doldu'), ('RELEASED', 'Serbest Bırakıldı')], default='ACTIVE', max_length=20, verbose_name='durum')),
+                ('expires_at', models.DateTimeField(verbose_name='bitiş zamanı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='kapanma zamanı')),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to=settings.AUTH_USER_MODEL, verbose_name='alıcı')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='products.productvariant', verbose_name='varyasyon')),
+            ],
+            options={
+                'verbose_name': 'Stok Ayırma',
+                'verbose_name_plural': 'Stok Ayırmaları',
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='stockhold_status_expiry_idx'), models.Index(fields=['buyer', 'status'], name='stockhold_buyer_status_idx'), models.Index(fields=['created_at'], name='stockhold_created_idx')],
+            },
+        ),
+    ]
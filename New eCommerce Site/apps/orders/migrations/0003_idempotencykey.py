@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:40
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_cart_stock_holds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, verbose_name='kapsam')),
+                ('key', models.CharField(max_length=255, verbose_name='anahtar')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='istek özeti')),
+                ('status', models.CharField(choices=[('IN_PROGRESS', 'İşleniyor'), ('COMPLETED', 'Tamamlandı')], default='IN_PROGRESS', max_length=20, verbose_name='durum')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='yanıt kodu')),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='yanıt')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('expires_at', models.DateTimeField(verbose_name='bitiş zamanı')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL, verbose_name='kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Tekrar Koruma Anahtarı',
+                'verbose_name_plural': 'Tekrar Koruma Anahtarları',
+                'indexes': [models.Index(fields=['expires_at'], name='idempotency_expires_idx')],
+                'unique_together': {('user', 'scope', 'key')},
+            },
+        ),
+    ]
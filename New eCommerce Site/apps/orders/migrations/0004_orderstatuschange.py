@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transition', models.CharField(max_length=30, verbose_name='geçiş')),
+                ('from_status', models.CharField(max_length=20, verbose_name='önceki durum')),
+                ('to_status', models.CharField(max_length=20, verbose_name='yeni durum')),
+                ('duration', models.DurationField(verbose_name='önceki durumda geçen süre')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='değiştiren')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='orders.order', verbose_name='ana sipariş')),
+                ('seller_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='orders.sellerorder', verbose_name='satıcı siparişi')),
+            ],
+            options={
+                'verbose_name': 'Durum Değişikliği',
+                'verbose_name_plural': 'Durum Değişiklikleri',
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_commissions(apps, schema_editor):
+    """Packets placed before commissions were computed at checkout carry 0; price them at today's rates."""
+    SellerOrder = apps.get_model('orders', 'SellerOrder')
+    SellerProfile = apps.get_model('accounts', 'SellerProfile')
+    rates = dict(SellerProfile.objects.values_list('user_id', 'commission_rate'))
+    packets = SellerOrder.objects.filter(commission_amount=0).only('id', 'seller_id', 'total_amount')
+    batch = []
+    for packet in packets.iterator(chunk_size=500):
+        rate = Decimal(rates.get(packet.seller_id, Decimal('10.00')))
+        packet.commission_amount = (packet.total_amount * rate / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        batch.append(packet)
+        if len(batch) == 500:
+            SellerOrder.objects.bulk_update(batch, ['commission_amount'])
+            batch = []
+    SellerOrder.objects.bulk_update(batch, ['commission_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('orders', '0004_orderstatuschange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='dönem başlangıcı')),
+                ('period_end', models.DateField(help_text='Bu tarih dönemin dışındadır', verbose_name='dönem sonu')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='sipariş sayısı')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='brüt tutar')),
+                ('commission_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='komisyon tutarı')),
+                ('net_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='net ödeme')),
+                ('currency', models.CharField(default='TL', max_length=3, verbose_name='para birimi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payout_statements', to=settings.AUTH_USER_MODEL, verbose_name='satıcı')),
+            ],
+            options={
+                'verbose_name': 'Ödeme Ekstresi',
+                'verbose_name_plural': 'Ödeme Ekstreleri',
+                'unique_together': {('seller', 'period_start', 'period_end')},
+            },
+        ),
+        migrations.AddField(
+            model_name='sellerorder',
+            name='payout',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='seller_orders', to='orders.payoutstatement', verbose_name='ödeme ekstresi'),
+        ),
+        migrations.RunPython(backfill_commissions, migrations.RunPython.noop),
+    ]
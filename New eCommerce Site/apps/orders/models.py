@@ -1,4 +1,5 @@
 # orders/models.py
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.accounts.models import User
@@ -54,6 +55,7 @@ class SellerOrder(models.Model):
     commission_amount = models.DecimalField(_('komisyon tutarı'), max_digits=12, decimal_places=2, default=0)
     
     status = models.CharField(_('durum'), max_length=20, choices=Status.choices, default=Status.WAITING_CONFIRMATION)
+    payout = models.ForeignKey('PayoutStatement', on_delete=models.PROTECT, null=True, blank=True, related_name='seller_orders', verbose_name=_('ödeme ekstresi'))
     
     created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
     updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
@@ -65,6 +67,57 @@ class SellerOrder(models.Model):
     def __str__(self):
         return f"SubOrder #{self.id} from Order #{self.order.id}"
 
+class OrderStatusChange(models.Model):
+    """One applied status transition of an Order or, when seller_order is set, of one of its packets (see orders/transitions.py)."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_changes', verbose_name=_('ana sipariş'))
+    seller_order = models.ForeignKey(SellerOrder, on_delete=models.CASCADE, null=True, blank=True, related_name='status_changes', verbose_name=_('satıcı siparişi'))
+    transition = models.CharField(_('geçiş'), max_length=30)
+    from_status = models.CharField(_('önceki durum'), max_length=20)
+    to_status = models.CharField(_('yeni durum'), max_length=20)
+    duration = models.DurationField(_('önceki durumda geçen süre'))
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name=_('değiştiren'))
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Durum Değişikliği')
+        verbose_name_plural = _('Durum Değişiklikleri')
+
+    def __str__(self):
+        return f"{self.transition}: {self.from_status} -> {self.to_status}"
+
+class PayoutStatement(models.Model):
+    """
+    What a seller is paid for the packets delivered up to period_end and not paid before
+    (see orders/settlement.py). Written once by the payout job, never changed afterwards.
+    """
+    seller = models.ForeignKey(User, on_delete=models.PROTECT, related_name='payout_statements', verbose_name=_('satıcı'))
+    period_start = models.DateField(_('dönem başlangıcı'))
+    period_end = models.DateField(_('dönem sonu'), help_text=_("Bu tarih dönemin dışındadır"))
+
+    order_count = models.PositiveIntegerField(_('sipariş sayısı'), default=0)
+    gross_amount = models.DecimalField(_('brüt tutar'), max_digits=14, decimal_places=2, default=0)
+    commission_amount = models.DecimalField(_('komisyon tutarı'), max_digits=14, decimal_places=2, default=0)
+    net_amount = models.DecimalField(_('net ödeme'), max_digits=14, decimal_places=2, default=0)
+    currency = models.CharField(_('para birimi'), max_length=3, default='TL')
+
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+
+    class Meta:
+        unique_together = ('seller', 'period_start', 'period_end')
+        verbose_name = _('Ödeme Ekstresi')
+        verbose_name_plural = _('Ödeme Ekstreleri')
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Payout statements are immutable")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Payout statements are immutable")
+
+    def __str__(self):
+        return f"Payout #{self.id} {self.seller} {self.period_start} - {self.period_end}"
+
 class OrderItem(models.Model):
     seller_order = models.ForeignKey(SellerOrder, on_delete=models.CASCADE, related_name='items', verbose_name=_('satıcı siparişi'))
     variant = models.ForeignKey(ProductVariant, on_delete=models.PROTECT, verbose_name=_('varyasyon'))
@@ -93,3 +146,90 @@ class Shipment(models.Model):
 
     def __str__(self):
         return f"{self.carrier_name}: {self.tracking_number}"
+
+class Cart(models.Model):
+    """Server-side copy of the buyer's cart, synced from the browser before checkout."""
+    buyer = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart', verbose_name=_('alıcı'))
+    updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Sepet')
+        verbose_name_plural = _('Sepetler')
+
+    def __str__(self):
+        return f"Cart of {self.buyer}"
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items', verbose_name=_('sepet'))
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, verbose_name=_('varyasyon'))
+    quantity = models.PositiveIntegerField(_('miktar'))
+
+    class Meta:
+        unique_together = ('cart', 'variant')
+        verbose_name = _('Sepet Kalemi')
+        verbose_name_plural = _('Sepet Kalemleri')
+
+class StockHold(models.Model):
+    """
+    Stock set aside for a buyer who entered checkout. The quantity is already
+    taken out of available stock; it goes back when the hold expires or is
+    released, or becomes the order's reservation at checkout (see orders/holds.py).
+    """
+    class Status(models.TextChoices):
+        ACTIVE = 'ACTIVE', _('Aktif')
+        CONVERTED = 'CONVERTED', _('Siparişe Dönüştü')
+        EXPIRED = 'EXPIRED', _('Süresi Doldu')
+        RELEASED = 'RELEASED', _('Serbest Bırakıldı')
+
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_holds', verbose_name=_('alıcı'))
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='holds', verbose_name=_('varyasyon'))
+    quantity = models.PositiveIntegerField(_('miktar'))
+    status = models.CharField(_('durum'), max_length=20, choices=Status.choices, default=Status.ACTIVE)
+    expires_at = models.DateTimeField(_('bitiş zamanı'))
+
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+    closed_at = models.DateTimeField(_('kapanma zamanı'), null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Sweeper: WHERE status = 'ACTIVE' AND expires_at <= now ORDER BY expires_at
+            models.Index(fields=['status', 'expires_at'], name='stockhold_status_expiry_idx'),
+            models.Index(fields=['buyer', 'status'], name='stockhold_buyer_status_idx'),
+            models.Index(fields=['created_at'], name='stockhold_created_idx'),
+        ]
+        verbose_name = _('Stok Ayırma')
+        verbose_name_plural = _('Stok Ayırmaları')
+
+    def __str__(self):
+        return f"Hold {self.quantity}x {self.variant_id} for {self.buyer} ({self.status})"
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a request sent with an Idempotency-Key header (see orders/idempotency.py).
+    A row is claimed before the request runs and completed in the same
+    transaction as its side effects; duplicates replay the stored response.
+    """
+    class Status(models.TextChoices):
+        IN_PROGRESS = 'IN_PROGRESS', _('İşleniyor')
+        COMPLETED = 'COMPLETED', _('Tamamlandı')
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys', verbose_name=_('kullanıcı'))
+    scope = models.CharField(_('kapsam'), max_length=50)
+    key = models.CharField(_('anahtar'), max_length=255)
+    fingerprint = models.CharField(_('istek özeti'), max_length=64)
+    status = models.CharField(_('durum'), max_length=20, choices=Status.choices, default=Status.IN_PROGRESS)
+    response_status = models.PositiveSmallIntegerField(_('yanıt kodu'), null=True, blank=True)
+    response_body = models.JSONField(_('yanıt'), null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('bitiş zamanı'))
+
+    class Meta:
+        unique_together = ('user', 'scope', 'key')
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+        verbose_name = _('Tekrar Koruma Anahtarı')
+        verbose_name_plural = _('Tekrar Koruma Anahtarları')
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
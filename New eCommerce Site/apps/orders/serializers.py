@@ -1,7 +1,8 @@
 # apps/orders/serializers.py
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Order, SellerOrder, OrderItem, Shipment
-from apps.products.models import ProductVariant
+from .models import Order, SellerOrder, OrderItem, Shipment, CartItem, StockHold
+from apps.products.serializers import product_image_url
 
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='variant.product.name', read_only=True)
@@ -23,13 +24,12 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return product_name
 
     def get_image(self, obj):
-        # Retrieve image from product
-        img = obj.variant.product.images.filter(is_main=True).first()
-        if not img:
-            img = obj.variant.product.images.first()
-        if img:
-            return img.image.url
-        return ""
+        # Main image from the product summary, no image query per item
+        return product_image_url(obj.variant.product)
+
+    @staticmethod
+    def prefetch_queryset(queryset):
+        return queryset.select_related('variant__product')
 
 class ShipmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -54,24 +54,40 @@ class SellerOrderSerializer(serializers.ModelSerializer):
     def get_shipping_address(self, obj):
         return obj.order.shipping_address
 
+    @staticmethod
+    def prefetch_queryset(queryset, with_order=True):
+        """Everything this serializer touches, loaded up front (items in one extra query)."""
+        related = ['seller__seller_profile', 'shipment']
+        if with_order:
+            related.append('order__buyer')
+        return queryset.select_related(*related).prefetch_related(
+            Prefetch('items', queryset=OrderItemSerializer.prefetch_queryset(OrderItem.objects.all()))
+        )
+
 class OrderDetailSerializer(serializers.ModelSerializer):
     seller_orders = SellerOrderSerializer(many=True, read_only=True)
-    items = serializers.SerializerMethodField()
     
     class Meta:
         model = Order
-        fields = ['id', 'total_amount', 'currency', 'status', 'shipping_address', 'billing_address', 'seller_orders', 'items', 'created_at']
-
-    def get_items(self, obj):
-        # Flatten items from all seller packets
-        all_items = []
-        for packet in obj.seller_orders.all():
-            for item in packet.items.all():
-                data = OrderItemSerializer(item).data
-                # Add seller info to item for display
-                data['seller'] = packet.seller.seller_profile.business_name
-                all_items.append(data)
-        return all_items
+        fields = ['id', 'total_amount', 'currency', 'status', 'shipping_address', 'billing_address', 'seller_orders', 'created_at']
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        # Flatten items from the already serialized seller packets instead of serializing them twice
+        rep['items'] = [
+            # Add seller info to item for display
+            {**item, 'seller': packet.get('seller_name')}
+            for packet in rep['seller_orders']
+            for item in packet['items']
+        ]
+        return rep
+
+    @staticmethod
+    def prefetch_queryset(queryset):
+        # Packets are loaded through the prefetch, which also sets packet.order back to this order
+        return queryset.select_related('buyer').prefetch_related(
+            Prefetch('seller_orders', queryset=SellerOrderSerializer.prefetch_queryset(SellerOrder.objects.all(), with_order=False))
+        )
 
 class CartItemInputSerializer(serializers.Serializer):
     variant_id = serializers.IntegerField(required=False, allow_null=True)
@@ -83,6 +99,26 @@ class CheckoutSerializer(serializers.Serializer):
     shipping_address = serializers.JSONField()
     billing_address = serializers.JSONField()
 
+class CartSyncSerializer(serializers.Serializer):
+    items = CartItemInputSerializer(many=True)
+
+class CartItemSerializer(serializers.ModelSerializer):
+    variant_id = serializers.IntegerField(read_only=True)
+    product_id = serializers.IntegerField(source='variant.product_id', read_only=True)
+    product_name = serializers.CharField(source='variant.product.name', read_only=True)
+    unit_price = serializers.DecimalField(source='variant.price', max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = ['variant_id', 'product_id', 'product_name', 'unit_price', 'quantity']
+
+class StockHoldSerializer(serializers.ModelSerializer):
+    variant_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = StockHold
+        fields = ['id', 'variant_id', 'quantity', 'status', 'expires_at']
+
 class ShipmentUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shipment
@@ -0,0 +1,92 @@
+# apps/orders/settlement.py
+"""
+Commissions and seller payouts.
+
+Commission is fixed on each packet at checkout from the seller's
+SellerProfile.commission_rate (a percentage). Rates are read through the
+cache, one get_many per checkout, and dropped from it when a profile changes.
+
+build_payouts() settles a period: for every seller with delivered, unpaid
+packets it writes one PayoutStatement and attaches the packets to it with a
+single UPDATE, then totals the statement from those packets in SQL. Nothing
+is loaded per packet, so memory stays flat however many rows a period has.
+"""
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+from apps.accounts.models import SellerProfile
+from .models import SellerOrder, PayoutStatement, OrderStatusChange
+
+DEFAULT_RATE = Decimal('10.00') # Same as SellerProfile.commission_rate's default
+CENT = Decimal('0.01')
+
+def _rate_key(seller_id):
+    return f'commission:rate:{seller_id}'
+
+def commission_rates(seller_ids):
+    """{ seller_id: commission rate in percent }, cached per seller."""
+    seller_ids = set(seller_ids)
+    cached = cache.get_many([_rate_key(sid) for sid in seller_ids])
+    rates = {sid: cached[_rate_key(sid)] for sid in seller_ids if _rate_key(sid) in cached}
+
+    missing = seller_ids - rates.keys()
+    if missing:
+        loaded = dict.fromkeys(missing, DEFAULT_RATE)
+        loaded.update(SellerProfile.objects.filter(user_id__in=missing).values_list('user_id', 'commission_rate'))
+        cache.set_many(
+            {_rate_key(sid): rate for sid, rate in loaded.items()},
+            timeout=getattr(settings, 'COMMISSION_RATE_CACHE_TIMEOUT', 3600),
+        )
+        rates.update(loaded)
+    return rates
+
+def forget_commission_rate(seller_id):
+    cache.delete(_rate_key(seller_id))
+
+def commission(amount, rate):
+    return (Decimal(amount) * Decimal(rate) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def payable_packets(period_end):
+    """
+    Delivered packets not paid yet that were delivered before the day period_end,
+    by their DELIVERED status change; any later edit of the packet does not move it.
+    Packets delivered before status changes were recorded fall back to updated_at.
+    """
+    end = timezone.make_aware(datetime.datetime.combine(period_end, datetime.time.min))
+    deliveries = OrderStatusChange.objects.filter(seller_order=OuterRef('pk'), to_status=SellerOrder.Status.DELIVERED)
+    return SellerOrder.objects.filter(status=SellerOrder.Status.DELIVERED, payout__isnull=True).filter(
+        Exists(deliveries.filter(created_at__lt=end)) | (~Exists(deliveries) & Q(updated_at__lt=end))
+    )
+
+def build_payouts(period_start, period_end):
+    """
+    Write the payout statements of the period [period_start, period_end).
+    Packets delivered earlier but left unpaid are included as well.
+    Running it again for the same period adds nothing. Returns the statements written.
+    """
+    sellers = payable_packets(period_end).values_list('seller_id', flat=True).order_by('seller_id').distinct()
+    statements = []
+    for seller_id in sellers.iterator(chunk_size=1000):
+        try:
+            with transaction.atomic():
+                statement = PayoutStatement.objects.create(seller_id=seller_id, period_start=period_start, period_end=period_end)
+                payable_packets(period_end).filter(seller_id=seller_id).update(payout=statement)
+                totals = SellerOrder.objects.filter(payout=statement).aggregate(
+                    order_count=Count('id'), gross=Sum('total_amount'), commission=Sum('commission_amount'),
+                )
+                PayoutStatement.objects.filter(pk=statement.pk).update(
+                    order_count=totals['order_count'],
+                    gross_amount=totals['gross'] or 0,
+                    commission_amount=totals['commission'] or 0,
+                    net_amount=(totals['gross'] or 0) - (totals['commission'] or 0),
+                )
+        except IntegrityError:
+            # Statement of this seller and period already exists; its packets stay for the next period
+            continue
+        statements.append(statement.pk)
+    return list(PayoutStatement.objects.filter(pk__in=statements).order_by('seller_id'))
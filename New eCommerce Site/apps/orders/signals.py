@@ -0,0 +1,12 @@
+# apps/orders/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from apps.accounts.models import SellerProfile
+from .settlement import forget_commission_rate
+
+# Sent by checkout.place_order inside the checkout transaction; kwargs: order, seller_order_ids
+order_placed = Signal()
+
+@receiver([post_save, post_delete], sender=SellerProfile)
+def drop_cached_commission_rate(sender, instance, **kwargs):
+    forget_commission_rate(instance.user_id)
@@ -0,0 +1,20 @@
+# apps/orders/tasks.py
+from django.db import transaction
+from apps.messaging.models import Conversation, Message
+from apps.tasks.queue import task
+from .models import SellerOrder
+
+@task
+def notify_buyer(seller_order_id, sender_id, content):
+    """Post a system message into the conversation of a seller order, creating the conversation if needed."""
+    seller_order = SellerOrder.objects.select_related('order').get(pk=seller_order_id)
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(order=seller_order)
+        if created:
+            conversation.participants.add(seller_order.seller_id, seller_order.order.buyer_id)
+        Message.objects.create(
+            conversation=conversation,
+            sender_id=sender_id,
+            content=content,
+            is_system_message=True,
+        )
@@ -1,9 +1,27 @@
 # apps/orders/tests.py
+import threading
+from unittest import mock
+from decimal import Decimal
+import time
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction, OperationalError
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from apps.accounts.models import SellerProfile
 from apps.products.models import Product, ProductVariant
-from .models import Order, SellerOrder, OrderItem
+from datetime import timedelta
+from django.utils import timezone
+from .models import Order, SellerOrder, OrderItem, StockHold, IdempotencyKey, OrderStatusChange
+from .checkout import reserve_stock, place_order, ReservationError
+from .cancellation import cancel_orders, cancel_seller_orders
+from .holds import release_expired_holds
+from .idempotency import purge_expired_keys
+from .transitions import transition
+from .settlement import build_payouts
+from apps.products.inventory import available_stock
+from config.pagination import CreatedAtCursorPagination
 
 User = get_user_model()
 
@@ -81,3 +99,447 @@ class OrderFlowTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         s_order.refresh_from_db()
         self.assertEqual(s_order.status, 'SHIPPED')
+
+class OrderPaginationTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        for i in range(5):
+            order = Order.objects.create(buyer=self.buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+            SellerOrder.objects.create(order=order, seller=self.seller, total_amount=10)
+
+    def test_cursor_pages_cover_all_rows_once(self):
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.get('/api/orders/seller/', {'page_size': 2})
+        seen = [row['id'] for row in response.data['results']]
+
+        # A row created mid-pagination must not shift the following pages
+        order = Order.objects.create(buyer=self.buyer, total_amount=10, status='PAID', shipping_address={}, billing_address={})
+        SellerOrder.objects.create(order=order, seller=self.seller, total_amount=10)
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [row['id'] for row in response.data['results']]
+
+        expected = list(SellerOrder.objects.order_by('-created_at', '-id').values_list('id', flat=True))[1:]
+        self.assertEqual(seen, expected)
+
+    def test_view_page_size_cap(self):
+        self.client.force_authenticate(user=self.seller)
+        for i in range(55):
+            SellerOrder.objects.create(order=Order.objects.first(), seller=self.seller, total_amount=10)
+        response = self.client.get('/api/orders/seller/', {'page_size': 500})
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_legacy_clients_get_plain_list(self):
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.get('/api/orders/seller/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response['X-Has-More'], 'false')
+
+    def test_legacy_list_signals_the_cap(self):
+        self.client.force_authenticate(user=self.seller)
+        with mock.patch.object(CreatedAtCursorPagination, 'LEGACY_PAGE_SIZE', 3):
+            response = self.client.get('/api/orders/seller/')
+            self.assertEqual((len(response.data), response['X-Has-More']), (3, 'true'))
+            next_link = response['Link'].split('>')[0].lstrip('<')
+            rest = self.client.get(next_link)
+        self.assertEqual(len(rest.data['results']), 2) # Following the link opts in to the envelope
+
+
+class StockReservationTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        product = Product.objects.create(seller=seller, name='Hot', slug='hot', status='ACTIVE')
+        self.hot = ProductVariant.objects.create(product=product, sku='HOT', name='Hot', price=10, stock_quantity=5)
+        self.cold = ProductVariant.objects.create(product=product, sku='COLD', name='Cold', price=5, stock_quantity=1)
+
+    def test_per_line_failures_and_no_partial_reservation(self):
+        items = [
+            {'variant_id': self.hot.id, 'quantity': 1},
+            {'variant_id': self.cold.id, 'quantity': 2},
+            {'variant_id': 999999, 'quantity': 1},
+        ]
+        with self.assertRaises(ReservationError) as ctx:
+            with transaction.atomic():
+                reserve_stock(items)
+        self.assertEqual([f['line'] for f in ctx.exception.failures], [1, 2])
+        self.hot.refresh_from_db()
+        self.assertEqual(self.hot.stock_quantity, 5)
+
+    def test_hot_sku_is_never_oversold(self):
+        results = []
+        barrier = threading.Barrier(12)
+
+        def buy():
+            barrier.wait()
+            try:
+                # SQLite lets one writer in at a time: retry until bought or sold out
+                deadline = time.monotonic() + 60 # Only there so a bug fails the test instead of hanging it
+                attempt = 0
+                while time.monotonic() < deadline:
+                    attempt += 1
+                    try:
+                        with transaction.atomic():
+                            lines = reserve_stock([{'variant_id': self.hot.id, 'quantity': 1}])
+                            place_order(self.buyer, lines, {}, {})
+                        results.append('ok')
+                        return
+                    except OperationalError:
+                        time.sleep(min(0.01 * attempt, 0.2)) # database is locked
+                        continue
+                    except ReservationError:
+                        results.append('sold out')
+                        return
+                results.append('gave up')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.hot.refresh_from_db()
+        sold = results.count('ok')
+        self.assertEqual(len(results), 12)
+        self.assertNotIn('gave up', results)
+        self.assertEqual((sold, results.count('sold out')), (5, 7))
+        self.assertEqual(self.hot.stock_quantity, 0)
+        self.assertEqual(sum(OrderItem.objects.filter(variant=self.hot).values_list('quantity', flat=True)), 5)
+
+
+class OrderQueryCountTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.sellers = []
+        for i in range(3):
+            seller = User.objects.create_user(email=f's{i}@test.com', password='password', role='SELLER')
+            SellerProfile.objects.create(user=seller, business_name=f'Store {i}')
+            self.sellers.append(seller)
+
+    def _create_order(self, items_per_seller):
+        order = Order.objects.create(buyer=self.buyer, total_amount=0, status='PAID', shipping_address={}, billing_address={})
+        for seller in self.sellers:
+            packet = SellerOrder.objects.create(order=order, seller=seller, total_amount=0)
+            for i in range(items_per_seller):
+                product = Product.objects.create(seller=seller, name=f'P{i}', slug=f'p-{packet.id}-{i}', status='ACTIVE')
+                variant = ProductVariant.objects.create(product=product, sku=f'S-{packet.id}-{i}', price=10, stock_quantity=1)
+                OrderItem.objects.create(seller_order=packet, variant=variant, quantity=1, unit_price=10, total_price=10)
+
+    def _count_queries(self, user, url):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_buyer_order_history_query_count_is_fixed(self):
+        self._create_order(items_per_seller=1)
+        small, _ = self._count_queries(self.buyer, '/api/orders/buyer/')
+
+        self._create_order(items_per_seller=6)
+        large, response = self._count_queries(self.buyer, '/api/orders/buyer/')
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3) # orders+buyer, packets+sellers+shipments, items+variants+products
+        self.assertEqual(len(response.data[0]['items']), 18)
+        self.assertEqual(response.data[0]['items'][0]['seller'], 'Store 0')
+
+    def test_seller_orders_query_count_is_fixed(self):
+        self._create_order(items_per_seller=1)
+        small, _ = self._count_queries(self.sellers[0], '/api/orders/seller/')
+
+        self._create_order(items_per_seller=6)
+        large, _ = self._count_queries(self.sellers[0], '/api/orders/seller/')
+
+        self.assertEqual(small, large)
+
+class OrderCancellationTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        product = Product.objects.create(seller=self.seller, name='P', slug='p', status='ACTIVE')
+        self.variant = ProductVariant.objects.create(product=product, sku='SKU', price=10, stock_quantity=0)
+
+    def _create_order(self, quantities, packet_status=SellerOrder.Status.WAITING_CONFIRMATION):
+        order = Order.objects.create(buyer=self.buyer, total_amount=0, status='PAID', shipping_address={}, billing_address={})
+        packet = SellerOrder.objects.create(order=order, seller=self.seller, total_amount=0, status=packet_status)
+        for qty in quantities:
+            OrderItem.objects.create(seller_order=packet, variant=self.variant, quantity=qty, unit_price=10, total_price=10 * qty)
+        return order
+
+    def stock(self):
+        # Restored stock sits on shard rows until folded
+        return available_stock([self.variant.id])[self.variant.id]
+
+    def test_bulk_cancel_restores_each_order_once(self):
+        first = self._create_order([1])
+        with CaptureQueriesContext(connection) as single:
+            cancel_orders([first.id])
+
+        orders = [self._create_order([1, 2]) for _ in range(5)]
+        shipped = self._create_order([4], SellerOrder.Status.SHIPPED)
+        with CaptureQueriesContext(connection) as bulk:
+            cancelled, skipped = cancel_orders([o.id for o in orders] + [shipped.id])
+
+        self.assertEqual(len(bulk.captured_queries), len(single.captured_queries)) # Set-based, not per row
+        self.assertEqual(cancelled, [o.id for o in orders])
+        self.assertEqual(skipped, [shipped.id])
+        self.assertEqual(self.stock(), 16)
+        self.assertEqual(SellerOrder.objects.filter(status=SellerOrder.Status.CANCELLED).count(), 6)
+        self.assertEqual(Order.objects.get(pk=shipped.pk).status, 'PAID')
+
+        # Cancelling again changes nothing
+        self.assertEqual(cancel_orders([o.id for o in orders]), ([], [o.id for o in orders]))
+        self.assertEqual(cancel_seller_orders(SellerOrder.objects.values_list('id', flat=True)), [])
+        self.assertEqual(self.stock(), 16)
+
+    def test_buyer_cancel_and_seller_reject(self):
+        order = self._create_order([3])
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.post(f'/api/orders/buyer/{order.id}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stock(), 3)
+
+        packet = self._create_order([2]).seller_orders.get()
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.post(f'/api/orders/seller/{packet.id}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stock(), 5)
+        response = self.client.post(f'/api/orders/seller/{packet.id}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.stock(), 5)
+
+class OrderTransitionTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.order = Order.objects.create(buyer=self.buyer, total_amount=0, status='PAID', shipping_address={}, billing_address={})
+        self.packets = [SellerOrder.objects.create(order=self.order, seller=self.seller, total_amount=0) for _ in range(2)]
+
+    def order_status(self):
+        self.order.refresh_from_db()
+        return self.order.status
+
+    def test_repeated_confirm_moves_once(self):
+        self.client.force_authenticate(user=self.seller)
+        url = f'/api/orders/seller/{self.packets[0].id}/confirm/'
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        change = OrderStatusChange.objects.get()
+        self.assertEqual((change.transition, change.from_status, change.to_status), ('confirm', 'WAITING', 'PROCESSING'))
+        self.assertEqual((change.seller_order_id, change.changed_by), (self.packets[0].id, self.seller))
+        self.assertGreaterEqual(change.duration, timedelta(0))
+
+    def test_order_status_follows_packets(self):
+        ids = [p.id for p in self.packets]
+        self.assertEqual(transition(SellerOrder, 'ship', ids), ids)
+        self.assertEqual(transition(SellerOrder, 'confirm', ids), []) # Already past it
+
+        transition(SellerOrder, 'deliver', ids[:1])
+        self.assertEqual(self.order_status(), 'PARTIALLY_FULFILLED')
+        transition(SellerOrder, 'deliver', ids[1:])
+        self.assertEqual(self.order_status(), 'COMPLETED')
+        self.assertEqual(
+            list(OrderStatusChange.objects.filter(seller_order__isnull=True).values_list('from_status', 'to_status')),
+            [('PAID', 'PARTIALLY_FULFILLED'), ('PARTIALLY_FULFILLED', 'COMPLETED')],
+        )
+
+    def test_rejecting_every_packet_cancels_the_order(self):
+        self.client.force_authenticate(user=self.seller)
+        self.client.post(f'/api/orders/seller/{self.packets[0].id}/reject/')
+        self.assertEqual(self.order_status(), 'PAID')
+        self.client.post(f'/api/orders/seller/{self.packets[1].id}/reject/')
+        self.assertEqual(self.order_status(), 'CANCELLED')
+
+class SettlementTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.sellers = [User.objects.create_user(email=f's{i}@test.com', password='password', role='SELLER') for i in range(2)]
+        SellerProfile.objects.create(user=self.sellers[0], business_name='S0', commission_rate=12.5)
+        self.variants = []
+        for i, seller in enumerate(self.sellers):
+            product = Product.objects.create(seller=seller, name=f'P{i}', slug=f'p{i}', status='ACTIVE')
+            self.variants.append(ProductVariant.objects.create(product=product, sku=f'SKU{i}', price='19.99', stock_quantity=20))
+
+    def checkout(self, quantities):
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.post('/api/orders/buyer/checkout/', {
+            'items': [{'variant_id': v.id, 'quantity': q} for v, q in zip(self.variants, quantities) if q],
+            'shipping_address': {}, 'billing_address': {},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return list(SellerOrder.objects.filter(order_id=response.data['id']).order_by('seller_id'))
+
+    def test_commission_uses_current_seller_rate(self):
+        packets = self.checkout([2, 1])
+        self.assertEqual([p.commission_amount for p in packets], [Decimal('5.00'), Decimal('2.00')]) # 12.5% of 39.98, default 10% of 19.99
+
+        profile = self.sellers[0].seller_profile
+        profile.commission_rate = 20
+        profile.save() # Drops the cached rate
+        self.assertEqual(self.checkout([1, 0])[0].commission_amount, Decimal('4.00'))
+
+    def test_payouts_cover_delivered_packets_once(self):
+        delivered = self.checkout([2, 1]) + self.checkout([1, 1])
+        waiting = self.checkout([3, 3])
+        transition(SellerOrder, 'ship', [p.id for p in delivered])
+        transition(SellerOrder, 'deliver', [p.id for p in delivered])
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        statements = build_payouts(tomorrow - timedelta(days=30), tomorrow)
+        self.assertEqual([(s.seller_id, s.order_count) for s in statements], [(self.sellers[0].id, 2), (self.sellers[1].id, 2)])
+        first = statements[0]
+        self.assertEqual((first.gross_amount, first.commission_amount, first.net_amount), (Decimal('59.97'), Decimal('7.50'), Decimal('52.47')))
+        self.assertFalse(SellerOrder.objects.filter(pk__in=[p.id for p in waiting], payout__isnull=False).exists())
+
+        self.assertEqual(build_payouts(tomorrow, tomorrow + timedelta(days=30)), []) # Nothing left to pay
+        with self.assertRaises(ValueError):
+            first.save()
+
+    def test_payout_period_follows_the_delivery_date(self):
+        packets = self.checkout([1, 0])
+        transition(SellerOrder, 'ship', [p.id for p in packets])
+        transition(SellerOrder, 'deliver', [p.id for p in packets])
+        # Delivered ten days ago, edited today
+        OrderStatusChange.objects.filter(to_status='DELIVERED').update(created_at=timezone.now() - timedelta(days=10))
+        SellerOrder.objects.filter(pk=packets[0].id).update(updated_at=timezone.now())
+
+        end = timezone.localdate() - timedelta(days=5)
+        self.assertEqual([s.order_count for s in build_payouts(end - timedelta(days=30), end)], [1])
+
+class StockHoldTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.other = User.objects.create_user(email='other@test.com', password='password', role='BUYER')
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        product = Product.objects.create(seller=seller, name='P', slug='p', status='ACTIVE')
+        self.variant = ProductVariant.objects.create(product=product, sku='SKU', price=10, stock_quantity=5)
+
+    def stock(self):
+        return available_stock([self.variant.id])[self.variant.id]
+
+    def hold(self, user, quantity):
+        self.client.force_authenticate(user=user)
+        self.client.put('/api/orders/cart/', {'items': [{'variant_id': self.variant.id, 'quantity': quantity}]}, format='json')
+        return self.client.post('/api/orders/cart/hold/')
+
+    def test_hold_takes_stock_out_until_released(self):
+        response = self.hold(self.buyer, 4)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stock(), 1)
+
+        response = self.hold(self.other, 2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['failures'][0]['variant_id'], self.variant.id)
+
+        # Holding again refreshes instead of holding twice
+        self.assertEqual(self.hold(self.buyer, 4).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stock(), 1)
+
+        self.client.force_authenticate(user=self.buyer)
+        self.client.delete('/api/orders/cart/hold/')
+        self.assertEqual(self.stock(), 5)
+
+    def test_checkout_uses_the_hold(self):
+        self.hold(self.buyer, 3)
+        response = self.client.post('/api/orders/buyer/checkout/', {
+            'items': [{'variant_id': self.variant.id, 'quantity': 2}],
+            'shipping_address': {}, 'billing_address': {},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stock(), 3) # 2 sold, the extra held unit went back
+        self.assertEqual(StockHold.objects.get().status, StockHold.Status.CONVERTED)
+        self.assertEqual(self.client.get('/api/orders/cart/').data['items'], [])
+
+    def test_sweeper_releases_only_expired_holds(self):
+        self.hold(self.buyer, 2)
+        self.hold(self.other, 1)
+        StockHold.objects.filter(buyer=self.buyer).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(release_expired_holds(batch_size=1), 1)
+        self.assertEqual(self.stock(), 4)
+        self.assertEqual(release_expired_holds(), 0)
+        self.assertEqual(StockHold.objects.get(buyer=self.other).status, StockHold.Status.ACTIVE)
+
+        admin = User.objects.create_superuser(email='admin@test.com', password='password')
+        self.client.force_authenticate(user=admin)
+        stats = self.client.get('/api/orders/holds/stats/').data
+        self.assertEqual(stats['by_status']['EXPIRED']['holds'], 1)
+        self.assertEqual(stats['expiry_rate'], 1.0)
+
+class IdempotentCheckoutTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        product = Product.objects.create(seller=seller, name='P', slug='p', status='ACTIVE')
+        self.variant = ProductVariant.objects.create(product=product, sku='SKU', price=10, stock_quantity=5)
+        self.client.force_authenticate(user=self.buyer)
+
+    def checkout(self, key, quantity=2):
+        return self.client.post('/api/orders/buyer/checkout/', {
+            'items': [{'variant_id': self.variant.id, 'quantity': quantity}],
+            'shipping_address': {}, 'billing_address': {},
+        }, format='json', headers={'Idempotency-Key': key})
+
+    def test_retry_replays_first_result(self):
+        first = self.checkout('abc')
+        second = self.checkout('abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(available_stock([self.variant.id])[self.variant.id], 3)
+
+        self.assertEqual(self.checkout('abc', quantity=1).status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(self.checkout('other').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_duplicate_while_first_is_running(self):
+        from .idempotency import fingerprint
+        body = {'items': [{'variant_id': self.variant.id, 'quantity': 2}], 'shipping_address': {}, 'billing_address': {}}
+        IdempotencyKey.objects.create(
+            user=self.buyer, scope='checkout', key='abc', fingerprint=fingerprint(body),
+            expires_at=timezone.now() + timedelta(seconds=60),
+        )
+        response = self.checkout('abc')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_slow_request_that_lost_its_claim_is_rolled_back(self):
+        from unittest import mock
+        from . import idempotency
+        real_claim = idempotency.claim
+
+        def taken_over(*args):
+            # Committed by the retry while this request runs: its claim timed out and was replaced
+            row, claimed = real_claim(*args)
+            IdempotencyKey.objects.filter(pk=row.pk).delete()
+            IdempotencyKey.objects.create(
+                user=self.buyer, scope='checkout', key='abc', fingerprint='retry',
+                expires_at=timezone.now() + timedelta(seconds=60),
+            )
+            return row, claimed
+
+        with mock.patch.object(idempotency, 'claim', side_effect=taken_over):
+            response = self.checkout('abc')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(available_stock([self.variant.id])[self.variant.id], 5)
+        self.assertEqual(IdempotencyKey.objects.get().fingerprint, 'retry') # The retry's claim is left alone
+
+    def test_expired_keys_run_again_and_are_purged(self):
+        self.checkout('abc')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.checkout('abc').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_keys(), 1)
@@ -0,0 +1,146 @@
+# apps/orders/transitions.py
+"""
+Order and packet status changes.
+
+Every allowed change is a named transition in the tables below. transition()
+applies one to a set of rows as a conditional UPDATE ... WHERE status IN
+(sources), so of two concurrent requests only one moves a row; callers get
+back the ids that actually moved and answer from that instead of checking
+the status up front. Each applied transition is logged to OrderStatusChange
+with the time spent in the previous status, runs the hooks registered with
+@on_transition, and packet transitions roll the parent order's status up.
+"""
+from collections import defaultdict
+from typing import NamedTuple
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from .models import Order, SellerOrder, OrderStatusChange
+
+class Transition(NamedTuple):
+    sources: tuple
+    target: str
+
+S = SellerOrder.Status
+SELLER_ORDER_TRANSITIONS = {
+    'confirm': Transition((S.WAITING_CONFIRMATION,), S.PROCESSING),
+    'ship': Transition((S.WAITING_CONFIRMATION, S.PROCESSING), S.SHIPPED),
+    'deliver': Transition((S.SHIPPED,), S.DELIVERED),
+    'cancel': Transition((S.WAITING_CONFIRMATION, S.PROCESSING), S.CANCELLED),
+    'reject': Transition((S.WAITING_CONFIRMATION,), S.CANCELLED), # By the seller, before confirming
+    'return': Transition((S.DELIVERED,), S.RETURNED),
+}
+
+O = Order.Status
+ORDER_TRANSITIONS = {
+    'pay': Transition((O.PENDING,), O.PAID),
+    'cancel': Transition((O.PENDING, O.PAID), O.CANCELLED),
+}
+# Paid orders follow their packets, see rollup_orders(); a cancelled order stays cancelled
+ROLLUP_STATUSES = (O.PAID, O.PARTIALLY_FULFILLED, O.COMPLETED)
+OPEN_PACKET_STATUSES = (S.WAITING_CONFIRMATION, S.PROCESSING, S.SHIPPED)
+
+TRANSITIONS = {Order: ORDER_TRANSITIONS, SellerOrder: SELLER_ORDER_TRANSITIONS}
+
+_hooks = defaultdict(list)
+
+def on_transition(model, name):
+    """Register hook(ids) to run in the same transaction after `name` moved the rows `ids` of `model`."""
+    TRANSITIONS[model][name] # Fail early on typos
+    def register(hook):
+        _hooks[(model, name)].append(hook)
+        return hook
+    return register
+
+
+def can_transition(model, name, current_status):
+    return current_status in TRANSITIONS[model][name].sources
+
+
+def _record(model, name, rows, target, now, by):
+    """Log the moved rows ({'id', 'status', 'created_at'[, 'order_id']}) with the time spent in their previous status."""
+    ids = [row['id'] for row in rows]
+    if model is SellerOrder:
+        history = OrderStatusChange.objects.filter(seller_order_id__in=ids).values_list('seller_order_id')
+    else:
+        history = OrderStatusChange.objects.filter(order_id__in=ids, seller_order__isnull=True).values_list('order_id')
+    entered = dict(history.annotate(at=Max('created_at')))
+
+    OrderStatusChange.objects.bulk_create([
+        OrderStatusChange(
+            order_id=row.get('order_id', row['id']),
+            seller_order_id=row['id'] if model is SellerOrder else None,
+            transition=name, from_status=row['status'], to_status=target,
+            duration=now - entered.get(row['id'], row['created_at']),
+            changed_by=by,
+        )
+        for row in rows
+    ])
+
+
+@transaction.atomic
+def transition(model, name, ids, by=None):
+    """
+    Apply transition `name` to the rows `ids` of Order or SellerOrder.
+    Rows not in one of its source statuses are left alone.
+    Returns the ids that moved, in id order.
+    """
+    sources, target = TRANSITIONS[model][name]
+    fields = ['id', 'status', 'created_at'] + (['order_id'] if model is SellerOrder else [])
+    rows = list(
+        model.objects.select_for_update()
+        .filter(pk__in=ids, status__in=sources).order_by('id').values(*fields)
+    )
+    if not rows:
+        return []
+
+    moved = [row['id'] for row in rows]
+    now = timezone.now()
+    model.objects.filter(pk__in=moved, status__in=sources).update(status=target, updated_at=now)
+    _record(model, name, rows, target, now, by)
+    for hook in _hooks[(model, name)]:
+        hook(moved)
+    if model is SellerOrder:
+        rollup_orders({row['order_id'] for row in rows}, by=by)
+    return moved
+
+
+def rolled_up_status(packets, open_packets, cancelled):
+    """Order status implied by its packet counts; None for an order without packets."""
+    if not packets:
+        return None
+    if cancelled == packets:
+        return O.CANCELLED
+    finished = packets - open_packets - cancelled # Delivered or returned
+    if not open_packets:
+        return O.COMPLETED
+    return O.PARTIALLY_FULFILLED if finished else O.PAID
+
+
+def rollup_orders(order_ids, by=None):
+    """
+    Derive the status of paid orders from their packets with one aggregate query,
+    then one UPDATE per resulting status. Returns { order_id: new status } for the orders that changed.
+    """
+    rows = (
+        Order.objects.filter(pk__in=order_ids, status__in=ROLLUP_STATUSES)
+        .annotate(
+            packets=Count('seller_orders'),
+            open_packets=Count('seller_orders', filter=Q(seller_orders__status__in=OPEN_PACKET_STATUSES)),
+            cancelled=Count('seller_orders', filter=Q(seller_orders__status=S.CANCELLED)),
+        )
+        .values('id', 'status', 'created_at', 'packets', 'open_packets', 'cancelled')
+    )
+    moves = defaultdict(list)
+    for row in rows:
+        target = rolled_up_status(row['packets'], row['open_packets'], row['cancelled'])
+        if target and target != row['status']:
+            moves[target].append(row)
+
+    now = timezone.now()
+    changed = {}
+    for target, group in moves.items():
+        Order.objects.filter(pk__in=[row['id'] for row in group], status__in=ROLLUP_STATUSES).update(status=target, updated_at=now)
+        _record(Order, 'rollup', group, target, now, by)
+        changed.update((row['id'], target) for row in group)
+    return changed
@@ -1,12 +1,15 @@
 # apps/orders/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BuyerOrderViewSet, SellerOrderViewSet
+from .views import BuyerOrderViewSet, SellerOrderViewSet, CartView, CartHoldView, HoldStatsView
 
 router = DefaultRouter()
 router.register('buyer', BuyerOrderViewSet, basename='buyer-orders')
 router.register('seller', SellerOrderViewSet, basename='seller-orders')
 
 urlpatterns = [
+    path('cart/', CartView.as_view(), name='cart'),
+    path('cart/hold/', CartHoldView.as_view(), name='cart-hold'),
+    path('holds/stats/', HoldStatsView.as_view(), name='hold-stats'),
     path('', include(router.urls)),
 ]
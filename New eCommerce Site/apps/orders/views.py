@@ -1,13 +1,23 @@
 # apps/orders/views.py
+from datetime import timedelta
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from django.db import transaction
-from .models import Order, SellerOrder, OrderItem, Shipment
-from apps.products.models import ProductVariant
-from .serializers import OrderDetailSerializer, SellerOrderSerializer, CheckoutSerializer, ShipmentUpdateSerializer
+from django.utils import timezone
+from .models import Order, SellerOrder, Shipment, Cart, CartItem, StockHold
+from .checkout import place_order, ReservationError, _resolve_variant_ids
+from .cancellation import cancel_orders
+from .transitions import can_transition, transition
+from .holds import place_holds, release_buyer_holds, checkout_lines, hold_stats
+from .idempotency import idempotent
+from .tasks import notify_buyer
+from .serializers import (
+    OrderDetailSerializer, SellerOrderSerializer, CheckoutSerializer, ShipmentUpdateSerializer,
+    CartSyncSerializer, CartItemSerializer, StockHoldSerializer,
+)
 from apps.accounts.permissions import IsBuyer, IsSeller
-from apps.messaging.models import Conversation, Message
 
 class BuyerOrderViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -17,41 +27,31 @@ class BuyerOrderViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsBuyer]
 
     def get_queryset(self):
-        return Order.objects.filter(buyer=self.request.user).order_by('-created_at')
+        qs = Order.objects.filter(buyer=self.request.user).order_by('-created_at')
+        if self.action in ['list', 'retrieve']:
+            qs = OrderDetailSerializer.prefetch_queryset(qs)
+        return qs
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         order = self.get_object()
         
         # Check eligibility
-        # Check global status
-        if order.status in [Order.Status.COMPLETED, Order.Status.CANCELLED]:
+        if not can_transition(Order, 'cancel', order.status):
             return Response({'error': 'Bu sipariş iptal edilemez.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check if any sub-order is shipped
         if order.seller_orders.filter(status__in=[SellerOrder.Status.SHIPPED, SellerOrder.Status.DELIVERED]).exists():
              return Response({'error': 'Siparişin bir kısmı kargolandığı için tamamı iptal edilemez.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Cancel order
-        order.status = Order.Status.CANCELLED
-        order.save()
-        
-        # Cancel sub-orders
-        # Cancel sub-orders
-        for so in order.seller_orders.all():
-             # Only if not shipped
-             if so.status not in [SellerOrder.Status.SHIPPED, SellerOrder.Status.DELIVERED]:
-                 so.status = SellerOrder.Status.CANCELLED
-                 so.save()
-                 
-                 # Restore Stock
-                 for item in so.items.all():
-                     variant = item.variant
-                     variant.stock_quantity += item.quantity
-                     variant.save()
+        # Order, open packets and stock restoration in one transaction (see orders/cancellation.py)
+        cancelled, _ = cancel_orders([order.id], by=request.user)
+        if not cancelled:
+            return Response({'error': 'Bu sipariş iptal edilemez.'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'status': 'Order cancelled'})
     @action(detail=False, methods=['post'])
+    @idempotent('checkout') # Retries with the same Idempotency-Key replay the first result
     @transaction.atomic
     def checkout(self, request):
         serializer = CheckoutSerializer(data=request.data)
@@ -59,74 +59,16 @@ class BuyerOrderViewSet(viewsets.ReadOnlyModelViewSet):
         
         data = serializer.validated_data
         
-        # 1. Validate Stock & Calculate Totals
-        # 1. Validate Stock & Calculate Totals
-        # Group by Seller
-        seller_packets = {} # { seller_id: [ { variant, qty, price } ] }
-        global_total = 0
-        
-        for item in data['items']:
-            variant = None
-            if item.get('variant_id'):
-                variant = ProductVariant.objects.select_for_update().get(id=item['variant_id'])
-            elif item.get('product_id'):
-                variant = ProductVariant.objects.select_for_update().filter(product_id=item['product_id']).first()
-                
-            if not variant:
-                return Response({'error': f"Product/Variant not found or unavailable"}, status=status.HTTP_400_BAD_REQUEST)
-
-            qty = item['quantity']
-            
-            # Use safe stock check
-            if variant.stock_quantity < qty:
-                return Response({'error': f"Insufficient stock for {variant.name}"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Reduce Stock
-            variant.stock_quantity -= qty
-            variant.save()
-            
-            # Organize
-            seller_id = variant.product.seller_id
-            if seller_id not in seller_packets:
-                seller_packets[seller_id] = []
-            
-            line_total = variant.price * qty
-            global_total += line_total
-            
-            seller_packets[seller_id].append({
-                'variant': variant,
-                'quantity': qty,
-                'unit_price': variant.price,
-                'total_price': line_total
-            })
-
-        # 2. Create Global Order
-        order = Order.objects.create(
-            buyer=request.user,
-            total_amount=global_total,
-            shipping_address=data['shipping_address'],
-            billing_address=data['billing_address'],
-            status=Order.Status.PAID # Assuming payment mocked
-        )
-
-        # 3. Create Seller Orders (Packets)
-        for seller_id, items in seller_packets.items():
-            packet_total = sum(i['total_price'] for i in items)
-            seller_order = SellerOrder.objects.create(
-                order=order,
-                seller_id=seller_id,
-                total_amount=packet_total,
-                status=SellerOrder.Status.WAITING_CONFIRMATION # Wait for seller to confirm
-            )
-            
-            for i in items:
-                OrderItem.objects.create(
-                    seller_order=seller_order,
-                    variant=i['variant'],
-                    quantity=i['quantity'],
-                    unit_price=i['unit_price'],
-                    total_price=i['total_price']
-                )
+        # 1. Take over the buyer's stock holds, lock & reserve the rest at once (see orders/holds.py)
+        try:
+            lines = checkout_lines(request.user, data['items'], reference=f'checkout:buyer:{request.user.id}')
+        except ReservationError as e:
+            return Response({'error': str(e), 'failures': e.failures}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. Create Global Order + Seller Orders (Packets) + Items
+        order = place_order(request.user, lines, data['shipping_address'], data['billing_address'])
+        CartItem.objects.filter(cart__buyer=request.user).delete()
+        order = OrderDetailSerializer.prefetch_queryset(Order.objects.filter(pk=order.pk)).get()
 
         return Response(OrderDetailSerializer(order).data, status=status.HTTP_201_CREATED)
 
@@ -137,62 +79,43 @@ class SellerOrderViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = SellerOrderSerializer
     permission_classes = [permissions.IsAuthenticated, IsSeller]
+    max_page_size = 50 # Each packet carries nested items
 
     def get_queryset(self):
-        return SellerOrder.objects.filter(seller=self.request.user).order_by('-created_at')
+        qs = SellerOrder.objects.filter(seller=self.request.user).order_by('-created_at')
+        if self.action in ['list', 'retrieve']:
+            qs = SellerOrderSerializer.prefetch_queryset(qs)
+        return qs
 
     @action(detail=True, methods=['post'])
     def ship(self, request, pk=None):
         seller_order = self.get_object()
         
-        if seller_order.status not in [SellerOrder.Status.PROCESSING, SellerOrder.Status.WAITING_CONFIRMATION]:
-             return Response({'error': 'Order not ready for shipping'}, status=status.HTTP_400_BAD_REQUEST)
-
         serializer = ShipmentUpdateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        Shipment.objects.create(seller_order=seller_order, **serializer.validated_data)
-        
-        seller_order.status = SellerOrder.Status.SHIPPED
-        seller_order.save()
-        
+
+        with transaction.atomic():
+            if not transition(SellerOrder, 'ship', [seller_order.id], by=request.user):
+                return Response({'error': 'Order not ready for shipping'}, status=status.HTTP_400_BAD_REQUEST)
+            Shipment.objects.create(seller_order=seller_order, **serializer.validated_data)
+
         return Response({'status': 'Order Shipped'})
     
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """
         Seller confirms the order and starts processing it.
-        This also sends a system message to the buyer.
+        The system message to the buyer is queued (apps/orders/tasks.py).
         """
         seller_order = self.get_object()
         
-        if seller_order.status != SellerOrder.Status.WAITING_CONFIRMATION:
-            return Response({'error': 'Order already processed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Update status to PROCESSING
-        seller_order.status = SellerOrder.Status.PROCESSING
-        seller_order.save()
-        
-        # Get or create conversation for this order
-        conversation, created = Conversation.objects.get_or_create(
-            order=seller_order
-        )
-        
-        # Add participants if newly created
-        if created:
-            conversation.participants.add(seller_order.seller, seller_order.order.buyer)
-        
-        # Send system message to buyer
-        Message.objects.create(
-            conversation=conversation,
-            sender=request.user,  # Seller
-            content="Siparişiniz onaylandı ve hazırlanıyor.",
-            is_system_message=True
-        )
-        
-        # Update conversation timestamp
-        conversation.save()
-        
+        # Conditional UPDATE, a second click finds nothing to move (see orders/transitions.py)
+        with transaction.atomic():
+            if not transition(SellerOrder, 'confirm', [seller_order.id], by=request.user):
+                return Response({'error': 'Order already processed'}, status=status.HTTP_400_BAD_REQUEST)
+            # The message is written by the task worker once this commits
+            notify_buyer.delay(seller_order.id, request.user.id, "Siparişiniz onaylandı ve hazırlanıyor.")
+
         return Response({'status': 'Order confirmed and buyer notified'})
 
     @action(detail=True, methods=['post'])
@@ -202,38 +125,88 @@ class SellerOrderViewSet(viewsets.ReadOnlyModelViewSet):
         """
         seller_order = self.get_object()
         
-        if seller_order.status != SellerOrder.Status.WAITING_CONFIRMATION:
-            return Response({'error': 'Order already processed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Update status to CANCELLED
-        seller_order.status = SellerOrder.Status.CANCELLED
-        seller_order.save()
-        
-        # Restore Stock
-        for item in seller_order.items.all():
-             variant = item.variant
-             variant.stock_quantity += item.quantity
-             variant.save()
-
-        # Get or create conversation for this order
-        conversation, created = Conversation.objects.get_or_create(
-            order=seller_order
-        )
-        
-        # Add participants if newly created
-        if created:
-            conversation.participants.add(seller_order.seller, seller_order.order.buyer)
-        
-        # Send system message to buyer
-        Message.objects.create(
-            conversation=conversation,
-            sender=request.user,  # Seller
-            content="Siparişiniz reddedildi.",
-            is_system_message=True
-        )
-        
-        # Update conversation timestamp
-        conversation.save()
-        
+        # Cancels and restores stock with set-based updates (see orders/cancellation.py)
+        with transaction.atomic():
+            if not transition(SellerOrder, 'reject', [seller_order.id], by=request.user):
+                return Response({'error': 'Order already processed'}, status=status.HTTP_400_BAD_REQUEST)
+            notify_buyer.delay(seller_order.id, request.user.id, "Siparişiniz reddedildi.")
+
         return Response({'status': 'Order rejected and buyer notified'})
 
+
+
+class CartView(APIView):
+    """
+    Server-side cart.
+    GET: items and the active stock holds.
+    PUT {'items': [{'variant_id'|'product_id', 'quantity'}]}: replace the cart (browser sync).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsBuyer]
+
+    def get(self, request):
+        items = CartItem.objects.filter(cart__buyer=request.user).select_related('variant__product').order_by('id')
+        holds = StockHold.objects.filter(buyer=request.user, status=StockHold.Status.ACTIVE)
+        return Response({
+            'items': CartItemSerializer(items, many=True).data,
+            'holds': StockHoldSerializer(holds, many=True).data,
+        })
+
+    @transaction.atomic
+    def put(self, request):
+        serializer = CartSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+
+        quantities = {}
+        for index, (item, variant_id) in enumerate(zip(items, _resolve_variant_ids(items))):
+            if not variant_id:
+                return Response({'error': f'Line {index}: product/variant not found'}, status=status.HTTP_400_BAD_REQUEST)
+            quantities[variant_id] = quantities.get(variant_id, 0) + item['quantity']
+
+        cart, _ = Cart.objects.get_or_create(buyer=request.user)
+        cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, variant_id=variant_id, quantity=quantity) for variant_id, quantity in quantities.items()
+        ])
+        cart.save(update_fields=['updated_at'])
+        return self.get(request)
+
+
+class CartHoldView(APIView):
+    """
+    POST: hold stock for the whole cart for CART_HOLD_SECONDS (call when entering checkout,
+    again to extend). DELETE: give the held stock back.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsBuyer]
+
+    def post(self, request):
+        items = [
+            {'variant_id': variant_id, 'quantity': quantity}
+            for variant_id, quantity in CartItem.objects.filter(cart__buyer=request.user).values_list('variant_id', 'quantity')
+        ]
+        if not items:
+            return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            holds = place_holds(request.user, items)
+        except ReservationError as e:
+            return Response({'error': str(e), 'failures': e.failures}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'expires_at': holds[0].expires_at,
+            'holds': StockHoldSerializer(holds, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        released = release_buyer_holds(request.user)
+        return Response({'released': released})
+
+
+class HoldStatsView(APIView):
+    """Hold conversion and expiry rates for monitoring (?hours=24)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            hours = float(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response({'error': 'hours must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(hold_stats(timezone.now() - timedelta(hours=hours)))
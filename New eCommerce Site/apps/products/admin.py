@@ -1,11 +1,13 @@
 # products/admin.py
 from django.contrib import admin
-from .models import Product, ProductVariant, BundleItem, ProductImage, Category
+from .models import Product, ProductVariant, BundleItem, ProductImage, Category, InventoryMovement, InventorySnapshot, ProductImport
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'order')
+    list_display = ('name', 'slug', 'parent', 'product_count', 'order')
+    list_filter = ('depth',)
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('path', 'depth', 'product_count')
     list_editable = ('order',)
 
 class ProductImageInline(admin.TabularInline):
@@ -60,3 +62,33 @@ class ProductVariantAdmin(admin.ModelAdmin):
     search_fields = ('product__name', 'sku', 'name')
     list_filter = ('product__seller',)
     autocomplete_fields = ['product']
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    list_display = ('id', 'variant', 'kind', 'quantity', 'reference', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('variant__sku', 'reference')
+    readonly_fields = ('variant', 'kind', 'quantity', 'reference', 'created_at')
+
+    # Append-only: corrections are new ADJUSTMENT movements
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('variant', 'quantity', 'last_movement_id', 'updated_at')
+    search_fields = ('variant__sku',)
+    readonly_fields = ('variant', 'quantity', 'last_movement_id', 'updated_at')
+
+@admin.register(ProductImport)
+class ProductImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'seller', 'file_format', 'status', 'total_rows', 'created_count', 'updated_count', 'error_count', 'created_at', 'finished_at')
+    list_filter = ('status', 'file_format', 'created_at')
+    search_fields = ('seller__email',)
+    readonly_fields = ('seller', 'file', 'file_format', 'status', 'total_rows', 'created_count', 'updated_count', 'error_count', 'errors', 'created_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,124 @@
+# apps/products/cache.py
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+# Namespaces are invalidated separately: a product change must not flush the
+# category list, but a category change flushes both (products embed their category).
+PRODUCTS = 'products'
+CATEGORIES = 'categories'
+# Response headers kept with a cached body: what the paginator sets (config/pagination.py)
+CACHED_HEADERS = ('Link', 'X-Has-More')
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+def _generation_key(namespace):
+    return f'catalog:gen:{namespace}'
+
+def get_generation(namespace):
+    cache = get_catalog_cache()
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # Time based start so an evicted counter never reuses an old generation
+        generation = int(time.time() * 1000)
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+    return generation
+
+def _bump(namespace):
+    cache = get_catalog_cache()
+    try:
+        cache.incr(_generation_key(namespace))
+    except ValueError:
+        get_generation(namespace)
+
+def invalidate_catalog(*namespaces):
+    """
+    Drop every cached response of the given namespaces.
+    Runs after commit so no request can re-cache the pre-commit state.
+    """
+    for namespace in namespaces:
+        transaction.on_commit(lambda namespace=namespace: _bump(namespace))
+
+def record(namespace, outcome):
+    cache = get_catalog_cache()
+    key = f'catalog:stats:{namespace}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+def get_stats():
+    cache = get_catalog_cache()
+    stats = {}
+    for namespace in [PRODUCTS, CATEGORIES]:
+        hits = cache.get(f'catalog:stats:{namespace}:hit', 0)
+        misses = cache.get(f'catalog:stats:{namespace}:miss', 0)
+        total = hits + misses
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'generation': get_generation(namespace),
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Caches anonymous list/retrieve responses of a viewset.
+    Key: namespace generation + path + sorted query params.
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    Set `cache_namespace` on the viewset.
+    """
+    cache_namespace = PRODUCTS
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+    def get_cache_key(self, request):
+        params = sorted((k, v) for k in request.query_params for v in request.query_params.getlist(k) if v != '')
+        raw = json.dumps([request.path, params])
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'catalog:resp:{self.cache_namespace}:{get_generation(self.cache_namespace)}:{digest}'
+
+    def cached_response(self, request, build):
+        if request.user.is_authenticated:
+            return build()
+
+        cache = get_catalog_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+
+        if entry is None:
+            record(self.cache_namespace, 'miss')
+            response = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = JSONRenderer().render(response.data)
+            entry = {
+                'data': json.loads(content),
+                'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+                'headers': {k: v for k, v in response.items() if k in CACHED_HEADERS},
+            }
+            cache.set(key, entry, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+        else:
+            record(self.cache_namespace, 'hit')
+
+        headers = dict(entry['headers'], ETag=entry['etag'])
+        if_none_match = request.headers.get('If-None-Match', '')
+        if entry['etag'] in [tag.strip() for tag in if_none_match.split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
@@ -0,0 +1,121 @@
+# apps/products/categories.py
+"""
+Category tree upkeep.
+
+Category.path holds the ids from the root down to the category, '3/17/42/'.
+Everything under a category is every row whose path starts with its path,
+written as the range '3/17/' <= path < '3/170' ('0' follows '/'), see
+subtree(): one indexed range query, whatever the depth, for both the
+categories and their products. (startswith would be a LIKE, which SQLite
+only serves from the index with case_sensitive_like on.) The ids of a
+category's ancestors are read off its path, without a query.
+
+Category.product_count is the number of ACTIVE products in the category
+and everything under it. It is kept up to date incrementally: a product
+entering or leaving the active set of a category, or moving between
+categories, adds +1/-1 to every category on the path (products/signals.py,
+and imports.py for its bulk writes), with one UPDATE per distinct change.
+rebuild_tree() recomputes paths and counts from scratch, for repairs
+(`manage.py rebuild_category_tree`).
+"""
+from collections import Counter, defaultdict
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Concat, Substr
+from .models import Category, Product
+from .cache import invalidate_catalog, CATEGORIES
+
+def subtree(path, field='path'):
+    """Q for the rows whose `field` (a category path) is `path` or under it, as an index range."""
+    return Q(**{f'{field}__gte': path, f'{field}__lt': path[:-1] + chr(ord('/') + 1)})
+
+def ancestor_ids(path):
+    """Ids on a path, root first, the category itself last."""
+    return [int(part) for part in path.split('/') if part]
+
+def _add_counts(totals):
+    """Apply { category id: change } with one UPDATE per distinct change."""
+    by_change = defaultdict(list)
+    for pk, change in totals.items():
+        if change:
+            by_change[change].append(pk)
+    for change, ids in by_change.items():
+        Category.objects.filter(pk__in=ids).update(product_count=F('product_count') + change)
+    if by_change:
+        invalidate_catalog(CATEGORIES)
+
+def adjust_product_counts(changes):
+    """Apply { category id: change in its active products } to those categories and their ancestors."""
+    changes = {pk: change for pk, change in changes.items() if pk is not None and change}
+    if not changes:
+        return
+    totals = Counter()
+    for pk, path in Category.objects.filter(pk__in=changes).values_list('pk', 'path'):
+        for ancestor in ancestor_ids(path):
+            totals[ancestor] += changes[pk]
+    _add_counts(totals)
+
+def counted_category(status, category_id):
+    """The category a product with this status adds to, or None."""
+    return category_id if status == Product.Status.ACTIVE else None
+
+def place_category(category, old_path):
+    """
+    Give a saved category its path and depth from its parent. A category moved
+    to another parent takes its subtree along (one UPDATE for all their paths)
+    and its products out of the old ancestors' counts into the new ones'.
+    """
+    parent_path = Category.objects.filter(pk=category.parent_id).values_list('path', flat=True).first() or ''
+    path = f'{parent_path}{category.pk}/'
+    depth = len(ancestor_ids(path)) - 1
+    if path == old_path:
+        return
+    if old_path:
+        moved = Category.objects.filter(subtree(old_path))
+        moved.update(
+            path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+            depth=F('depth') + (depth - (len(ancestor_ids(old_path)) - 1)),
+        )
+        count = Category.objects.filter(pk=category.pk).values_list('product_count', flat=True).get()
+        totals = Counter()
+        for ancestor in ancestor_ids(old_path)[:-1]:
+            totals[ancestor] -= count
+        for ancestor in ancestor_ids(parent_path):
+            totals[ancestor] += count
+        _add_counts(totals)
+    else:
+        Category.objects.filter(pk=category.pk).update(path=path, depth=depth)
+    category.path, category.depth = path, depth
+
+def remove_category(category):
+    """Take a deleted category's products out of its ancestors' counts."""
+    _add_counts({ancestor: -category.product_count for ancestor in ancestor_ids(category.path)[:-1]})
+
+def rebuild_tree():
+    """Recompute every path, depth and product_count from the parent links and the products. Returns the rows fixed."""
+    rows = {pk: (parent_id, path, depth, count) for pk, parent_id, path, depth, count in
+            Category.objects.values_list('pk', 'parent_id', 'path', 'depth', 'product_count')}
+    paths = {}
+    for pk in rows:
+        chain, node = [], pk
+        while node is not None and node not in paths and node not in chain:
+            chain.append(node)
+            node = rows[node][0]
+        prefix = paths.get(node, '')
+        for node in reversed(chain):
+            prefix = paths[node] = f'{prefix}{node}/'
+
+    direct = Product.objects.filter(status=Product.Status.ACTIVE, category__isnull=False).values('category').annotate(total=Count('id'))
+    counts = Counter()
+    for row in direct:
+        for ancestor in ancestor_ids(paths[row['category']]):
+            counts[ancestor] += row['total']
+
+    fixed = [
+        Category(pk=pk, path=paths[pk], depth=len(ancestor_ids(paths[pk])) - 1, product_count=counts[pk])
+        for pk, (_, path, depth, count) in rows.items()
+        if (path, depth, count) != (paths[pk], len(ancestor_ids(paths[pk])) - 1, counts[pk])
+    ]
+    Category.objects.bulk_update(fixed, ['path', 'depth', 'product_count'])
+    if fixed:
+        invalidate_catalog(CATEGORIES)
+    return len(fixed)
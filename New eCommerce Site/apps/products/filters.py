@@ -0,0 +1,29 @@
+# apps/products/filters.py
+from rest_framework import filters
+from .search import get_search_backend
+
+class ProductSearchFilter(filters.BaseFilterBackend):
+    """
+    Full-text search through the product search index (see products/search.py).
+    Keeps the `?search=` parameter of DRF's SearchFilter; matches are annotated
+    with `search_rank` and ordered by relevance instead of recency. The index is
+    queried inside the view's queryset, so its filters apply before any ranking
+    cut-off and every match can be paged to.
+    """
+    search_param = 'search'
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+
+        return get_search_backend().filter(queryset, query).order_by('search_rank', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        # Picked up by CursorPagination so pages follow relevance order
+        if self.get_search_query(request):
+            return ('search_rank', 'id')
+        return None
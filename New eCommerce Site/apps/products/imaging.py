@@ -0,0 +1,61 @@
+# apps/products/imaging.py
+"""
+Pillow-only image encoding for products/renditions.py.
+
+These functions run in the rendition process pool, whose workers are
+spawned fresh: keep Django (settings, models) out of this module.
+"""
+import io
+from PIL import Image, ImageOps
+
+# Pillow format name, save options
+ENCODERS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+ROTATED = (5, 6, 7, 8) # EXIF orientations that swap width and height
+
+def is_image(file):
+    """Whether a file object holds an image Pillow can read (header and structure check, no decoding)."""
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
+    return True
+
+def dimensions(data):
+    """(width, height) as displayed, read from the header without decoding the pixels."""
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in ROTATED:
+            return height, width
+        return width, height
+
+def render(data, width, image_formats):
+    """
+    `data` turned upright and scaled down to `width` pixels wide, encoded once
+    per format (webp, jpeg). Returns { format: bytes }.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+        encoded = {}
+        for image_format in image_formats:
+            if image_format == 'jpeg' and has_alpha:
+                # JPEG has no alpha: flatten onto white, like the storefront background
+                rgba = image.convert('RGBA')
+                frame = Image.new('RGB', rgba.size, 'white')
+                frame.paste(rgba, mask=rgba.getchannel('A'))
+            elif image.mode not in ('RGB', 'RGBA'):
+                frame = image.convert('RGBA' if has_alpha else 'RGB')
+            else:
+                frame = image
+            pil_format, options = ENCODERS[image_format]
+            out = io.BytesIO()
+            frame.save(out, format=pil_format, **options)
+            encoded[image_format] = out.getvalue()
+        return encoded
@@ -0,0 +1,312 @@
+# apps/products/imports.py
+"""
+Bulk catalog import for sellers.
+
+A file holds one row per variant, as CSV with a header or as JSON Lines:
+
+    sku, product, description, category, variant, price, compare_at_price, stock, weight_g, attributes
+
+Rows are streamed and handled CHUNK_SIZE at a time. Each row is validated
+with ProductImportRowSerializer; the valid rows of a chunk are then upserted
+by SKU in one transaction with a fixed number of queries (variants by SKU,
+the seller's products by name, taken slugs, bulk_create/bulk_update of products and variants, one ledger
+INSERT), however many rows the chunk has. Invalid rows are reported with
+their line number and skipped, the rest of the file is still imported.
+
+Rows naming the same product form one product. A new SKU under a name the
+seller already has a product with (from an earlier import, say) joins that
+product; any other new name becomes a new product with a slug from
+unique_slugs(). An existing SKU keeps its product,
+which takes the name, description and category of the row. stock is the
+available stock to set: new SKUs get a RESTOCK movement, changed ones an
+ADJUSTMENT for the difference.
+
+bulk_create/bulk_update send no model signals, so the work of
+products/signals.py (ledger, summaries, search index, category counts,
+catalog cache) is done here per chunk.
+"""
+import codecs
+import csv
+import json
+from collections import Counter
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import serializers
+from .models import Product, ProductVariant, Category, InventoryMovement, ProductImport
+from .serializers import ProductImportRowSerializer
+from .inventory import fold_stock_shards, record_movements
+from .summary import refresh_product_summaries
+from .search import get_search_backend
+from .cache import invalidate_catalog, PRODUCTS
+from .categories import adjust_product_counts, counted_category
+
+Kind = InventoryMovement.Kind
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000 # Later errors are counted but not listed
+SLUG_BASE_LENGTH = 240 # Leaves room for a '-<n>' suffix in Product.slug
+SLUG_LOOKUP_BATCH = 100 # Prefixes per taken-slug query, keeps the OR list short
+
+# row column -> ProductVariant field
+VARIANT_COLUMNS = {
+    'variant': 'name',
+    'price': 'price',
+    'compare_at_price': 'compare_at_price',
+    'stock': 'stock_quantity',
+    'weight_g': 'weight_g',
+    'attributes': 'attributes',
+}
+
+def read_rows(file, file_format):
+    """Yield (line number, row dict or None, parse error or None) from a binary file object."""
+    lines = codecs.iterdecode(file, 'utf-8-sig')
+    if file_format == ProductImport.Format.CSV:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells count as left out
+            data = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            if 'attributes' in data:
+                try:
+                    data['attributes'] = json.loads(data['attributes'])
+                except ValueError:
+                    pass # Reported by the serializer
+            yield reader.line_num, data, None
+    else:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                yield number, None, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(data, dict):
+                yield number, None, 'Each line must be a JSON object'
+                continue
+            yield number, data, None
+
+def _plain(detail):
+    """Serializer errors as plain lists/dicts of strings, for the JSON errors column."""
+    if isinstance(detail, dict):
+        return {key: _plain(value) for key, value in detail.items()}
+    if isinstance(detail, list):
+        return [_plain(value) for value in detail]
+    return str(detail)
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def unique_slugs(names):
+    """
+    A product slug per name, unused in the table and among each other:
+    slugify(name), else slugify(name)-2, -3, ... The taken slugs are read with
+    one prefix query per SLUG_LOOKUP_BATCH distinct names, not one per row.
+    """
+    bases = [slugify(name)[:SLUG_BASE_LENGTH].strip('-') or 'urun' for name in names]
+    prefixes = sorted(set(bases))
+    taken = set()
+    for start in range(0, len(prefixes), SLUG_LOOKUP_BATCH):
+        query = Q()
+        for prefix in prefixes[start:start + SLUG_LOOKUP_BATCH]:
+            query |= Q(slug__startswith=prefix)
+        taken.update(Product.objects.filter(query).values_list('slug', flat=True))
+
+    slugs = []
+    for base in bases:
+        slug, suffix = base, 2
+        while slug in taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class CatalogImport:
+    """Imports the rows of one file for one seller, chunk by chunk, and collects the outcome."""
+
+    def __init__(self, seller, reference='import'):
+        self.seller = seller
+        self.reference = reference # InventoryMovement.reference of the stock changes
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.products = {} # product name in the file -> product id
+        self.seen_skus = set()
+        self.total_rows = self.created = self.updated = self.error_count = 0
+        self.errors = []
+
+    def error(self, line, sku, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'sku': sku, 'errors': errors})
+
+    def run(self, rows):
+        """Import (line, data, parse error) rows as given by read_rows(). Returns self."""
+        try:
+            for chunk in _chunks(rows):
+                self.import_chunk(chunk)
+        finally:
+            if self.created or self.updated:
+                invalidate_catalog(PRODUCTS)
+            self.errors.sort(key=lambda entry: entry['line'] or 0)
+        return self
+
+    def validate(self, chunk):
+        """The valid rows of a chunk as (line, validated data); the others are reported."""
+        serializer = ProductImportRowSerializer()
+        valid = []
+        for line, data, problem in chunk:
+            self.total_rows += 1
+            if problem:
+                self.error(line, None, {'non_field_errors': [problem]})
+                continue
+            try:
+                row = serializer.run_validation(data)
+            except serializers.ValidationError as exc:
+                self.error(line, data.get('sku'), _plain(exc.detail))
+                continue
+            if 'category' in row and row['category'] not in self.categories:
+                self.error(line, row['sku'], {'category': ['Unknown category']})
+                continue
+            if row['sku'] in self.seen_skus:
+                self.error(line, row['sku'], {'sku': ['Duplicate SKU in this file']})
+                continue
+            self.seen_skus.add(row['sku'])
+            valid.append((line, row))
+        return valid
+
+    def import_chunk(self, chunk):
+        rows = self.validate(chunk)
+        if not rows:
+            return
+        try:
+            with transaction.atomic():
+                created, updated, rejected, products = self.upsert(rows)
+        except DatabaseError as exc:
+            for line, row in rows:
+                self.error(line, row['sku'], {'non_field_errors': [f'Not saved: {exc}']})
+            return
+        self.created += created
+        self.updated += updated
+        self.products = products
+        for line, row in rejected:
+            self.error(line, row['sku'], {'sku': ['This SKU belongs to another seller']})
+
+    def upsert(self, rows):
+        """Write one chunk of valid rows. Returns (created, updated, rejected rows, product map)."""
+        now = timezone.now()
+        existing = {
+            sku: (variant_id, product_id, seller_id)
+            for sku, variant_id, product_id, seller_id in ProductVariant.objects.filter(
+                sku__in=[row['sku'] for _, row in rows]
+            ).values_list('sku', 'id', 'product_id', 'product__seller_id')
+        }
+        rejected = [(line, row) for line, row in rows if row['sku'] in existing and existing[row['sku']][2] != self.seller.pk]
+        rows = [row for line, row in rows if row['sku'] not in existing or existing[row['sku']][2] == self.seller.pk]
+
+        # Pending shard stock is folded in first, so an adjustment is measured against the available stock
+        variant_ids = [existing[row['sku']][0] for row in rows if row['sku'] in existing]
+        fold_stock_shards(variant_ids)
+        variants = ProductVariant.objects.in_bulk(variant_ids)
+
+        products = dict(self.products)
+        for row in rows:
+            if row['sku'] in existing:
+                products.setdefault(row['product'], existing[row['sku']][1])
+        unseen = {row['product'] for row in rows if row['product'] not in products}
+        for name, pk in Product.objects.filter(seller=self.seller, name__in=unseen).order_by('id').values_list('name', 'id'):
+            products.setdefault(name, pk) # The oldest, should the seller have two of that name
+        product_rows = {} # existing product id -> its last row
+        new_products = {} # product name -> its last row
+        for row in rows:
+            if row['sku'] in existing:
+                product_rows[existing[row['sku']][1]] = row
+            elif row['product'] in products:
+                product_rows[products[row['product']]] = row
+            else:
+                new_products[row['product']] = row
+
+        changed = []
+        counts = Counter() # Active products per category, see products/categories.py
+        for product in Product.objects.filter(pk__in=product_rows):
+            row = product_rows[product.pk]
+            counts[counted_category(product.status, product.category_id)] -= 1
+            product.name = row['product']
+            if 'description' in row:
+                product.description = row['description']
+            if 'category' in row:
+                product.category_id = self.categories[row['category']]
+            product.updated_at = now
+            counts[counted_category(product.status, product.category_id)] += 1
+            changed.append(product)
+        Product.objects.bulk_update(changed, ['name', 'description', 'category', 'updated_at'])
+
+        slugs = unique_slugs(list(new_products))
+        Product.objects.bulk_create([
+            Product(
+                seller=self.seller, name=name, slug=slug, status=Product.Status.ACTIVE,
+                description=row.get('description', ''), category_id=self.categories.get(row.get('category')),
+            )
+            for (name, row), slug in zip(new_products.items(), slugs)
+        ])
+        created_ids = dict(Product.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        counts.update(self.categories.get(row.get('category')) for row in new_products.values())
+        adjust_product_counts(counts)
+        products.update((name, created_ids[slug]) for name, slug in zip(new_products, slugs))
+
+        updated, new_variants, movements = [], [], []
+        for row in rows:
+            if row['sku'] in existing:
+                variant = variants[existing[row['sku']][0]]
+                delta = row['stock'] - variant.stock_quantity if 'stock' in row else 0
+                if delta:
+                    movements.append((variant.pk, Kind.ADJUSTMENT, delta, self.reference))
+                variant.updated_at = now
+                updated.append(variant)
+            else:
+                variant = ProductVariant(product_id=products[row['product']], sku=row['sku'])
+                new_variants.append(variant)
+            for column, field in VARIANT_COLUMNS.items():
+                if column in row:
+                    setattr(variant, field, row[column])
+        ProductVariant.objects.bulk_update(updated, list(VARIANT_COLUMNS.values()) + ['updated_at'])
+        ProductVariant.objects.bulk_create(new_variants)
+
+        new_ids = dict(ProductVariant.objects.filter(sku__in=[v.sku for v in new_variants]).values_list('sku', 'id'))
+        movements += [(new_ids[v.sku], Kind.RESTOCK, v.stock_quantity, self.reference) for v in new_variants]
+        record_movements(movements)
+
+        product_ids = set(product_rows) | set(created_ids.values())
+        refresh_product_summaries(product_ids)
+        get_search_backend().index(Product.objects.filter(pk__in=product_ids).only('id', 'name', 'description'))
+        return len(new_variants), len(updated), rejected, products
+
+
+def run_import(job):
+    """Import the file of a ProductImport and store the outcome on it."""
+    ProductImport.objects.filter(pk=job.pk).update(status=ProductImport.Status.RUNNING)
+    catalog = CatalogImport(job.seller, reference=f'import:{job.pk}')
+    job.status = ProductImport.Status.DONE
+    try:
+        with job.file.open('rb') as file:
+            catalog.run(read_rows(file, job.file_format))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Chunks before the unreadable part are kept
+        job.status = ProductImport.Status.FAILED
+        catalog.error(None, None, {'file': [f'Unreadable {job.file_format} file: {exc}']})
+
+    job.total_rows = catalog.total_rows
+    job.created_count = catalog.created
+    job.updated_count = catalog.updated
+    job.error_count = catalog.error_count
+    job.errors = catalog.errors
+    job.finished_at = timezone.now()
+    job.save()
+    return job
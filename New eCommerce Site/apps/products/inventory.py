@@ -0,0 +1,173 @@
+# apps/products/inventory.py
+"""
+Stock bookkeeping.
+
+Available stock of a variant = ProductVariant.stock_quantity (the folded base)
++ the sum of its StockShard rows (recent additions). Every change is also
+appended to InventoryMovement, so the ledger total must match that number;
+compact_inventory() checks it.
+
+- Decrements (reservations, sales, negative adjustments) go to the variant row
+  with a conditional UPDATE, they need the stock check.
+- Additions (releases, restocks) go to one randomly picked shard row, so a
+  wave of cancellations does not queue behind checkouts on the hot variant row.
+- Shards are folded back into the variant row by reservations that come up
+  short and by the periodic compaction job.
+"""
+import random
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, F, Max, Sum, Value, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import ProductVariant, InventoryMovement, InventorySnapshot, StockShard
+from .summary import refresh_product_summaries
+
+Kind = InventoryMovement.Kind
+BATCH_SIZE = 500 # Ids per IN (...) in the compaction job
+
+def _batches(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+def shard_count():
+    return getattr(settings, 'INVENTORY_STOCK_SHARDS', 8)
+
+def _add_case(quantities, field):
+    return F(field) + Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+
+def record_movements(movements):
+    """Append (variant_id, kind, quantity, reference) tuples to the ledger with one INSERT."""
+    InventoryMovement.objects.bulk_create([
+        InventoryMovement(variant_id=variant_id, kind=kind, quantity=quantity, reference=reference)
+        for variant_id, kind, quantity, reference in movements if quantity
+    ])
+
+def add_stock(movements):
+    """
+    Put stock back: movements are (variant_id, kind, quantity, reference) with quantity > 0.
+    One ledger INSERT, one shard upsert and one shard UPDATE, whatever the number
+    of variants, then the product summaries are refreshed.
+    Returns { variant_id: added quantity }.
+    """
+    added = {}
+    for variant_id, kind, quantity, reference in movements:
+        added[variant_id] = added.get(variant_id, 0) + quantity
+    added = {vid: qty for vid, qty in added.items() if qty}
+    if not added:
+        return added
+
+    with transaction.atomic():
+        record_movements(movements)
+        shard = random.randrange(shard_count())
+        StockShard.objects.bulk_create(
+            [StockShard(variant_id=vid, shard=shard) for vid in added],
+            ignore_conflicts=True,
+        )
+        shard_ids = dict(
+            StockShard.objects.filter(variant_id__in=added, shard=shard).values_list('id', 'variant_id')
+        )
+        StockShard.objects.filter(pk__in=shard_ids).update(
+            quantity=_add_case({sid: added[vid] for sid, vid in shard_ids.items()}, 'quantity'),
+        )
+        refresh_product_summaries(ProductVariant.objects.filter(pk__in=added).values_list('product_id', flat=True))
+    return added
+
+def fold_stock_shards(variant_ids):
+    """
+    Move pending shard quantities into ProductVariant.stock_quantity.
+    Locks the variants (id order, same as reserve_stock) before the shards.
+    Returns { variant_id: folded quantity }.
+    """
+    with transaction.atomic():
+        list(ProductVariant.objects.select_for_update().filter(pk__in=variant_ids).order_by('id').values_list('id'))
+        rows = list(
+            StockShard.objects.select_for_update().filter(variant_id__in=variant_ids)
+            .exclude(quantity=0).values_list('id', 'variant_id', 'quantity')
+        )
+        if not rows:
+            return {}
+
+        folded = {}
+        for _, variant_id, quantity in rows:
+            folded[variant_id] = folded.get(variant_id, 0) + quantity
+        StockShard.objects.filter(pk__in=[row[0] for row in rows]).update(quantity=0)
+        ProductVariant.objects.filter(pk__in=folded).update(stock_quantity=_add_case(folded, 'stock_quantity'))
+    return folded
+
+def _scoped(queryset, variant_ids, field='variant_id'):
+    return queryset if variant_ids is None else queryset.filter(**{f'{field}__in': variant_ids})
+
+def available_stock(variant_ids=None):
+    """Fast read: folded base + pending shards, two indexed queries. { variant_id: quantity }"""
+    stock = dict(_scoped(ProductVariant.objects.all(), variant_ids, 'pk').values_list('id', 'stock_quantity'))
+    pending = (
+        _scoped(StockShard.objects.all(), variant_ids).values('variant_id')
+        .annotate(total=Sum('quantity')).values_list('variant_id', 'total')
+    )
+    for variant_id, total in pending:
+        stock[variant_id] += total
+    return stock
+
+def _movements_after_snapshot():
+    snapshot = InventorySnapshot.objects.filter(variant=OuterRef('variant_id'))
+    return InventoryMovement.objects.filter(id__gt=Coalesce(Subquery(snapshot.values('last_movement_id')[:1]), 0))
+
+def ledger_stock(variant_ids=None):
+    """
+    Audit read: snapshot + movements after it. { variant_id: quantity }
+    Only reads the tail of the ledger, compaction keeps it short.
+    """
+    stock = dict.fromkeys(_scoped(ProductVariant.objects.all(), variant_ids, 'pk').values_list('id', flat=True), 0)
+    stock.update(_scoped(InventorySnapshot.objects.all(), variant_ids).values_list('variant_id', 'quantity'))
+    deltas = (
+        _scoped(_movements_after_snapshot(), variant_ids)
+        .values('variant_id').annotate(total=Sum('quantity')).values_list('variant_id', 'total')
+    )
+    for variant_id, total in deltas:
+        stock[variant_id] += total
+    return stock
+
+def compact_inventory():
+    """
+    Periodic job (see the compact_inventory command):
+    1. Fold every pending shard into its variant row.
+    2. Roll each snapshot forward over the movements appended since it was taken.
+    3. Compare ledger and counters; returns the stats and the drifting variants.
+    Drift can show up transiently while orders are being placed; a variant
+    that drifts on consecutive runs has a real bookkeeping error.
+    """
+    pending = set(StockShard.objects.exclude(quantity=0).values_list('variant_id', flat=True))
+    folded = {}
+    for batch in _batches(pending):
+        folded.update(fold_stock_shards(batch))
+
+    with transaction.atomic():
+        upto = InventoryMovement.objects.aggregate(last=Max('id'))['last'] or 0
+        deltas = dict(
+            _movements_after_snapshot().filter(id__lte=upto)
+            .values('variant_id').annotate(total=Sum('quantity')).values_list('variant_id', 'total')
+        )
+        existing = {
+            s.variant_id: s for batch in _batches(deltas)
+            for s in InventorySnapshot.objects.filter(variant_id__in=batch)
+        }
+        now = timezone.now()
+        for snap in existing.values():
+            snap.quantity += deltas[snap.variant_id]
+            snap.last_movement_id = upto
+            snap.updated_at = now # bulk_update skips auto_now
+        InventorySnapshot.objects.bulk_update(existing.values(), ['quantity', 'last_movement_id', 'updated_at'], batch_size=BATCH_SIZE)
+        InventorySnapshot.objects.bulk_create([
+            InventorySnapshot(variant_id=vid, quantity=total, last_movement_id=upto)
+            for vid, total in deltas.items() if vid not in existing
+        ], batch_size=BATCH_SIZE)
+
+    ledger = ledger_stock()
+    counters = available_stock()
+    drift = {vid: {'ledger': ledger[vid], 'stock': counters[vid]} for vid in ledger if ledger[vid] != counters[vid]}
+    return {'folded_variants': len(folded), 'snapshots': len(deltas), 'drift': drift}
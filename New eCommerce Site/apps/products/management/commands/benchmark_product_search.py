@@ -0,0 +1,85 @@
+import random
+import sqlite3
+import time
+from django.core.management.base import BaseCommand
+from apps.products.search import SQLiteFTSBackend, fold_turkish
+
+
+WORDS = [
+    'akıllı', 'telefon', 'kulaklık', 'kablosuz', 'laptop', 'şarj', 'aleti', 'saat', 'çanta', 'deri',
+    'ceket', 'ayakkabı', 'spor', 'kahve', 'makinesi', 'nemlendirici', 'krem', 'İnce', 'Işıklı', 'lamba',
+    'masa', 'sandalye', 'oyuncak', 'kitap', 'defter', 'kalem', 'gömlek', 'pantolon', 'çorap', 'şapka',
+]
+QUERIES = ['telefon', 'çanta deri', 'kabl', 'ışık', 'kahve makinesi', 'marka17', 'model12']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the old icontains (LIKE) product search with the FTS5 index '
+        'on synthetic catalogs. Runs on a throwaway in-memory SQLite database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        self.stdout.write(f"{'products':>10} {'query':<16} {'LIKE ms':>10} {'FTS ms':>10}")
+
+        for size in options['sizes']:
+            db = self.build_catalog(size, rng)
+            for query in QUERIES:
+                like_ms = self.time_query(db, *self.like_query(query), options['repeat'])
+                fts_ms = self.time_query(db, *self.fts_query(query), options['repeat'])
+                self.stdout.write(f'{size:>10} {query:<16} {like_ms:>10.2f} {fts_ms:>10.2f}')
+            db.close()
+
+    def build_catalog(self, size, rng):
+        db = sqlite3.connect(':memory:')
+        db.execute('CREATE TABLE products_product (id INTEGER PRIMARY KEY, name TEXT, description TEXT)')
+        db.execute(SQLiteFTSBackend.CREATE_SQL)
+
+        # Brand/model tokens give a realistic long-tail vocabulary next to the common words
+        brands = [f'marka{i}' for i in range(2_000)]
+        models_ = [f'model{i}' for i in range(20_000)]
+
+        def rows():
+            for pk in range(1, size + 1):
+                name = ' '.join([rng.choice(brands), rng.choice(WORDS), rng.choice(models_)])
+                description = ' '.join(rng.choices(WORDS, k=4) + rng.choices(models_, k=12))
+                yield pk, name, description
+
+        for pk, name, description in rows():
+            db.execute('INSERT INTO products_product VALUES (?, ?, ?)', (pk, name, description))
+            db.execute(
+                'INSERT INTO products_search (rowid, name, description) VALUES (?, ?, ?)',
+                (pk, fold_turkish(name), fold_turkish(description)),
+            )
+        db.commit()
+        return db
+
+    def like_query(self, query):
+        # Same shape as SearchFilter's icontains: every term in name OR description
+        clauses, params = [], []
+        for term in query.split():
+            clauses.append('(name LIKE ? OR description LIKE ?)')
+            params += [f'%{term}%', f'%{term}%']
+        sql = f"SELECT id FROM products_product WHERE {' AND '.join(clauses)} ORDER BY id DESC"
+        return sql, params
+
+    def fts_query(self, query):
+        sql = (
+            'SELECT rowid FROM products_search WHERE products_search MATCH ? '
+            'ORDER BY bm25(products_search, 10.0, 1.0) LIMIT 500'
+        )
+        return sql, [SQLiteFTSBackend.build_match(query)]
+
+    def time_query(self, db, sql, params, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.execute(sql, params).fetchall()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.products.inventory import compact_inventory
+
+
+class Command(BaseCommand):
+    help = 'Fold stock shards into variants, roll inventory snapshots forward and report ledger drift (run periodically, e.g. every few minutes from cron)'
+
+    def handle(self, *args, **options):
+        stats = compact_inventory()
+        self.stdout.write(
+            f"{stats['folded_variants']} variants folded, {stats['snapshots']} snapshots rolled forward."
+        )
+        if stats['drift']:
+            for variant_id, values in sorted(stats['drift'].items()):
+                self.stdout.write(self.style.WARNING(
+                    f"Variant {variant_id}: ledger {values['ledger']} != stock {values['stock']}"
+                ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Inventory ledger matches stock.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.products.models import Category, ProductImage
+from apps.products.renditions import needs_renditions, update_renditions
+from apps.products.tasks import render_image
+
+
+class Command(BaseCommand):
+    help = 'Queue (or with --inline, render now) the WebP/JPEG renditions of product and category images that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inline', action='store_true', help='Render in this process instead of queueing tasks')
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in (ProductImage, Category):
+            for instance in model.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'renditions').iterator():
+                if not needs_renditions(instance):
+                    continue
+                if options['inline']:
+                    update_renditions(model, instance.pk)
+                else:
+                    render_image.delay(model._meta.label, instance.pk)
+                count += 1
+        action = 'rendered' if options['inline'] else 'queued'
+        self.stdout.write(self.style.SUCCESS(f'{count} images {action}.'))
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apps.products.imports import CatalogImport, read_rows
+from apps.products.models import ProductImport
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV or JSON Lines catalog file for a seller, upserting products and variants by SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv or .jsonl file, one row per variant')
+        parser.add_argument('--seller', required=True, help='Email of the seller the products belong to')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (options['format'] or ('jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv')).upper()
+        try:
+            seller = get_user_model().objects.get(email=options['seller'], role='SELLER')
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No seller with email {options['seller']}")
+
+        with open(path, 'rb') as file:
+            catalog = CatalogImport(seller, reference='import:command').run(read_rows(file, ProductImport.Format(file_format)))
+
+        for entry in catalog.errors:
+            self.stdout.write(self.style.WARNING(f"line {entry['line']} ({entry['sku']}): {entry['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f'{catalog.total_rows} rows: {catalog.created} variants created, {catalog.updated} updated, {catalog.error_count} rejected.'
+        ))
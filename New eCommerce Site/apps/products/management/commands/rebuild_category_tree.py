@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.products.categories import rebuild_tree
+
+
+class Command(BaseCommand):
+    help = 'Recompute category paths, depths and active product counts from the parent links and the products'
+
+    def handle(self, *args, **options):
+        fixed = rebuild_tree()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} categories corrected.'))
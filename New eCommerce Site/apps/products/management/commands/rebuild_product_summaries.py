@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.products.models import Product
+from apps.products.summary import refresh_product_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized price/stock/main-image summaries for all products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(ids), batch_size):
+            refresh_product_summaries(ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} product summaries rebuilt.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.products.models import Product
+from apps.products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.clear()
+
+        batch, total = [], 0
+        for product in Product.objects.only('id', 'name', 'description').iterator(chunk_size=options['batch_size']):
+            batch.append(product)
+            if len(batch) >= options['batch_size']:
+                backend.index(batch)
+                total += len(batch)
+                batch = []
+        backend.index(batch)
+        total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'{total} products indexed with {type(backend).__name__}.'))
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_category_image_alter_category_icon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='en düşük fiyat'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='en yüksek fiyat'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='total_stock',
+            field=models.IntegerField(default=0, verbose_name='toplam stok'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variant_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='varyasyon sayısı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_image',
+            field=models.CharField(blank=True, max_length=255, verbose_name='ana görsel yolu'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from apps.products.search import SQLiteFTSBackend, fold_turkish
+    Product = apps.get_model('products', 'Product')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(SQLiteFTSBackend.CREATE_SQL)
+        rows = [
+            (pk, fold_turkish(name), fold_turkish(description))
+            for pk, name, description in Product.objects.values_list('id', 'name', 'description').iterator()
+        ]
+        cursor.executemany('INSERT INTO products_search (rowid, name, description) VALUES (%s, %s, %s)', rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from apps.products.search import SQLiteFTSBackend
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(SQLiteFTSBackend.DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_summary_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_totals(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    rows = (
+        Review.objects.filter(status='PUBLISHED')
+        .values('product_id')
+        .annotate(
+            total=Sum('rating'),
+            **{f'c{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+        )
+    )
+    for row in rows:
+        Product.objects.filter(pk=row['product_id']).update(
+            rating_sum=row['total'],
+            **{f'rating_count_{star}': row[f'c{star}'] for star in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_products_search_index'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='puan toplamı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0, verbose_name='1 yıldız sayısı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0, verbose_name='2 yıldız sayısı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0, verbose_name='3 yıldız sayısı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0, verbose_name='4 yıldız sayısı'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0, verbose_name='5 yıldız sayısı'),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_existing_stock(apps, schema_editor):
+    """Current stock becomes the opening snapshot, so the ledger starts in balance."""
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    InventorySnapshot = apps.get_model('products', 'InventorySnapshot')
+    InventorySnapshot.objects.bulk_create([
+        InventorySnapshot(variant_id=variant_id, quantity=stock, last_movement_id=0)
+        for variant_id, stock in ProductVariant.objects.values_list('id', 'stock_quantity').iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_rating_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0, verbose_name='miktar')),
+                ('last_movement_id', models.BigIntegerField(default=0, verbose_name='son hareket')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='güncellenme tarihi')),
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshot', to='products.productvariant', verbose_name='varyasyon')),
+            ],
+            options={
+                'verbose_name': 'Stok Anlık Görüntüsü',
+                'verbose_name_plural': 'Stok Anlık Görüntüleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('RESERVATION', 'Rezervasyon'), ('SALE', 'Satış'), ('RELEASE', 'Serbest Bırakma'), ('RESTOCK', 'Stok Girişi'), ('ADJUSTMENT', 'Manuel Düzeltme')], max_length=20, verbose_name='hareket türü')),
+                ('quantity', models.IntegerField(verbose_name='miktar')),
+                ('reference', models.CharField(blank=True, help_text='ör. seller_order:5, variant:save', max_length=100, verbose_name='referans')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_movements', to='products.productvariant', verbose_name='varyasyon')),
+            ],
+            options={
+                'verbose_name': 'Stok Hareketi',
+                'verbose_name_plural': 'Stok Hareketleri',
+                'indexes': [models.Index(fields=['variant', 'id'], name='inventory_variant_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='parça')),
+                ('quantity', models.IntegerField(default=0, verbose_name='miktar')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='products.productvariant', verbose_name='varyasyon')),
+            ],
+            options={
+                'verbose_name': 'Stok Sayaç Parçası',
+                'verbose_name_plural': 'Stok Sayaç Parçaları',
+                'unique_together': {('variant', 'shard')},
+            },
+        ),
+        migrations.RunPython(snapshot_existing_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_inventory_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='dosya')),
+                ('file_format', models.CharField(choices=[('CSV', 'CSV'), ('JSONL', 'JSON Lines')], max_length=5, verbose_name='dosya biçimi')),
+                ('status', models.CharField(choices=[('QUEUED', 'Sırada'), ('RUNNING', 'Çalışıyor'), ('DONE', 'Tamamlandı'), ('FAILED', 'Başarısız')], default='QUEUED', max_length=10, verbose_name='durum')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='satır sayısı')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='eklenen varyasyon')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='güncellenen varyasyon')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='hatalı satır')),
+                ('errors', models.JSONField(blank=True, default=list, help_text="ör. [{'line': 3, 'sku': 'A1', 'errors': {...}}]", verbose_name='satır hataları')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='bitiş tarihi')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_imports', to=settings.AUTH_USER_MODEL, verbose_name='satıcı')),
+            ],
+            options={
+                'verbose_name': 'Ürün İçe Aktarımı',
+                'verbose_name_plural': 'Ürün İçe Aktarımları',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='görsel boyutları'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_image_renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='ana görsel boyutları'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='görsel boyutları'),
+        ),
+    ]
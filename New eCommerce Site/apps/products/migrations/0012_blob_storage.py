@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import apps.blobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.blobs.storage.blob_storage, upload_to='categories/', verbose_name='ikon görseli'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=apps.blobs.storage.blob_storage, upload_to='products/', verbose_name='görsel'),
+        ),
+    ]
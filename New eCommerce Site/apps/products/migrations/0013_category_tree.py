@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_category_tree(apps, schema_editor):
+    # Every existing category is a root
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    counts = dict(
+        Product.objects.filter(status='ACTIVE', category__isnull=False)
+        .values('category').annotate(total=Count('id')).values_list('category', 'total')
+    )
+    for pk in Category.objects.values_list('pk', flat=True):
+        Category.objects.filter(pk=pk).update(path=f'{pk}/', product_count=counts.get(pk, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='derinlik'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='products.category', verbose_name='üst kategori'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='yol'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='aktif ürün sayısı'),
+        ),
+        migrations.RunPython(backfill_category_tree, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+from django.db import migrations
+
+
+def refold_search_index(apps, schema_editor):
+    # fold_turkish now maps every Turkish i to 'i': index the stored text again
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from apps.products.search import fold_turkish
+    Product = apps.get_model('products', 'Product')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DELETE FROM products_search')
+        rows = [
+            (pk, fold_turkish(name), fold_turkish(description))
+            for pk, name, description in Product.objects.values_list('id', 'name', 'description').iterator()
+        ]
+        cursor.executemany('INSERT INTO products_search (rowid, name, description) VALUES (%s, %s, %s)', rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_category_tree'),
+    ]
+
+    operations = [
+        migrations.RunPython(refold_search_index, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,26 @@
 # products/models.py
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.accounts.models import User
+from apps.blobs.storage import blob_storage
 
 class Category(models.Model):
     name = models.CharField(_('kategori adı'), max_length=100)
     slug = models.SlugField(_('slug'), unique=True)
     icon = models.CharField(_('ikon (emoji)'), max_length=50, help_text="Emoji", blank=True)
-    image = models.ImageField(_('ikon görseli'), upload_to='categories/', null=True, blank=True)
+    image = models.ImageField(_('ikon görseli'), upload_to='categories/', storage=blob_storage, null=True, blank=True)
+    # Resized copies of image, written by products/renditions.py
+    renditions = models.JSONField(_('görsel boyutları'), default=dict, blank=True)
     order = models.PositiveIntegerField(_('sıralama'), default=0)
+
+    # Tree (products/categories.py): path is the ids from the root down to this
+    # category, '3/17/42/'; a subtree is every row whose path starts with it (an index range)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name='children', verbose_name=_('üst kategori'))
+    path = models.CharField(_('yol'), max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(_('derinlik'), default=0, editable=False)
+    # ACTIVE products in this category and all categories under it
+    product_count = models.PositiveIntegerField(_('aktif ürün sayısı'), default=0, editable=False)
     
     class Meta:
         verbose_name = _('Kategori')
@@ -18,6 +30,10 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if self.parent_id and self.pk and str(self.pk) in self.parent.path.split('/'):
+            raise ValidationError({'parent': _('Bir kategori kendi alt kategorisine taşınamaz.')})
+
 class Product(models.Model):
     class Status(models.TextChoices):
         DRAFT = 'DRAFT', _('Taslak')
@@ -46,6 +62,21 @@ class Product(models.Model):
     # Rating/Score
     average_rating = models.DecimalField(_('ortalama puan'), max_digits=3, decimal_places=2, default=0.00)
     review_count = models.PositiveIntegerField(_('değerlendirme sayısı'), default=0)
+    # Running totals of published reviews, maintained with deltas (see reviews/ratings.py)
+    rating_sum = models.PositiveIntegerField(_('puan toplamı'), default=0)
+    rating_count_1 = models.PositiveIntegerField(_('1 yıldız sayısı'), default=0)
+    rating_count_2 = models.PositiveIntegerField(_('2 yıldız sayısı'), default=0)
+    rating_count_3 = models.PositiveIntegerField(_('3 yıldız sayısı'), default=0)
+    rating_count_4 = models.PositiveIntegerField(_('4 yıldız sayısı'), default=0)
+    rating_count_5 = models.PositiveIntegerField(_('5 yıldız sayısı'), default=0)
+
+    # Catalog summary (denormalized from variants/images, see products/summary.py)
+    min_price = models.DecimalField(_('en düşük fiyat'), max_digits=12, decimal_places=2, default=0)
+    max_price = models.DecimalField(_('en yüksek fiyat'), max_digits=12, decimal_places=2, default=0)
+    total_stock = models.IntegerField(_('toplam stok'), default=0)
+    variant_count = models.PositiveIntegerField(_('varyasyon sayısı'), default=0)
+    main_image = models.CharField(_('ana görsel yolu'), max_length=255, blank=True)
+    main_image_renditions = models.JSONField(_('ana görsel boyutları'), default=dict, blank=True)
 
     created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
     updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
@@ -59,8 +90,10 @@ class Product(models.Model):
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images', verbose_name=_('ürün'))
-    image = models.ImageField(_('görsel'), upload_to='products/')
+    image = models.ImageField(_('görsel'), upload_to='products/', storage=blob_storage)
     is_main = models.BooleanField(_('ana görsel mi'), default=False)
+    # Resized copies of image, written by products/renditions.py
+    renditions = models.JSONField(_('görsel boyutları'), default=dict, blank=True)
     
     class Meta:
         verbose_name = _('Ürün Görseli')
@@ -105,3 +138,97 @@ class BundleItem(models.Model):
 
     def __str__(self):
         return f"{self.quantity}x {self.variant.sku} in {self.bundle_product.name}"
+
+class InventoryMovement(models.Model):
+    """
+    Append-only stock ledger. quantity is the signed effect on available stock;
+    the sum of a variant's movements always equals its available stock
+    (see products/inventory.py).
+    """
+    class Kind(models.TextChoices):
+        RESERVATION = 'RESERVATION', _('Rezervasyon')
+        SALE = 'SALE', _('Satış')
+        RELEASE = 'RELEASE', _('Serbest Bırakma')
+        RESTOCK = 'RESTOCK', _('Stok Girişi')
+        ADJUSTMENT = 'ADJUSTMENT', _('Manuel Düzeltme')
+
+    id = models.BigAutoField(primary_key=True)
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='inventory_movements', verbose_name=_('varyasyon'))
+    kind = models.CharField(_('hareket türü'), max_length=20, choices=Kind.choices)
+    quantity = models.IntegerField(_('miktar'))
+    reference = models.CharField(_('referans'), max_length=100, blank=True, help_text=_("ör. seller_order:5, variant:save"))
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Deltas after a snapshot: WHERE variant_id = ? AND id > ?
+            models.Index(fields=['variant', 'id'], name='inventory_variant_id_idx'),
+        ]
+        verbose_name = _('Stok Hareketi')
+        verbose_name_plural = _('Stok Hareketleri')
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity:+d} {self.variant_id}"
+
+class InventorySnapshot(models.Model):
+    """Ledger total of a variant up to last_movement_id, rolled forward by compact_inventory."""
+    variant = models.OneToOneField(ProductVariant, on_delete=models.CASCADE, related_name='inventory_snapshot', verbose_name=_('varyasyon'))
+    quantity = models.IntegerField(_('miktar'), default=0)
+    last_movement_id = models.BigIntegerField(_('son hareket'), default=0)
+    updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Stok Anlık Görüntüsü')
+        verbose_name_plural = _('Stok Anlık Görüntüleri')
+
+class StockShard(models.Model):
+    """
+    Sharded counter of stock added back (releases, restocks) but not yet
+    folded into ProductVariant.stock_quantity. Writers pick a random shard
+    so they never queue behind checkouts on the variant row.
+    """
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='stock_shards', verbose_name=_('varyasyon'))
+    shard = models.PositiveSmallIntegerField(_('parça'))
+    quantity = models.IntegerField(_('miktar'), default=0)
+
+    class Meta:
+        unique_together = ('variant', 'shard')
+        verbose_name = _('Stok Sayaç Parçası')
+        verbose_name_plural = _('Stok Sayaç Parçaları')
+
+class ProductImport(models.Model):
+    """
+    A seller's bulk catalog upload (CSV or JSON Lines, one row per variant),
+    applied by products/imports.py. Small files are imported during the
+    request, bigger ones by the task queue; errors keeps the rejected rows.
+    """
+    class Format(models.TextChoices):
+        CSV = 'CSV', _('CSV')
+        JSONL = 'JSONL', _('JSON Lines')
+
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', _('Sırada')
+        RUNNING = 'RUNNING', _('Çalışıyor')
+        DONE = 'DONE', _('Tamamlandı')
+        FAILED = 'FAILED', _('Başarısız')
+
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='product_imports', verbose_name=_('satıcı'))
+    file = models.FileField(_('dosya'), upload_to='imports/')
+    file_format = models.CharField(_('dosya biçimi'), max_length=5, choices=Format.choices)
+    status = models.CharField(_('durum'), max_length=10, choices=Status.choices, default=Status.QUEUED)
+
+    total_rows = models.PositiveIntegerField(_('satır sayısı'), default=0)
+    created_count = models.PositiveIntegerField(_('eklenen varyasyon'), default=0)
+    updated_count = models.PositiveIntegerField(_('güncellenen varyasyon'), default=0)
+    error_count = models.PositiveIntegerField(_('hatalı satır'), default=0)
+    errors = models.JSONField(_('satır hataları'), default=list, blank=True, help_text=_("ör. [{'line': 3, 'sku': 'A1', 'errors': {...}}]"))
+
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('bitiş tarihi'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Ürün İçe Aktarımı')
+        verbose_name_plural = _('Ürün İçe Aktarımları')
+
+    def __str__(self):
+        return f"{self.file_format} import {self.pk} ({self.status})"
@@ -0,0 +1,120 @@
+# apps/products/renditions.py
+"""
+Resized, re-encoded copies (renditions) of product and category images.
+
+Uploads are stored as they come; saving the row queues render_image
+(products/signals.py) and a task worker renders every width of
+IMAGE_RENDITION_WIDTHS as WebP and JPEG. Decoding and encoding are CPU
+bound, so they run in a process pool (IMAGE_RENDITION_PROCESSES) rather
+than in the worker process itself.
+
+Files are named after the SHA-256 of the original, so the content behind a
+URL never changes and may be cached for a year; uploading the same picture
+again reuses the files already rendered. The row keeps the map
+
+    {'source': image name, 'width': .., 'height': .., 'webp': {'320': name, ...}, 'jpeg': {...}}
+
+which srcsets() turns into srcset strings for the API. A map whose source
+is not the current image is stale and served as {} until rewritten.
+"""
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from . import imaging
+from .models import ProductImage
+from .summary import refresh_product_summaries
+from .cache import invalidate_catalog, PRODUCTS, CATEGORIES
+
+RENDITION_FORMATS = ('webp', 'jpeg')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_pool = None
+
+def rendition_widths():
+    return getattr(settings, 'IMAGE_RENDITION_WIDTHS', (160, 320, 640, 1280))
+
+def _executor():
+    """The process pool of this worker, started on first use. None renders in-process."""
+    global _pool
+    processes = getattr(settings, 'IMAGE_RENDITION_PROCESSES', 2)
+    if processes < 1:
+        return None
+    if _pool is None:
+        # Spawned, not forked: the parent holds database connections and may run threads
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _render_all(data, widths):
+    """[{ format: bytes }] for each width, one pool job per width."""
+    global _pool
+    pool = _executor()
+    if pool is None:
+        return [imaging.render(data, width, RENDITION_FORMATS) for width in widths]
+    try:
+        futures = [pool.submit(imaging.render, data, width, RENDITION_FORMATS) for width in widths]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A crashed child breaks the whole pool; the retry starts a new one
+        _pool = None
+        raise
+
+def build_renditions(field_file):
+    """Render and store the renditions of an image field's file. Returns the rendition map."""
+    with field_file.open('rb') as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    width, height = imaging.dimensions(data)
+    # Never upscale: widths above the original collapse into one at its own width
+    targets = sorted({min(target, width) for target in rendition_widths()})
+
+    renditions = {'source': field_file.name, 'width': width, 'height': height}
+    names = {
+        target: {fmt: f'renditions/{digest[:2]}/{digest[:32]}-{target}w.{EXTENSIONS[fmt]}' for fmt in RENDITION_FORMATS}
+        for target in targets
+    }
+    missing = [target for target in targets if not all(default_storage.exists(name) for name in names[target].values())]
+    for target, encoded in zip(missing, _render_all(data, missing)):
+        for fmt, content in encoded.items():
+            if not default_storage.exists(names[target][fmt]):
+                names[target][fmt] = default_storage.save(names[target][fmt], ContentFile(content))
+    for target in targets:
+        for fmt in RENDITION_FORMATS:
+            renditions.setdefault(fmt, {})[str(target)] = names[target][fmt]
+    return renditions
+
+def needs_renditions(instance):
+    return bool(instance.image) and instance.renditions.get('source') != instance.image.name
+
+def update_renditions(model, pk):
+    """Render the image of a ProductImage or Category row and store the map on it."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return None
+    renditions = build_renditions(instance.image)
+    # Skipped if the image was replaced meanwhile; the replacement queued its own task
+    if not model.objects.filter(pk=pk, image=instance.image.name).update(renditions=renditions):
+        return None
+    if model is ProductImage:
+        refresh_product_summaries([instance.product_id])
+    else:
+        invalidate_catalog(CATEGORIES, PRODUCTS)
+    return renditions
+
+def srcsets(renditions, source):
+    """
+    { 'webp': 'url 160w, url 320w, ...', 'jpeg': ... } for <source srcset> / <img srcset>,
+    or {} while the image `source` has no renditions yet.
+    """
+    if not renditions or not source or renditions.get('source') != source:
+        return {}
+    return {
+        fmt: ', '.join(
+            f'{default_storage.url(name)} {width}w'
+            for width, name in sorted((int(width), name) for width, name in renditions[fmt].items())
+        )
+        for fmt in RENDITION_FORMATS if renditions.get(fmt)
+    }
@@ -0,0 +1,121 @@
+# apps/products/search.py
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+def fold_turkish(text):
+    """
+    Lowercase with every Turkish i ('I', 'ı', 'İ', 'i') folded to 'i'.
+    The tokenizer's remove_diacritics leaves 'ı' alone, so keeping it would
+    make 'IPHONE' miss 'iPhone' and 'isik' miss 'ışık'. str.lower() alone
+    would turn 'İ' into 'i' + combining dot.
+    """
+    if not text:
+        return ''
+    return text.replace('İ', 'i').replace('I', 'i').replace('ı', 'i').lower()
+
+def tokenize_query(query):
+    return [term for term in fold_turkish(query).split() if term]
+
+
+class BaseSearchBackend:
+    """
+    Interface for product search indexes.
+    filter() narrows a Product queryset to the matches, annotated with
+    `search_rank` (lower is better), so the caller's own filters (status,
+    category, seller) and pagination apply within the same query.
+    """
+    def index(self, products):
+        raise NotImplementedError
+
+    def remove(self, product_ids):
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 inverted index over product name and description.
+    Text is Turkish-folded before it is stored and before it is queried;
+    the tokenizer also drops diacritics so 'canta' finds 'çanta'.
+    Every query term is a prefix match, results are ranked with bm25
+    and a match in the name weighs 10x a match in the description.
+    """
+    table = 'products_search'
+
+    CREATE_SQL = (
+        'CREATE VIRTUAL TABLE IF NOT EXISTS products_search '
+        'USING fts5(name, description, tokenize="unicode61 remove_diacritics 2")'
+    )
+    DROP_SQL = 'DROP TABLE IF EXISTS products_search'
+
+    def index(self, products):
+        rows = [(p.pk, fold_turkish(p.name), fold_turkish(p.description)) for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(r[0],) for r in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, name, description) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pid,) for pid in product_ids])
+
+    def filter(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return queryset.none()
+        product_table = queryset.model._meta.db_table
+        matches = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        rank = RawSQL(
+            f'SELECT bm25({self.table}, 10.0, 1.0) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND {self.table}.rowid = "{product_table}"."id"',
+            [match], output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    @staticmethod
+    def build_match(query):
+        # Quote every term so FTS operators typed by users are taken literally
+        terms = ['"{}"*'.format(term.replace('"', '""')) for term in tokenize_query(query)]
+        return ' '.join(terms)
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """
+    Fallback for databases without an FTS index: no index to maintain,
+    search is an icontains scan ordered by newest first.
+    """
+    def index(self, products):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def filter(self, queryset, query):
+        for term in query.split():
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset.annotate(search_rank=-F('id')) # Newest first
+
+    def clear(self):
+        pass
+
+
+def get_search_backend():
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return LikeSearchBackend()
@@ -1,17 +1,43 @@
 # apps/products/serializers.py
 from rest_framework import serializers
-from .models import Product, ProductVariant, BundleItem, ProductImage, Category
+from .models import Product, ProductVariant, BundleItem, ProductImage, Category, ProductImport
+from django.core.files.storage import default_storage
 from apps.accounts.serializers import SellerProfileSerializer
+from .renditions import srcsets
+
+# Maintained by products/summary.py and reviews/ratings.py, never written through the API
+PRODUCT_SUMMARY_FIELDS = [
+    'min_price', 'max_price', 'total_stock', 'variant_count', 'main_image', 'main_image_renditions',
+    'rating_sum', 'rating_count_1', 'rating_count_2', 'rating_count_3', 'rating_count_4', 'rating_count_5',
+]
+
+def product_image_url(product):
+    if product.main_image:
+        return default_storage.url(product.main_image)
+    return ""
+
+def image_srcsets(instance):
+    return srcsets(instance.renditions, instance.image.name if instance.image else None)
 
 class CategorySerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'icon', 'image', 'order']
+        fields = ['id', 'name', 'slug', 'icon', 'image', 'srcset', 'order', 'parent', 'depth', 'product_count']
+
+    def get_srcset(self, obj):
+        return image_srcsets(obj)
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_main']
+        fields = ['id', 'image', 'srcset', 'is_main']
+
+    def get_srcset(self, obj):
+        return image_srcsets(obj)
 
 class ProductVariantSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +45,19 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         exclude = ['created_at', 'updated_at']
         read_only_fields = ['product']
 
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        # Available stock includes quantities still pending on shard rows (see products/inventory.py)
+        if instance.pk:
+            rep['stock_quantity'] = instance.stock_quantity + sum(s.quantity for s in instance.stock_shards.all())
+        return rep
+
+    def update(self, instance, validated_data):
+        if 'stock_quantity' in validated_data:
+            # The client edits the available stock it was shown; the row holds it minus pending shards
+            validated_data['stock_quantity'] -= sum(s.quantity for s in instance.stock_shards.all())
+        return super().update(instance, validated_data)
+
 class BundleItemSerializer(serializers.ModelSerializer):
     variant_sku = serializers.CharField(source='variant.sku', read_only=True)
     
@@ -32,41 +71,36 @@ class ProductListSerializer(serializers.ModelSerializer):
     price_range = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     stock_quantity = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
-        fields = ['id', 'name', 'slug', 'seller_name', 'category', 'status', 'is_bundle', 'price_range', 'price', 'image', 'average_rating', 'review_count', 'stock_quantity']
+        fields = ['id', 'name', 'slug', 'seller_name', 'category', 'status', 'is_bundle', 'price_range', 'price', 'image', 'image_srcset', 'average_rating', 'review_count', 'stock_quantity']
         
     def get_price_range(self, obj):
-        variants = obj.variants.all()
-        if not variants:
+        # Read from the denormalized summary (see products/summary.py)
+        if not obj.variant_count:
             return "0.00"
-        prices = [v.price for v in variants]
-        if len(prices) == 1:
-            return str(prices[0])
-        return f"{min(prices)} - {max(prices)}"
+        if obj.variant_count == 1:
+            return str(obj.min_price)
+        return f"{obj.min_price} - {obj.max_price}"
 
     def get_price(self, obj):
-        variants = obj.variants.all()
-        if not variants:
+        if not obj.variant_count:
             return 0.00
-        return min([v.price for v in variants])
+        return obj.min_price
 
     def get_image(self, obj):
-        img = obj.images.filter(is_main=True).first()
-        if not img:
-            img = obj.images.first()
-        if img and img.image:
-            return img.image.url
-        return ""
+        return product_image_url(obj)
+
+    def get_image_srcset(self, obj):
+        # { 'webp': ..., 'jpeg': ... } srcset strings of the main image, {} until rendered
+        return srcsets(obj.main_image_renditions, obj.main_image)
 
     def get_stock_quantity(self, obj):
-        """Calculate total stock across all variants"""
-        variants = obj.variants.all()
-        if not variants:
-            return 0
-        return sum([v.stock_quantity for v in variants])
+        """Total stock across all variants"""
+        return obj.total_stock
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     variants = ProductVariantSerializer(many=True, read_only=True)
@@ -78,12 +112,12 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
-        read_only_fields = ['seller', 'slug', 'status', 'created_at', 'updated_at', 'average_rating', 'review_count']
+        read_only_fields = ['seller', 'slug', 'status', 'created_at', 'updated_at', 'average_rating', 'review_count'] + PRODUCT_SUMMARY_FIELDS
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        img = instance.images.filter(is_main=True).first() or instance.images.first()
-        rep['image'] = img.image.url if (img and img.image) else ""
+        rep['image'] = product_image_url(instance)
+        rep['image_srcset'] = srcsets(instance.main_image_renditions, instance.main_image)
         return rep
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -91,7 +125,7 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
-        exclude = ['seller', 'status', 'slug']
+        exclude = ['seller', 'status', 'slug'] + PRODUCT_SUMMARY_FIELDS
         
     def create(self, validated_data):
         variants_data = validated_data.pop('variants', [])
@@ -108,3 +142,38 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
             ProductVariant.objects.create(product=product, **variant_data)
             
         return product
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk import file (see products/imports.py): a variant and the product it belongs to.
+    Rows with the same product name in a file form one product; optional fields left out keep
+    the current value of an existing SKU.
+    """
+    sku = serializers.CharField(max_length=100)
+    product = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.SlugField(required=False) # Category slug
+    variant = serializers.CharField(max_length=255, required=False)
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    compare_at_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False, allow_null=True)
+    stock = serializers.IntegerField(min_value=0, required=False)
+    weight_g = serializers.IntegerField(min_value=0, required=False)
+    attributes = serializers.DictField(required=False)
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    EXTENSIONS = {'.csv': ProductImport.Format.CSV, '.jsonl': ProductImport.Format.JSONL, '.ndjson': ProductImport.Format.JSONL}
+
+    class Meta:
+        model = ProductImport
+        exclude = ['seller']
+        read_only_fields = ['status', 'total_rows', 'created_count', 'updated_count', 'error_count', 'errors', 'created_at', 'finished_at']
+        extra_kwargs = {'file_format': {'required': False}}
+
+    def validate(self, attrs):
+        if not attrs.get('file_format'):
+            name = attrs['file'].name.lower()
+            extension = name[name.rfind('.'):] if '.' in name else ''
+            if extension not in self.EXTENSIONS:
+                raise serializers.ValidationError({'file_format': 'Use a .csv or .jsonl file, or give file_format.'})
+            attrs['file_format'] = self.EXTENSIONS[extension]
+        return attrs
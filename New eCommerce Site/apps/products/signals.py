@@ -0,0 +1,135 @@
+from django.db.models.signals import pre_save, post_save, post_delete, post_init
+from collections import Counter
+from django.dispatch import receiver
+from .models import Product, ProductVariant, ProductImage, Category, InventoryMovement
+from .inventory import fold_stock_shards, record_movements
+from .summary import refresh_product_summaries
+from .search import get_search_backend
+from .cache import invalidate_catalog, PRODUCTS, CATEGORIES
+from apps.blobs.signals import media_moved
+from .renditions import needs_renditions
+from .tasks import render_image
+from .categories import adjust_product_counts, counted_category, place_category, remove_category, subtree
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def update_product_summary(sender, instance, **kwargs):
+    refresh_product_summaries([instance.product_id])
+
+@receiver(post_init, sender=ProductVariant)
+def remember_loaded_stock(sender, instance, **kwargs):
+    # The row's stock_quantity as loaded (shards not folded in), to tell edits from plain saves
+    instance._loaded_stock = instance.__dict__.get('stock_quantity')
+
+@receiver(pre_save, sender=ProductVariant)
+def measure_stock_adjustment(sender, instance, update_fields=None, **kwargs):
+    """
+    A stock_quantity changed through save() (seller form, admin) is a manual adjustment
+    of the amount it was changed by. Whatever else the save writes, the column is set to
+    the row's current value (after folding pending shards) plus that change, so a save
+    never drops shard stock or reservations made since the instance was loaded.
+    """
+    instance._stock_delta = 0
+    if instance._state.adding or 'stock_quantity' not in instance.__dict__ or instance._loaded_stock is None:
+        return
+    if update_fields is not None and 'stock_quantity' not in update_fields:
+        return
+    delta = instance.stock_quantity - instance._loaded_stock
+    if delta:
+        fold_stock_shards([instance.pk])
+    current = ProductVariant.objects.filter(pk=instance.pk).values_list('stock_quantity', flat=True).first()
+    if current is not None:
+        instance.stock_quantity = current + delta
+        instance._stock_delta = delta
+
+@receiver(post_save, sender=ProductVariant)
+def record_stock_adjustment(sender, instance, created, **kwargs):
+    if created:
+        record_movements([(instance.pk, InventoryMovement.Kind.RESTOCK, instance.stock_quantity, 'variant:created')])
+    elif getattr(instance, '_stock_delta', 0):
+        record_movements([(instance.pk, InventoryMovement.Kind.ADJUSTMENT, instance._stock_delta, 'variant:save')])
+    instance._loaded_stock = instance.stock_quantity
+    instance._stock_delta = 0
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    get_search_backend().index([instance])
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+@receiver(pre_save, sender=Product)
+def remember_counted_category(sender, instance, update_fields=None, **kwargs):
+    # The category the product counted in before this save (products/categories.py)
+    instance._counted_category = None
+    if instance._state.adding or (update_fields is not None and not {'status', 'category'} & set(update_fields)):
+        instance._counted_category = counted_category(instance.status, instance.category_id)
+        return
+    row = Product.objects.filter(pk=instance.pk).values_list('status', 'category_id').first()
+    if row:
+        instance._counted_category = counted_category(*row)
+
+@receiver(post_save, sender=Product)
+def update_category_counts(sender, instance, created, **kwargs):
+    changes = Counter()
+    if not created:
+        changes[getattr(instance, '_counted_category', None)] -= 1
+    changes[counted_category(instance.status, instance.category_id)] += 1
+    adjust_product_counts(changes)
+
+@receiver(post_delete, sender=Product)
+def release_category_count(sender, instance, **kwargs):
+    adjust_product_counts({counted_category(instance.status, instance.category_id): -1})
+
+@receiver(pre_save, sender=Category)
+def check_category_parent(sender, instance, **kwargs):
+    # The tree columns are maintained with UPDATEs (products/categories.py): save them as
+    # they are in the table, not as they were when this instance was loaded
+    row = Category.objects.filter(pk=instance.pk).values_list('path', 'depth', 'product_count').first() if instance.pk else None
+    instance.path, instance.depth, instance.product_count = row or ('', 0, 0)
+    instance._old_path = instance.path
+    if instance.parent_id and instance._old_path and Category.objects.filter(subtree(instance._old_path), pk=instance.parent_id).exists():
+        raise ValueError('A category cannot be moved under itself')
+
+@receiver(post_save, sender=Category)
+def update_category_path(sender, instance, **kwargs):
+    place_category(instance, instance._old_path)
+
+@receiver(post_delete, sender=Category)
+def release_category(sender, instance, **kwargs):
+    remove_category(instance)
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    invalidate_catalog(PRODUCTS)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    # Product responses embed their category
+    invalidate_catalog(CATEGORIES, PRODUCTS)
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def queue_image_renditions(sender, instance, **kwargs):
+    # Resizing runs in the task workers (products/renditions.py), never in the request
+    if needs_renditions(instance):
+        render_image.delay(sender._meta.label, instance.pk)
+
+@receiver(media_moved)
+def follow_moved_images(sender, moved, **kwargs):
+    """Point rendition maps and the denormalized main image at images moved into the blob store."""
+    product_ids = set()
+    for model in (ProductImage, Category):
+        for instance in model.objects.filter(image__in=set(moved.values())).iterator():
+            source = instance.renditions.get('source')
+            if source in moved and moved[source] == instance.image.name:
+                model.objects.filter(pk=instance.pk).update(renditions={**instance.renditions, 'source': instance.image.name})
+            if model is ProductImage:
+                product_ids.add(instance.product_id)
+    refresh_product_summaries(product_ids)
+    invalidate_catalog(CATEGORIES, PRODUCTS)
@@ -0,0 +1,62 @@
+# apps/products/summary.py
+from django.db.models import Min, Max, Sum, Count
+from .models import Product, ProductVariant, ProductImage, StockShard
+from .cache import invalidate_catalog, PRODUCTS
+
+def refresh_product_summaries(product_ids):
+    """
+    Recompute the denormalized catalog summary (price range, total stock,
+    main image) for the given products.
+    Uses one aggregate query for variants, one for pending stock shards and one query for images,
+    then a column-limited UPDATE per product (updated_at is left untouched).
+    """
+    product_ids = {pid for pid in product_ids if pid is not None}
+    if not product_ids:
+        return
+
+    summaries = {
+        pid: {'min_price': 0, 'max_price': 0, 'total_stock': 0, 'variant_count': 0, 'main_image': '', 'main_image_renditions': {}}
+        for pid in product_ids
+    }
+
+    variant_rows = (
+        ProductVariant.objects.filter(product_id__in=product_ids)
+        .values('product_id')
+        .annotate(min_p=Min('price'), max_p=Max('price'), stock=Sum('stock_quantity'), cnt=Count('id'))
+    )
+    for row in variant_rows:
+        summaries[row['product_id']].update(
+            min_price=row['min_p'],
+            max_price=row['max_p'],
+            total_stock=row['stock'] or 0,
+            variant_count=row['cnt'],
+        )
+
+    # Stock put back but not folded into the variant rows yet (see products/inventory.py)
+    pending_rows = (
+        StockShard.objects.filter(variant__product_id__in=product_ids)
+        .values('variant__product_id').annotate(total=Sum('quantity'))
+    )
+    for row in pending_rows:
+        summaries[row['variant__product_id']]['total_stock'] += row['total'] or 0
+
+    # Main image first, otherwise the oldest image (same rule as before)
+    image_rows = (
+        ProductImage.objects.filter(product_id__in=product_ids)
+        .order_by('product_id', '-is_main', 'id')
+        .values_list('product_id', 'image', 'renditions')
+    )
+    seen = set()
+    for pid, image, renditions in image_rows:
+        if pid in seen:
+            continue
+        seen.add(pid)
+        summaries[pid]['main_image'] = image or ''
+        if image and renditions.get('source') == image:
+            summaries[pid]['main_image_renditions'] = renditions
+
+    for pid, values in summaries.items():
+        Product.objects.filter(pk=pid).update(**values)
+
+    # Variant/image changes and stock updates all land here
+    invalidate_catalog(PRODUCTS)
@@ -0,0 +1,19 @@
+from django.apps import apps as django_apps
+from apps.tasks.queue import task
+from .models import ProductImport
+from .imports import run_import
+from .renditions import update_renditions
+
+@task(max_attempts=3, timeout=3600, atomic=False)
+def import_catalog(import_id):
+    """
+    Run a bulk product import too big to apply during the upload request.
+    Not atomic: every chunk commits on its own, so the job's progress is
+    visible while it runs and other writers are not locked out for its length.
+    """
+    run_import(ProductImport.objects.select_related('seller').get(pk=import_id))
+
+@task(max_attempts=3, timeout=900)
+def render_image(model_label, pk):
+    """Render the WebP/JPEG renditions of a ProductImage or Category image."""
+    update_renditions(django_apps.get_model(model_label), pk)
@@ -1,8 +1,28 @@
 # apps/products/tests.py
 from rest_framework.test import APITestCase
 from rest_framework import status
+from decimal import Decimal
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from PIL import Image
 from django.contrib.auth import get_user_model
-from .models import Product
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from config.pagination import CreatedAtCursorPagination
+from .models import Product, ProductVariant, ProductImage, Category, InventoryMovement, StockShard, ProductImport
+from .imports import unique_slugs
+from .categories import subtree
+from .search import get_search_backend
+from .renditions import build_renditions
+from .inventory import Kind, add_stock, available_stock, ledger_stock, compact_inventory
 
 User = get_user_model()
 
@@ -49,3 +69,514 @@ class ProductTests(APITestCase):
         url = f'/api/products/{product.slug}/'
         response = self.client.patch(url, {'name': 'Hacked'})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN) # Or 403 depending on QuerySet filtering
+
+class ProductSummaryTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+
+    def _create_products(self, count):
+        for i in range(count):
+            product = Product.objects.create(seller=self.seller, name=f'P{i}', slug=f'p-{i}', status='ACTIVE')
+            ProductVariant.objects.create(product=product, sku=f'SKU-{i}-A', price='10.00', stock_quantity=3)
+            ProductVariant.objects.create(product=product, sku=f'SKU-{i}-B', price='25.00', stock_quantity=4)
+
+    def test_summary_follows_variant_changes(self):
+        self._create_products(1)
+        product = Product.objects.get()
+        self.assertEqual(product.min_price, Decimal('10.00'))
+        self.assertEqual(product.max_price, Decimal('25.00'))
+        self.assertEqual(product.total_stock, 7)
+
+        product.variants.get(sku='SKU-0-A').delete()
+        product.refresh_from_db()
+        self.assertEqual(product.min_price, Decimal('25.00'))
+        self.assertEqual(product.total_stock, 4)
+
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data[0]['price_range'], '25.00')
+        self.assertEqual(response.data[0]['stock_quantity'], 4)
+
+    def test_list_query_count_is_constant(self):
+        self._create_products(3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/products/')
+
+        for i in range(3, 30):
+            product = Product.objects.create(seller=self.seller, name=f'P{i}', slug=f'p-{i}', status='ACTIVE')
+            ProductVariant.objects.create(product=product, sku=f'SKU-{i}-A', price='10.00', stock_quantity=3)
+
+        caches['catalog'].clear() # Measure a cold render
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/products/')
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_rebuild_command(self):
+        self._create_products(2)
+        Product.objects.update(min_price=0, total_stock=0)
+        call_command('rebuild_product_summaries', stdout=StringIO())
+        self.assertFalse(Product.objects.filter(total_stock=0).exists())
+
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.lamp = Product.objects.create(seller=self.seller, name='IŞIKLI Masa Lambası', slug='lamba', description='Okuma için', status='ACTIVE')
+        self.desk = Product.objects.create(seller=self.seller, name='Çalışma Masası', slug='masa', description='Lamba ile uyumlu', status='ACTIVE')
+        self.bag = Product.objects.create(seller=self.seller, name='İnce Deri Çanta', slug='canta', description='Günlük kullanım', status='ACTIVE')
+
+    def search(self, query):
+        response = self.client.get('/api/products/', {'search': query})
+        return [row['id'] for row in response.data]
+
+    def test_turkish_case_folding_and_prefix(self):
+        self.assertEqual(self.search('ışık'), [self.lamp.id])
+        self.assertEqual(self.search('ince'), [self.bag.id])
+        self.assertEqual(self.search('çan'), [self.bag.id])
+
+    def test_every_turkish_i_matches_both_ways(self):
+        phone = Product.objects.create(seller=self.seller, name='iPhone Kılıfı', slug='kilif', description='', status='ACTIVE')
+        self.assertEqual(self.search('IPHONE'), [phone.id])
+        self.assertEqual(self.search('İphone'), [phone.id])
+        self.assertEqual(self.search('kilif'), [phone.id])
+        self.assertEqual(self.search('KILIF'), [phone.id])
+        self.assertEqual(self.search('isik'), [self.lamp.id])
+        self.assertEqual(self.search('IŞIK'), [self.lamp.id])
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(self.search('lamba'), [self.lamp.id, self.desk.id])
+
+    def test_index_follows_save_and_delete(self):
+        self.bag.name = 'Sırt Çantası'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bag.save()
+        self.assertEqual(self.search('ince'), [])
+        self.assertEqual(self.search('sırt'), [self.bag.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bag.delete()
+        self.assertEqual(self.search('sırt'), [])
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('masa'), [self.lamp.id, self.desk.id])
+
+    def test_view_filters_apply_before_ranking(self):
+        # More better-ranked drafts than the old 500 result cut-off
+        drafts = Product.objects.bulk_create([
+            Product(seller=self.seller, name='Kalem Kalem', slug=f'taslak-{i}', description='Kalem', status='DRAFT')
+            for i in range(510)
+        ])
+        get_search_backend().index(drafts)
+        pens = [
+            Product.objects.create(seller=self.seller, name=f'Dolma Kalem {i}', slug=f'kalem-{i}', description='', status='ACTIVE')
+            for i in range(3)
+        ]
+        self.assertEqual(sorted(self.search('kalem')), [p.id for p in pens])
+
+        # Pages follow relevance order through every match
+        response = self.client.get('/api/products/', {'search': 'kalem', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        rest = self.client.get(response.data['next']).data['results']
+        self.assertEqual(sorted([row['id'] for row in response.data['results'] + rest]), [p.id for p in pens])
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.category = Category.objects.create(name='Elektronik', slug='elektronik')
+        self.product = Product.objects.create(seller=self.seller, name='Kulaklık', slug='kulaklik', status='ACTIVE', category=self.category)
+        self.variant = ProductVariant.objects.create(product=self.product, sku='K1', price='100.00', stock_quantity=5)
+
+    def test_hit_and_etag_revalidation(self):
+        first = self.client.get('/api/products/')
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get('/api/products/')
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(first.data, second.data)
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        stats = self.client.get('/api/products/cache-stats/')
+        self.assertEqual(stats.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cached_list_keeps_pagination_headers(self):
+        Product.objects.create(seller=self.seller, name='Hoparlör', slug='hoparlor', status='ACTIVE')
+        with mock.patch.object(CreatedAtCursorPagination, 'LEGACY_PAGE_SIZE', 1):
+            miss = self.client.get('/api/products/')
+            hit = self.client.get('/api/products/')
+        for response in (miss, hit):
+            self.assertEqual(len(response.data), 1)
+            self.assertEqual(response['X-Has-More'], 'true')
+            self.assertIn('rel="next"', response['Link'])
+
+    def test_variant_change_invalidates_products_only(self):
+        self.client.get('/api/products/')
+        self.client.get('/api/products/categories/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.variant.stock_quantity = 2
+            self.variant.save()
+
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data[0]['stock_quantity'], 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/products/categories/')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_category_change_invalidates_products(self):
+        self.client.get(f'/api/products/{self.product.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Teknoloji'
+            self.category.save()
+        response = self.client.get(f'/api/products/{self.product.id}/')
+        self.assertEqual(response.data['category']['name'], 'Teknoloji')
+
+class InventoryLedgerTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.product = Product.objects.create(seller=self.seller, name='Kalem', slug='kalem', status='ACTIVE', description='')
+        self.variant = ProductVariant.objects.create(product=self.product, sku='K1', price=10, stock_quantity=5)
+
+    def stock(self):
+        return available_stock([self.variant.id])[self.variant.id]
+
+    def test_additions_go_to_shards_and_reads_include_them(self):
+        add_stock([(self.variant.id, Kind.RESTOCK, 3, 'po:1'), (self.variant.id, Kind.RESTOCK, 2, 'po:2')])
+
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock_quantity, 5) # Variant row untouched
+        self.assertEqual(self.stock(), 10)
+        self.assertEqual(ledger_stock([self.variant.id]), {self.variant.id: 10})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.total_stock, 10)
+
+        response = self.client.get(f'/api/products/{self.product.id}/')
+        self.assertEqual(response.data['variants'][0]['stock_quantity'], 10)
+
+    def test_variant_list_query_count_is_constant(self):
+        self.client.force_authenticate(user=self.seller)
+        add_stock([(self.variant.id, Kind.RESTOCK, 3, '')])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/products/variants/')
+        for i in range(5):
+            variant = ProductVariant.objects.create(product=self.product, sku=f'K-{i}', price=10, stock_quantity=1)
+            add_stock([(variant.id, Kind.RESTOCK, 2, '')])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/products/variants/')
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_checkout_folds_shards_when_short(self):
+        from apps.orders.checkout import reserve_stock
+        add_stock([(self.variant.id, Kind.RELEASE, 4, 'seller_order:1')])
+        reserve_stock([{'variant_id': self.variant.id, 'quantity': 8}], reference='test')
+
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock_quantity, 1)
+        self.assertEqual(StockShard.objects.get(variant=self.variant).quantity, 0)
+        self.assertEqual(
+            list(InventoryMovement.objects.filter(variant=self.variant).values_list('kind', 'quantity')),
+            [('RESTOCK', 5), ('RELEASE', 4), ('RESERVATION', -8)],
+        )
+        self.assertEqual(ledger_stock([self.variant.id])[self.variant.id], 1)
+
+    def test_manual_edit_is_recorded_as_adjustment(self):
+        add_stock([(self.variant.id, Kind.RESTOCK, 3, '')])
+        variant = ProductVariant.objects.get(pk=self.variant.pk)
+        variant.stock_quantity -= 1 # Admin form: the row's 5 edited to 4
+        variant.save()
+        variant.save() # Saving again changes nothing
+
+        self.assertEqual(self.stock(), 7)
+        movement = InventoryMovement.objects.last()
+        self.assertEqual((movement.kind, movement.quantity), ('ADJUSTMENT', -1))
+        self.assertEqual(ledger_stock([self.variant.id])[self.variant.id], 7)
+
+    def test_variant_patch_keeps_shard_stock(self):
+        add_stock([(self.variant.id, Kind.RESTOCK, 3, '')])
+        self.client.force_authenticate(user=self.seller)
+        url = f'/api/products/variants/{self.variant.id}/'
+
+        response = self.client.patch(url, {'price': '12.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stock_quantity'], 8)
+        self.assertEqual(self.stock(), 8)
+        self.assertFalse(InventoryMovement.objects.filter(kind='ADJUSTMENT').exists())
+
+        # The seller is shown 8 available and sets 6
+        response = self.client.patch(url, {'stock_quantity': 6}, format='json')
+        self.assertEqual(response.data['stock_quantity'], 6)
+        self.assertEqual(self.stock(), 6)
+        self.assertEqual(ledger_stock([self.variant.id])[self.variant.id], 6)
+        movement = InventoryMovement.objects.last()
+        self.assertEqual((movement.kind, movement.quantity), ('ADJUSTMENT', -2))
+
+    def test_compaction_rolls_snapshots_and_reports_drift(self):
+        add_stock([(self.variant.id, Kind.RESTOCK, 3, '')])
+        stats = compact_inventory()
+        self.assertEqual(stats['folded_variants'], 1)
+        self.assertEqual(stats['drift'], {})
+        self.assertEqual(self.variant.inventory_snapshot.quantity, 8)
+
+        # A write that bypasses the ledger shows up as drift
+        ProductVariant.objects.filter(pk=self.variant.pk).update(stock_quantity=100)
+        out = StringIO()
+        call_command('compact_inventory', stdout=out)
+        self.assertIn('ledger 8 != stock 100', out.getvalue())
+
+class ProductImportTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.other_seller = User.objects.create_user(email='other@test.com', password='password', role='SELLER')
+        self.category = Category.objects.create(name='Kırtasiye', slug='kirtasiye')
+        Product.objects.create(seller=self.other_seller, name='Defter', slug='defter', description='')
+        foreign = Product.objects.create(seller=self.other_seller, name='Silgi', slug='silgi', description='')
+        ProductVariant.objects.create(product=foreign, sku='FOREIGN', price=1)
+        self.client.force_authenticate(user=self.seller)
+
+    def upload(self, name, content):
+        return self.client.post('/api/products/imports/', {'file': SimpleUploadedFile(name, content.encode())}, format='multipart')
+
+    def test_csv_import_creates_then_upserts_by_sku(self):
+        response = self.upload('catalog.csv', (
+            'sku,product,description,category,variant,price,stock,attributes\n'
+            'D-A5,Defter,Kareli,kirtasiye,A5,25.00,10,"{""sayfa"": 80}"\n'
+            'D-A4,Defter,Kareli,kirtasiye,A4,40.00,4,\n'
+            'K-1,Kalem,,,,7.50,,\n'
+            'BAD,Kalem,,,,ucuz,,\n'
+            'X-1,Cetvel,,yok,,3,,\n'
+            'FOREIGN,Silgi,,,,2,,\n'
+        ))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'DONE')
+        self.assertEqual((response.data['total_rows'], response.data['created_count'], response.data['error_count']), (6, 3, 3))
+        self.assertEqual([(e['line'], e['sku'], list(e['errors'])) for e in response.data['errors']], [
+            (5, 'BAD', ['price']), (6, 'X-1', ['category']), (7, 'FOREIGN', ['sku']),
+        ])
+
+        defter = Product.objects.get(variants__sku='D-A5')
+        self.assertEqual(defter.slug, 'defter-2') # 'defter' belongs to another seller's product
+        self.assertEqual((defter.seller, defter.category, defter.variant_count, defter.total_stock), (self.seller, self.category, 2, 14))
+        self.assertEqual(Category.objects.get(pk=self.category.pk).product_count, 1)
+        self.assertEqual(ProductVariant.objects.get(sku='D-A5').attributes, {'sayfa': 80})
+        self.assertEqual(Product.objects.get(variants__sku='K-1').slug, 'kalem')
+        self.assertEqual(ledger_stock([v.id for v in defter.variants.all()]), available_stock([v.id for v in defter.variants.all()]))
+        self.assertEqual(self.client.get('/api/products/', {'search': 'defter'}).data[0]['id'], defter.id)
+
+        # Second file: existing SKUs are updated in place, new ones join the product of the same name
+        add_stock([(ProductVariant.objects.get(sku='D-A5').id, Kind.RESTOCK, 2, '')])
+        response = self.upload('catalog.jsonl', '\n'.join([
+            json.dumps({'sku': 'D-A5', 'product': 'Defter Kareli', 'price': '27.50', 'stock': 20}),
+            json.dumps({'sku': 'D-B5', 'product': 'Defter Kareli', 'price': '30', 'variant': 'B5'}),
+            '{broken',
+        ]))
+        self.assertEqual((response.data['created_count'], response.data['updated_count'], response.data['error_count']), (1, 1, 1))
+        defter.refresh_from_db()
+        self.assertEqual((defter.name, defter.slug, defter.variant_count, defter.min_price), ('Defter Kareli', 'defter-2', 3, Decimal('27.50')))
+        variant = ProductVariant.objects.get(sku='D-A5')
+        self.assertEqual((variant.name, variant.stock_quantity), ('A5', 20)) # Variant name kept, stock set
+        self.assertEqual(
+            list(InventoryMovement.objects.filter(variant=variant).values_list('kind', 'quantity')),
+            [('RESTOCK', 10), ('RESTOCK', 2), ('ADJUSTMENT', 8)],
+        )
+
+    def test_reimport_with_a_new_sku_joins_the_existing_product(self):
+        content = 'sku,product,price,stock\nD-A5,Defter,25.00,10\nD-A4,Defter,40.00,4\n'
+        self.upload('catalog.csv', content)
+        response = self.upload('catalog.csv', content + 'D-B5,Defter,30.00,2\n')
+        self.assertEqual((response.data['created_count'], response.data['updated_count'], response.data['error_count']), (1, 2, 0))
+        defter = Product.objects.get(seller=self.seller)
+        self.assertEqual((defter.slug, defter.variant_count, defter.total_stock), ('defter-2', 3, 16))
+
+    @override_settings(PRODUCT_IMPORT_INLINE_BYTES=0)
+    def test_big_file_is_imported_by_the_task_queue(self):
+        from apps.tasks.queue import run_pending
+        rows = ''.join(f'S-{n},Ürün {n % 10},,,,{n}.00,1,\n' for n in range(1, 1201))
+        response = self.upload('catalog.csv', 'sku,product,description,category,variant,price,stock,attributes\n' + rows)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'QUEUED')
+
+        self.assertEqual(run_pending(), (1, 0))
+        job = ProductImport.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.total_rows, job.created_count, job.error_count), ('DONE', 1200, 1200, 0))
+        self.assertEqual(Product.objects.filter(seller=self.seller).count(), 10)
+        self.assertEqual(self.client.get(f'/api/products/imports/{job.pk}/').data['status'], 'DONE')
+
+    def test_slugs_are_unique_without_a_query_per_row(self):
+        Product.objects.create(name='Kalem', slug='kalem-2', description='')
+        with CaptureQueriesContext(connection) as queries:
+            slugs = unique_slugs(['Defter', 'Kalem', 'Kalem', 'Defter', 'Kalem'])
+        self.assertEqual(slugs, ['defter-2', 'kalem', 'kalem-3', 'defter-3', 'kalem-4'])
+        self.assertEqual(len(queries), 1)
+
+    def test_buyers_cannot_import(self):
+        self.client.force_authenticate(user=User.objects.create_user(email='buyer@test.com', password='password', role='BUYER'))
+        self.assertEqual(self.upload('catalog.csv', 'sku\n').status_code, status.HTTP_403_FORBIDDEN)
+
+class ImageRenditionTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.product = Product.objects.create(seller=self.seller, name='Lamba', slug='lamba', status='ACTIVE', description='')
+        ProductVariant.objects.create(product=self.product, sku='L1', price=10, stock_quantity=1)
+
+    def image(self, size, mode='RGB', image_format='PNG'):
+        out = BytesIO()
+        Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(out, format=image_format)
+        return SimpleUploadedFile(f'photo.{image_format.lower()}', out.getvalue())
+
+    def rendered(self, path):
+        with Image.open(os.path.join(self.media, path)) as image:
+            return image.format, image.size
+
+    def test_upload_is_rendered_by_the_task_queue(self):
+        from apps.tasks.queue import run_pending
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.post(f'/api/products/{self.product.id}/upload_image/', {'image': self.image((1600, 800), 'RGBA'), 'is_main': 'true'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/products/').data[0]['image_srcset'], {}) # Original only until rendered
+
+        with self.captureOnCommitCallbacks(execute=True): # Drops the cached list
+            self.assertEqual(run_pending(), (1, 0)) # Rendered in the process pool
+        renditions = ProductImage.objects.get(product=self.product).renditions
+        self.assertEqual((renditions['width'], renditions['height']), (1600, 800))
+        self.assertEqual(sorted(renditions['webp'], key=int), ['160', '320', '640', '1280'])
+        self.assertEqual(self.rendered(renditions['webp']['320']), ('WEBP', (320, 160)))
+        self.assertEqual(self.rendered(renditions['jpeg']['1280']), ('JPEG', (1280, 640)))
+
+        srcset = self.client.get('/api/products/').data[0]['image_srcset']
+        self.assertEqual(srcset['webp'].split(', ')[0], f"/media/{renditions['webp']['160']} 160w")
+        self.assertTrue(srcset['jpeg'].endswith('.jpg 1280w'))
+        detail = self.client.get(f'/api/products/{self.product.id}/').data
+        self.assertEqual(detail['image_srcset'], srcset)
+        self.assertEqual(detail['images'][0]['srcset'], srcset)
+
+    @override_settings(IMAGE_RENDITION_PROCESSES=0)
+    def test_same_picture_reuses_content_addressed_files(self):
+        first = ProductImage.objects.create(product=self.product, image=self.image((100, 50)))
+        first_map = build_renditions(first.image)
+        self.assertEqual(list(first_map['jpeg']), ['100']) # Never upscaled
+        files = sorted(os.listdir(os.path.join(self.media, os.path.dirname(first_map['jpeg']['100']))))
+
+        second = ProductImage.objects.create(product=self.product, image=self.image((100, 50)))
+        second_map = build_renditions(second.image)
+        self.assertEqual(first.image.name, second.image.name) # Stored once in the blob store
+        self.assertEqual((first_map['webp'], first_map['jpeg']), (second_map['webp'], second_map['jpeg']))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media, os.path.dirname(first_map['jpeg']['100'])))), files)
+
+    @override_settings(IMAGE_RENDITION_PROCESSES=0)
+    def test_category_images_are_rendered(self):
+        from apps.tasks.queue import run_pending
+        Category.objects.create(name='Aydınlatma', slug='aydinlatma', image=self.image((64, 64), image_format='JPEG'))
+        run_pending()
+        srcset = self.client.get('/api/products/categories/').data[0]['srcset']
+        self.assertEqual(list(srcset), ['webp', 'jpeg'])
+        self.assertIn('64w', srcset['webp'])
+
+
+class CategoryTreeTests(APITestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.seller = User.objects.create_user(email='seller@test.com', password='password', role='SELLER')
+        self.electronics = Category.objects.create(name='Elektronik', slug='elektronik')
+        self.phones = Category.objects.create(name='Telefon', slug='telefon', parent=self.electronics)
+        self.android = Category.objects.create(name='Android', slug='android', parent=self.phones)
+        self.fashion = Category.objects.create(name='Moda', slug='moda')
+
+    def counts(self):
+        return dict(Category.objects.values_list('slug', 'product_count'))
+
+    def product(self, slug, category, status='ACTIVE'):
+        return Product.objects.create(seller=self.seller, name=slug, slug=slug, status=status, category=category, description='')
+
+    def test_paths_and_subtree_filter(self):
+        self.assertEqual(self.android.path, f'{self.electronics.pk}/{self.phones.pk}/{self.android.pk}/')
+        self.assertEqual((self.electronics.depth, self.android.depth), (0, 2))
+        pixel = self.product('pixel', self.android)
+        charger = self.product('sarj', self.electronics)
+        self.product('taslak', self.phones, status='DRAFT')
+        self.product('gomlek', self.fashion)
+
+        response = self.client.get('/api/products/', {'category': 'elektronik'})
+        self.assertEqual({p['id'] for p in response.data}, {pixel.id, charger.id})
+        response = self.client.get('/api/products/', {'category': 'telefon'})
+        self.assertEqual([p['id'] for p in response.data], [pixel.id])
+        self.assertEqual(self.client.get('/api/products/', {'category': 'yok'}).data, [])
+
+        # A range on the path index, not a LIKE SQLite would scan the table for
+        for queryset in (Category.objects.all(), Product.objects.filter(category__isnull=False)):
+            field = 'path' if queryset.model is Category else 'category__path'
+            plan = queryset.filter(subtree(self.phones.path, field)).explain()
+            self.assertRegex(plan, r'SEARCH products_category USING (COVERING )?INDEX \S*path')
+
+        categories = {c['slug']: c for c in self.client.get('/api/products/categories/').data}
+        self.assertEqual(categories['android']['parent'], self.phones.id)
+        self.assertEqual(categories['elektronik']['product_count'], 2)
+
+    def test_counts_follow_status_category_and_deletes(self):
+        pixel = self.product('pixel', self.android)
+        self.product('taslak', self.phones, status='DRAFT')
+        self.assertEqual(self.counts(), {'elektronik': 1, 'telefon': 1, 'android': 1, 'moda': 0})
+
+        pixel.category = self.fashion
+        pixel.save()
+        self.assertEqual(self.counts(), {'elektronik': 0, 'telefon': 0, 'android': 0, 'moda': 1})
+        pixel.status = 'SUSPENDED'
+        pixel.save(update_fields=['status'])
+        self.assertEqual(self.counts()['moda'], 0)
+        pixel.status = 'ACTIVE'
+        pixel.category = self.phones
+        pixel.save()
+        pixel.save(update_fields=['name']) # Nothing counted changes
+        self.assertEqual(self.counts(), {'elektronik': 1, 'telefon': 1, 'android': 0, 'moda': 0})
+        pixel.delete()
+        self.assertEqual(self.counts(), {'elektronik': 0, 'telefon': 0, 'android': 0, 'moda': 0})
+
+    def test_moving_a_subtree(self):
+        self.product('pixel', self.android)
+        self.product('kilif', self.phones)
+        self.phones.parent = self.fashion
+        self.phones.save()
+
+        self.android.refresh_from_db()
+        self.assertEqual(self.android.path, f'{self.fashion.pk}/{self.phones.pk}/{self.android.pk}/')
+        self.assertEqual(self.android.depth, 2)
+        self.assertEqual(self.counts(), {'elektronik': 0, 'telefon': 2, 'android': 1, 'moda': 2})
+        self.assertEqual(len(self.client.get('/api/products/', {'category': 'moda'}).data), 2)
+
+        self.fashion.parent = self.android
+        with self.assertRaises(ValueError):
+            self.fashion.save()
+
+        # A deleted leaf takes its products (now uncategorized) out of its ancestors' counts
+        self.product('kitap', self.fashion)
+        self.android.refresh_from_db()
+        self.android.delete()
+        self.assertEqual(self.counts(), {'elektronik': 0, 'telefon': 1, 'moda': 2})
+
+    def test_rebuild_command(self):
+        self.product('pixel', self.android)
+        Category.objects.update(path='', depth=0, product_count=0)
+        call_command('rebuild_category_tree', stdout=StringIO())
+        self.assertEqual(self.counts(), {'elektronik': 1, 'telefon': 1, 'android': 1, 'moda': 0})
+        self.assertEqual(Category.objects.get(pk=self.android.pk).path, self.android.path)
@@ -1,13 +1,15 @@
 # apps/products/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, VariantViewSet, CategoryViewSet
+from .views import ProductViewSet, VariantViewSet, CategoryViewSet, ProductImportViewSet, CatalogCacheStatsView
 
 router = DefaultRouter()
 router.register('categories', CategoryViewSet, basename='categories')
 router.register('variants', VariantViewSet, basename='variants')
+router.register('imports', ProductImportViewSet, basename='product-imports')
 router.register('', ProductViewSet, basename='products')
 
 urlpatterns = [
+    path('cache-stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
     path('', include(router.urls)),
 ]
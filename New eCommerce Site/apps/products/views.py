@@ -1,21 +1,33 @@
 # apps/products/views.py
-from rest_framework import viewsets, permissions, filters
+from django.conf import settings
+from rest_framework import viewsets, mixins, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Product, ProductVariant, Category
-from .serializers import ProductListSerializer, ProductDetailSerializer, ProductCreateUpdateSerializer, ProductVariantSerializer, CategorySerializer
+from rest_framework.views import APIView
+from .models import Product, ProductVariant, Category, ProductImport
+from .serializers import ProductListSerializer, ProductDetailSerializer, ProductCreateUpdateSerializer, ProductVariantSerializer, CategorySerializer, ProductImportSerializer
 from apps.accounts.permissions import IsSeller, IsOwnerOrReadOnly
+from .filters import ProductSearchFilter
+from .cache import CachedResponseMixin, PRODUCTS, CATEGORIES, get_stats
+from .imports import run_import
+from .categories import subtree
+from .imaging import is_image
+from apps.blobs.storage import blob_storage
+from apps.blobs.uploads import UploadError, completed_upload
+from .tasks import import_catalog
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = CATEGORIES
     queryset = Category.objects.all().order_by('order', 'name')
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None # Small, admin-ordered list
     lookup_field = 'slug'
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = PRODUCTS # Anonymous list/retrieve only, see products/cache.py
     # lookup_field = 'slug' # Default to pk (id) for now to match frontend
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name', 'description']
+    filter_backends = [ProductSearchFilter] # FTS index over name + description
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -30,17 +42,22 @@ class ProductViewSet(viewsets.ModelViewSet):
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        qs = Product.objects.filter(status=Product.Status.ACTIVE)
+        # Category and seller name are joined in; price/stock/image come from the summary columns
+        base_qs = Product.objects.select_related('category', 'seller__seller_profile')
+        if self.action == 'retrieve':
+            base_qs = base_qs.prefetch_related('variants__stock_shards')
+        qs = base_qs.filter(status=Product.Status.ACTIVE)
         
         # Admin or Seller viewing their own products
         if self.request.user.is_authenticated:
             if self.request.query_params.get('mine') and self.request.user.role == 'SELLER':
-                return Product.objects.filter(seller=self.request.user)
+                return base_qs.filter(seller=self.request.user)
         
-        # Filter by Category
+        # Filter by Category, subcategories included: an index range on the category path
         category_slug = self.request.query_params.get('category')
         if category_slug:
-            qs = qs.filter(category__slug=category_slug)
+            path = Category.objects.filter(slug=category_slug).values_list('path', flat=True).first()
+            qs = qs.filter(subtree(path, 'category__path')) if path else qs.none()
             
         return qs.order_by('-created_at')
 
@@ -52,7 +69,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def upload_image(self, request, pk=None):
-        """Upload product image"""
+        """Upload product image: multipart `image`, or `upload` = id of a completed resumable upload"""
         from .models import ProductImage
         product = self.get_object()
         
@@ -61,10 +78,18 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({'error': 'You do not own this product'}, status=403)
         
         image_file = request.FILES.get('image')
+        if not image_file and request.data.get('upload'):
+            try:
+                image_file = completed_upload(request.user, request.data['upload'])
+            except UploadError as exc:
+                return Response({'error': str(exc)}, status=400)
+            with blob_storage().open(image_file) as file:
+                if not is_image(file):
+                    return Response({'error': 'Upload is not an image'}, status=400)
         if not image_file:
             return Response({'error': 'No image provided'}, status=400)
         
-        is_main = request.data.get('is_main', 'false').lower() == 'true'
+        is_main = str(request.data.get('is_main', 'false')).lower() == 'true'
         
         # If this is set as main, unset other main images
         if is_main:
@@ -90,4 +115,34 @@ class VariantViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsSeller]
     
     def get_queryset(self):
-        return ProductVariant.objects.filter(product__seller=self.request.user)
+        # The serializer adds pending shard stock to stock_quantity
+        return ProductVariant.objects.filter(product__seller=self.request.user).prefetch_related('stock_shards')
+
+class ProductImportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Bulk catalog upload (multipart `file`, .csv or .jsonl; see products/imports.py).
+    Files up to PRODUCT_IMPORT_INLINE_BYTES are imported at once (201), bigger ones
+    are queued (202); poll the import for its counts and row errors.
+    """
+    serializer_class = ProductImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeller]
+
+    def get_queryset(self):
+        return ProductImport.objects.filter(seller=self.request.user).order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(seller=request.user)
+        if job.file.size <= getattr(settings, 'PRODUCT_IMPORT_INLINE_BYTES', 256 * 1024):
+            run_import(job)
+            return Response(self.get_serializer(job).data, status=status.HTTP_201_CREATED)
+        import_catalog.delay(job.pk)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+class CatalogCacheStatsView(APIView):
+    """Hit/miss counters of the catalog response cache, for monitoring"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
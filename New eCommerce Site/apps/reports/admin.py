@@ -1,4 +1,28 @@
 # reports/admin.py
-# No models were defined for reports in Phase 3. 
-# This file is a placeholder. 
-# Usually reports are views or dashboards in Django Admin using proxy models or custom templates.
+from django.contrib import admin
+from .models import SellerSales, CategorySales, ProductSales
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are maintained by reports/rollups.py; read only here."""
+    list_filter = ('period',)
+    date_hierarchy = 'bucket'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(SellerSales)
+class SellerSalesAdmin(RollupAdmin):
+    list_display = ('bucket', 'period', 'seller', 'order_count', 'item_count', 'gross_amount', 'commission_amount')
+    search_fields = ('seller__email',)
+
+@admin.register(CategorySales)
+class CategorySalesAdmin(RollupAdmin):
+    list_display = ('bucket', 'period', 'category', 'order_count', 'item_count', 'gross_amount')
+
+@admin.register(ProductSales)
+class ProductSalesAdmin(RollupAdmin):
+    list_display = ('bucket', 'period', 'product', 'seller', 'order_count', 'item_count', 'gross_amount')
+    search_fields = ('product__name', 'seller__email')
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
+
+    def ready(self):
+        import apps.reports.signals
+
     verbose_name = 'Raporlar'
@@ -0,0 +1,101 @@
+# apps/reports/exports.py
+"""
+Streaming exports of orders, seller packets and order items.
+
+Rows are read with values_list() over the joined columns and
+iterator(chunk_size=...) (a server-side cursor on PostgreSQL), and written
+out one line at a time, so memory stays flat however many rows a range has.
+Used by ExportView (StreamingHttpResponse) and `manage.py export_sales`.
+"""
+import csv
+import datetime
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from apps.orders.models import Order, SellerOrder, OrderItem
+
+CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+# dataset: (model, date field, seller filter, [(column, field)])
+DATASETS = {
+    # Seller filter by subquery rather than the join, so every order is listed once
+    'orders': (Order, 'created_at', lambda seller_id: Q(pk__in=SellerOrder.objects.filter(seller_id=seller_id).values('order_id')), [
+        ('order_id', 'id'),
+        ('created_at', 'created_at'),
+        ('buyer_email', 'buyer__email'),
+        ('status', 'status'),
+        ('total_amount', 'total_amount'),
+        ('currency', 'currency'),
+        ('payment_method', 'payment_method'),
+        ('transaction_id', 'transaction_id'),
+    ]),
+    'seller_orders': (SellerOrder, 'created_at', lambda seller_id: Q(seller_id=seller_id), [
+        ('seller_order_id', 'id'),
+        ('order_id', 'order_id'),
+        ('created_at', 'created_at'),
+        ('seller_id', 'seller_id'),
+        ('seller_name', 'seller__seller_profile__business_name'),
+        ('buyer_email', 'order__buyer__email'),
+        ('status', 'status'),
+        ('total_amount', 'total_amount'),
+        ('commission_amount', 'commission_amount'),
+        ('payout_id', 'payout_id'),
+    ]),
+    'items': (OrderItem, 'seller_order__created_at', lambda seller_id: Q(seller_order__seller_id=seller_id), [
+        ('item_id', 'id'),
+        ('order_id', 'seller_order__order_id'),
+        ('seller_order_id', 'seller_order_id'),
+        ('created_at', 'seller_order__created_at'),
+        ('seller_id', 'seller_order__seller_id'),
+        ('status', 'seller_order__status'),
+        ('sku', 'variant__sku'),
+        ('product_name', 'variant__product__name'),
+        ('quantity', 'quantity'),
+        ('unit_price', 'unit_price'),
+        ('total_price', 'total_price'),
+    ]),
+}
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+def export_rows(dataset, start=None, end=None, seller_id=None):
+    """
+    (column names, row tuple iterator) of `dataset` placed in [start, end) (dates),
+    optionally only what concerns one seller. Rows come in id order.
+    """
+    model, date_field, seller_filter, columns = DATASETS[dataset]
+    queryset = model.objects.all()
+    if start:
+        queryset = queryset.filter(**{f'{date_field}__gte': _day_start(start)})
+    if end:
+        queryset = queryset.filter(**{f'{date_field}__lt': _day_start(end)})
+    if seller_id is not None:
+        queryset = queryset.filter(seller_filter(seller_id))
+    rows = queryset.order_by('id').values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE)
+    return [name for name, _ in columns], rows
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, for csv.writer."""
+    def write(self, value):
+        return value
+
+def _csv_cell(value):
+    # Keep spreadsheet programs from evaluating user-entered text as a formula
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+def render(columns, rows, file_format):
+    """Yield the export line by line as CSV (with a header) or JSON Lines."""
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
@@ -0,0 +1,26 @@
+import datetime
+from django.core.management.base import BaseCommand
+from apps.reports.exports import DATASETS, FORMATS, export_rows, render
+
+
+class Command(BaseCommand):
+    help = 'Stream orders, seller_orders or items as CSV or JSON Lines to stdout or a file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--output', choices=list(FORMATS), default='csv')
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Day after the last one (YYYY-MM-DD)')
+        parser.add_argument('--seller', type=int, help='Only this seller (user id)')
+        parser.add_argument('--file', help='Write here instead of stdout')
+
+    def handle(self, *args, **options):
+        columns, rows = export_rows(options['dataset'], options['start'], options['end'], options['seller'])
+        lines = render(columns, rows, options['output'])
+        if options['file']:
+            with open(options['file'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Export written to {options['file']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
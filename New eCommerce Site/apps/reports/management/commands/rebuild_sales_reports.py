@@ -0,0 +1,14 @@
+import datetime
+from django.core.management.base import BaseCommand
+from apps.reports.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the sales rollups from the order tables (stop the task workers while it runs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=datetime.date.fromisoformat, help='Only rebuild from this day on (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        rebuild(options['since'])
+        self.stdout.write(self.style.SUCCESS(f"Sales rollups rebuilt{' since ' + str(options['since']) if options['since'] else ''}."))
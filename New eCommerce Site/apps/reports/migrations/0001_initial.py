@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0009_inventory_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('HOUR', 'Saatlik'), ('DAY', 'Günlük')], max_length=4, verbose_name='periyot')),
+                ('bucket', models.DateTimeField(verbose_name='dönem başlangıcı')),
+                ('order_count', models.IntegerField(default=0, verbose_name='sipariş sayısı')),
+                ('item_count', models.IntegerField(default=0, verbose_name='ürün adedi')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='brüt tutar')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category', verbose_name='kategori')),
+            ],
+            options={
+                'verbose_name': 'Kategori Satışları',
+                'verbose_name_plural': 'Kategori Satışları',
+                'indexes': [models.Index(fields=['period', 'bucket'], name='category_sales_period_idx')],
+                'unique_together': {('category', 'period', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('HOUR', 'Saatlik'), ('DAY', 'Günlük')], max_length=4, verbose_name='periyot')),
+                ('bucket', models.DateTimeField(verbose_name='dönem başlangıcı')),
+                ('order_count', models.IntegerField(default=0, verbose_name='sipariş sayısı')),
+                ('item_count', models.IntegerField(default=0, verbose_name='ürün adedi')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='brüt tutar')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product', verbose_name='ürün')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='satıcı')),
+            ],
+            options={
+                'verbose_name': 'Ürün Satışları',
+                'verbose_name_plural': 'Ürün Satışları',
+                'indexes': [models.Index(fields=['seller', 'period', 'bucket'], name='product_sales_seller_idx'), models.Index(fields=['period', 'bucket'], name='product_sales_period_idx')],
+                'unique_together': {('product', 'period', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SellerSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('HOUR', 'Saatlik'), ('DAY', 'Günlük')], max_length=4, verbose_name='periyot')),
+                ('bucket', models.DateTimeField(verbose_name='dönem başlangıcı')),
+                ('order_count', models.IntegerField(default=0, verbose_name='sipariş sayısı')),
+                ('item_count', models.IntegerField(default=0, verbose_name='ürün adedi')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='brüt tutar')),
+                ('commission_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='komisyon tutarı')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='satıcı')),
+            ],
+            options={
+                'verbose_name': 'Satıcı Satışları',
+                'verbose_name_plural': 'Satıcı Satışları',
+                'indexes': [models.Index(fields=['period', 'bucket'], name='seller_sales_period_idx')],
+                'unique_together': {('seller', 'period', 'bucket')},
+            },
+        ),
+    ]
@@ -1,3 +1,61 @@
+# reports/models.py
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.accounts.models import User
+from apps.products.models import Category, Product
 
-# Create your models here.
+class Period(models.TextChoices):
+    HOUR = 'HOUR', _('Saatlik')
+    DAY = 'DAY', _('Günlük')
+
+class SalesRollup(models.Model):
+    """
+    Sales of one hour or day (bucket = its start), kept up to date from order
+    events by reports/rollups.py. Cancelled packets are taken back out of the
+    bucket they were placed in.
+    """
+    period = models.CharField(_('periyot'), max_length=4, choices=Period.choices)
+    bucket = models.DateTimeField(_('dönem başlangıcı'))
+    order_count = models.IntegerField(_('sipariş sayısı'), default=0)
+    item_count = models.IntegerField(_('ürün adedi'), default=0)
+    gross_amount = models.DecimalField(_('brüt tutar'), max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+class SellerSales(SalesRollup):
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name=_('satıcı'))
+    commission_amount = models.DecimalField(_('komisyon tutarı'), max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('seller', 'period', 'bucket')
+        indexes = [
+            # Platform-wide series: WHERE period = .. AND bucket >= ..
+            models.Index(fields=['period', 'bucket'], name='seller_sales_period_idx'),
+        ]
+        verbose_name = _('Satıcı Satışları')
+        verbose_name_plural = _('Satıcı Satışları')
+
+class CategorySales(SalesRollup):
+    # Products without a category only show up in the seller and product tables
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+', verbose_name=_('kategori'))
+
+    class Meta:
+        unique_together = ('category', 'period', 'bucket')
+        indexes = [models.Index(fields=['period', 'bucket'], name='category_sales_period_idx')]
+        verbose_name = _('Kategori Satışları')
+        verbose_name_plural = _('Kategori Satışları')
+
+class ProductSales(SalesRollup):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', verbose_name=_('ürün'))
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name=_('satıcı'))
+
+    class Meta:
+        unique_together = ('product', 'period', 'bucket')
+        indexes = [
+            # Top products of a seller over a range
+            models.Index(fields=['seller', 'period', 'bucket'], name='product_sales_seller_idx'),
+            models.Index(fields=['period', 'bucket'], name='product_sales_period_idx'),
+        ]
+        verbose_name = _('Ürün Satışları')
+        verbose_name_plural = _('Ürün Satışları')
@@ -0,0 +1,144 @@
+# apps/reports/rollups.py
+"""
+Hourly and daily sales rollups per seller, category and product.
+
+Placed orders add their packets to the buckets of their placement time,
+cancelled and rejected packets are subtracted from the same buckets again
+(see reports/signals.py, both run through the task queue). Each batch is a
+handful of upserts whatever the number of orders behind a bucket, and the
+report views only read these tables.
+
+rebuild() recomputes the rollups from the order tables, for the first fill
+or after a bookkeeping error (`manage.py rebuild_sales_reports`).
+"""
+import datetime
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from apps.orders.models import SellerOrder, OrderItem
+from .models import Period, SellerSales, CategorySales, ProductSales
+
+ROLLUP_MODELS = (SellerSales, CategorySales, ProductSales)
+BATCH_SIZE = 1000
+
+def buckets(moment):
+    """{ period: start of the hour / day containing `moment` } in the current time zone."""
+    hour = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return {Period.HOUR: hour, Period.DAY: hour.replace(hour=0)}
+
+
+def sales_deltas(seller_order_ids):
+    """
+    What the given packets contribute to each rollup row:
+    { (model, lookup items): {'create': {...}, 'packets': set, 'item_count', 'gross_amount'[, 'commission_amount']} }
+    """
+    deltas = {}
+
+    def add(model, lookup, packet_id, quantity, amount, create=None):
+        entry = deltas.setdefault((model, tuple(lookup.items())), {
+            'create': create or {}, 'packets': set(), 'item_count': 0, 'gross_amount': Decimal('0'),
+        })
+        if packet_id is not None:
+            entry['packets'].add(packet_id)
+        entry['item_count'] += quantity
+        entry['gross_amount'] += amount
+        return entry
+
+    items = OrderItem.objects.filter(seller_order_id__in=seller_order_ids).values_list(
+        'seller_order_id', 'seller_order__seller_id', 'seller_order__created_at',
+        'variant__product_id', 'variant__product__category_id', 'quantity', 'total_price',
+    )
+    for packet_id, seller_id, created_at, product_id, category_id, quantity, amount in items:
+        for period, bucket in buckets(created_at).items():
+            add(SellerSales, {'seller_id': seller_id, 'period': period, 'bucket': bucket}, packet_id, quantity, amount)
+            add(ProductSales, {'product_id': product_id, 'period': period, 'bucket': bucket}, packet_id, quantity, amount,
+                create={'seller_id': seller_id})
+            if category_id:
+                add(CategorySales, {'category_id': category_id, 'period': period, 'bucket': bucket}, packet_id, quantity, amount)
+
+    packets = SellerOrder.objects.filter(pk__in=seller_order_ids).values_list('seller_id', 'created_at', 'commission_amount')
+    for seller_id, created_at, commission in packets:
+        for period, bucket in buckets(created_at).items():
+            entry = add(SellerSales, {'seller_id': seller_id, 'period': period, 'bucket': bucket}, None, 0, 0)
+            entry['commission_amount'] = entry.get('commission_amount', Decimal('0')) + commission
+    return deltas
+
+
+@transaction.atomic
+def apply_sales(seller_order_ids, sign=1):
+    """Add (sign=1) or take back (sign=-1) the sales of the given packets. Returns the number of rollup rows touched."""
+    deltas = sales_deltas(seller_order_ids)
+    # Same row order in every batch, so concurrent batches cannot deadlock
+    keys = sorted(deltas, key=lambda key: (key[0].__name__, [str(value) for _, value in key[1]]))
+
+    for model in ROLLUP_MODELS:
+        model.objects.bulk_create(
+            [model(**dict(lookup), **deltas[(m, lookup)]['create']) for m, lookup in keys if m is model],
+            ignore_conflicts=True,
+        )
+    for key in keys:
+        model, lookup = key
+        entry = deltas[key]
+        changes = {
+            'order_count': F('order_count') + sign * len(entry['packets']),
+            'item_count': F('item_count') + sign * entry['item_count'],
+            'gross_amount': F('gross_amount') + sign * entry['gross_amount'],
+        }
+        if 'commission_amount' in entry:
+            changes['commission_amount'] = F('commission_amount') + sign * entry['commission_amount']
+        model.objects.filter(**dict(lookup)).update(**changes)
+    return len(keys)
+
+
+def _bulk_insert(model, rows):
+    batch = []
+    for row in rows:
+        batch.append(model(**row))
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+@transaction.atomic
+def rebuild(since=None):
+    """
+    Recompute every rollup from the day `since` (a date; None for all history) with grouped queries.
+    Stop the task workers meanwhile, or batches queued before the rebuild are counted twice.
+    """
+    start = timezone.make_aware(datetime.datetime.combine(since, datetime.time.min)) if since else None
+    packets = SellerOrder.objects.exclude(status=SellerOrder.Status.CANCELLED)
+    if start:
+        packets = packets.filter(created_at__gte=start)
+    items = OrderItem.objects.filter(seller_order__in=packets)
+
+    for model in ROLLUP_MODELS:
+        (model.objects.filter(bucket__gte=start) if start else model.objects.all()).delete()
+
+    tz = timezone.get_current_timezone()
+    totals = {'order_count': Count('seller_order', distinct=True), 'item_count': Sum('quantity'), 'gross_amount': Sum('total_price')}
+    for period, trunc in ((Period.HOUR, TruncHour), (Period.DAY, TruncDay)):
+        dated = items.annotate(bucket=trunc('seller_order__created_at', tzinfo=tz))
+
+        commissions = dict(
+            ((row['bucket'], row['seller_id']), row['commission'])
+            for row in packets.annotate(bucket=trunc('created_at', tzinfo=tz))
+            .values('bucket', 'seller_id').annotate(commission=Sum('commission_amount')).order_by()
+        )
+        sellers = dated.values('bucket', seller_id=F('seller_order__seller_id')).annotate(**totals).order_by()
+        _bulk_insert(SellerSales, (
+            dict(row, period=period, commission_amount=commissions.get((row['bucket'], row['seller_id']), 0))
+            for row in sellers.iterator()
+        ))
+        categories = (
+            dated.filter(variant__product__category__isnull=False)
+            .values('bucket', category_id=F('variant__product__category_id')).annotate(**totals).order_by()
+        )
+        _bulk_insert(CategorySales, (dict(row, period=period) for row in categories.iterator()))
+        products = (
+            dated.values('bucket', product_id=F('variant__product_id'))
+            .annotate(seller_id=Max('seller_order__seller_id'), **totals).order_by()
+        )
+        _bulk_insert(ProductSales, (dict(row, period=period) for row in products.iterator()))
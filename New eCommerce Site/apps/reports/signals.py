@@ -0,0 +1,17 @@
+# apps/reports/signals.py
+from django.dispatch import receiver
+from apps.orders.models import SellerOrder
+from apps.orders.signals import order_placed
+from apps.orders.transitions import on_transition
+from .tasks import record_sales
+
+# Queued in the order's own transaction, so a rollup batch exists exactly when its order change committed
+
+@receiver(order_placed)
+def add_placed_sales(sender, seller_order_ids, **kwargs):
+    record_sales.delay(seller_order_ids)
+
+@on_transition(SellerOrder, 'cancel')
+@on_transition(SellerOrder, 'reject')
+def remove_cancelled_sales(seller_order_ids):
+    record_sales.delay(seller_order_ids, -1)
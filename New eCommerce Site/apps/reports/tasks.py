@@ -0,0 +1,8 @@
+# apps/reports/tasks.py
+from apps.tasks.queue import task
+from .rollups import apply_sales
+
+@task
+def record_sales(seller_order_ids, sign=1):
+    """Add the packets to the sales rollups, or take them back out with sign=-1."""
+    apply_sales(seller_order_ids, sign)
@@ -1,3 +1,128 @@
-from django.test import TestCase
+# apps/reports/tests.py
+import csv
+import io
+import json
+from decimal import Decimal
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from apps.accounts.models import SellerProfile
+from apps.orders.models import Order, SellerOrder, OrderItem
+from apps.products.models import Category, Product, ProductVariant
+from apps.tasks.queue import run_pending
+from .models import SellerSales, CategorySales, ProductSales
+from .rollups import rebuild
 
-# Create your tests here.
+User = get_user_model()
+
+def snapshot():
+    return {
+        model.__name__: sorted(
+            (str(row.bucket), row.period, row.order_count, row.item_count, row.gross_amount)
+            for row in model.objects.filter(order_count__gt=0)
+        )
+        for model in (SellerSales, CategorySales, ProductSales)
+    }
+
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='buyer@test.com', password='password', role='BUYER')
+        self.sellers = [User.objects.create_user(email=f's{i}@test.com', password='password', role='SELLER') for i in range(2)]
+        SellerProfile.objects.create(user=self.sellers[0], business_name='S0', commission_rate=10)
+        category = Category.objects.create(name='C', slug='c')
+        self.variants = []
+        for i, seller in enumerate(self.sellers):
+            product = Product.objects.create(seller=seller, category=category, name=f'P{i}', slug=f'p{i}', status='ACTIVE')
+            self.variants.append(ProductVariant.objects.create(product=product, sku=f'SKU{i}', price=10, stock_quantity=50))
+
+    def checkout(self, quantities):
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.post('/api/orders/buyer/checkout/', {
+            'items': [{'variant_id': v.id, 'quantity': q} for v, q in zip(self.variants, quantities)],
+            'shipping_address': {}, 'billing_address': {},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_rollups_follow_orders_and_match_rebuild(self):
+        self.checkout([2, 1])
+        second = self.checkout([3, 1])
+        self.assertFalse(SellerSales.objects.exists()) # Applied by the task worker
+        run_pending()
+
+        day = SellerSales.objects.get(seller=self.sellers[0], period='DAY')
+        self.assertEqual((day.order_count, day.item_count, day.gross_amount, day.commission_amount), (2, 5, Decimal('50.00'), Decimal('5.00')))
+        self.assertEqual(CategorySales.objects.get(period='HOUR').gross_amount, Decimal('70.00'))
+
+        packet = SellerOrder.objects.get(order_id=second, seller=self.sellers[0])
+        self.client.force_authenticate(user=self.sellers[0])
+        self.client.post(f'/api/orders/seller/{packet.id}/reject/')
+        run_pending()
+        day.refresh_from_db()
+        self.assertEqual((day.order_count, day.item_count, day.commission_amount), (1, 2, Decimal('2.00')))
+
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_report_endpoints_read_rollups(self):
+        self.checkout([2, 1])
+        run_pending()
+
+        self.client.force_authenticate(user=self.sellers[0])
+        response = self.client.get('/api/reports/seller/?period=HOUR&hours=6')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals']['gross_amount'], Decimal('20.00'))
+        self.assertEqual(response.data['top_products'][0]['product__name'], 'P0')
+        self.assertEqual(self.client.get('/api/reports/seller/?period=WEEK').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/reports/platform/').status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(email='admin@test.com', password='password')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/reports/platform/')
+        self.assertEqual(response.data['totals']['order_count'], 2)
+        self.assertEqual(response.data['monthly'][0]['gross_amount'], Decimal('30.00'))
+        self.assertEqual([row['seller__seller_profile__business_name'] for row in response.data['top_sellers']], ['S0', None])
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email='=buyer@test.com', password='password', role='BUYER')
+        self.sellers = [User.objects.create_user(email=f's{i}@test.com', password='password', role='SELLER') for i in range(2)]
+        order = Order.objects.create(buyer=self.buyer, total_amount=30, shipping_address={}, billing_address={})
+        for i, seller in enumerate(self.sellers):
+            product = Product.objects.create(seller=seller, name=f'P{i}', slug=f'p{i}', status='ACTIVE')
+            variant = ProductVariant.objects.create(product=product, sku=f'SKU{i}', price=10, stock_quantity=5)
+            packet = SellerOrder.objects.create(order=order, seller=seller, total_amount=10 * (i + 1))
+            OrderItem.objects.create(seller_order=packet, variant=variant, quantity=i + 1, unit_price=10, total_price=10 * (i + 1))
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_admin_csv_export(self):
+        self.client.force_authenticate(user=User.objects.create_superuser(email='admin@test.com', password='password'))
+        rows = list(csv.DictReader(io.StringIO(self.download('/api/reports/export/items/?output=csv'))))
+        self.assertEqual([(r['sku'], r['quantity']) for r in rows], [('SKU0', '1'), ('SKU1', '2')])
+
+        rows = list(csv.DictReader(io.StringIO(self.download(f'/api/reports/export/orders/?seller={self.sellers[1].id}'))))
+        self.assertEqual(len(rows), 1) # Listed once although the join would match twice
+        self.assertEqual(rows[0]['buyer_email'], "'=buyer@test.com") # Not a spreadsheet formula
+
+        self.assertEqual(self.download('/api/reports/export/items/?start=2000-01-01&end=2000-01-02').count('\n'), 1) # Header only
+        self.assertEqual(self.client.get('/api/reports/export/items/?start=yesterday').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seller_gets_only_own_rows(self):
+        self.client.force_authenticate(user=self.sellers[0])
+        lines = self.download(f'/api/reports/export/seller_orders/?output=jsonl&seller={self.sellers[1].id}').splitlines()
+        self.assertEqual([json.loads(line)['seller_id'] for line in lines], [self.sellers[0].id])
+        self.assertEqual(self.client.get('/api/reports/export/orders/').status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.buyer)
+        self.assertEqual(self.client.get('/api/reports/export/items/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_writes_jsonl(self):
+        out = io.StringIO()
+        call_command('export_sales', 'items', '--output', 'jsonl', '--seller', str(self.sellers[1].id), stdout=out)
+        self.assertEqual([json.loads(line)['total_price'] for line in out.getvalue().splitlines()], ['20.00'])
@@ -0,0 +1,9 @@
+# apps/reports/urls.py
+from django.urls import path
+from .views import SellerReportView, PlatformReportView, ExportView
+
+urlpatterns = [
+    path('seller/', SellerReportView.as_view(), name='seller-report'),
+    path('platform/', PlatformReportView.as_view(), name='platform-report'),
+    path('export/<str:dataset>/', ExportView.as_view(), name='export'),
+]
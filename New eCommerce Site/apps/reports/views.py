@@ -1,3 +1,136 @@
-from django.shortcuts import render
+# apps/reports/views.py
+import datetime
+from datetime import timedelta
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.accounts.permissions import IsSeller
+from .models import Period, SellerSales, CategorySales, ProductSales
+from .rollups import buckets
+from .exports import DATASETS, FORMATS, export_rows, render
 
-# Create your views here.
+# Upper bounds of ?days / ?hours, so a request reads a bounded number of rollup rows
+MAX_WINDOW = {Period.DAY: 366, Period.HOUR: 24 * 14}
+DEFAULT_WINDOW = {Period.DAY: 30, Period.HOUR: 24}
+TOP_LIMIT = 5
+SALES = {'order_count': Sum('order_count'), 'item_count': Sum('item_count'), 'gross_amount': Sum('gross_amount')}
+
+def _window(request):
+    """(period, first bucket) from ?period=DAY&days=30 or ?period=HOUR&hours=24, or an error Response."""
+    period = request.query_params.get('period', Period.DAY).upper()
+    if period not in MAX_WINDOW:
+        return Response({'error': 'period must be DAY or HOUR'}, status=status.HTTP_400_BAD_REQUEST)
+    unit = 'days' if period == Period.DAY else 'hours'
+    try:
+        size = int(request.query_params.get(unit, DEFAULT_WINDOW[period]))
+    except ValueError:
+        return Response({'error': f'{unit} must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    size = min(max(size, 1), MAX_WINDOW[period])
+    return period, buckets(timezone.now())[period] - timedelta(**{unit: size - 1})
+
+def _top(queryset, *fields):
+    return list(queryset.values(*fields).annotate(**SALES).order_by('-gross_amount')[:TOP_LIMIT])
+
+def _totals(queryset, **extra):
+    totals = queryset.aggregate(**SALES, **extra)
+    return {key: value or 0 for key, value in totals.items()}
+
+
+class SellerReportView(APIView):
+    """
+    Seller dashboard: totals, series and top products of the window, read from the rollups only.
+    ?period=DAY&days=30 (default) or ?period=HOUR&hours=24
+    """
+    permission_classes = [permissions.IsAuthenticated, IsSeller]
+
+    def get(self, request):
+        window = _window(request)
+        if isinstance(window, Response):
+            return window
+        period, since = window
+
+        rows = SellerSales.objects.filter(seller=request.user, period=period, bucket__gte=since)
+        products = ProductSales.objects.filter(seller=request.user, period=period, bucket__gte=since)
+        return Response({
+            'period': period,
+            'since': since,
+            'totals': _totals(rows, commission_amount=Sum('commission_amount')),
+            'series': list(rows.order_by('bucket').values('bucket', 'order_count', 'item_count', 'gross_amount', 'commission_amount')),
+            'top_products': _top(products, 'product_id', 'product__name'),
+        })
+
+
+class PlatformReportView(APIView):
+    """
+    Admin reports: platform totals, series, top sellers/categories/products of the
+    window and the last 12 months, read from the rollups only. order_count
+    counts seller packets. Same query parameters as SellerReportView.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        window = _window(request)
+        if isinstance(window, Response):
+            return window
+        period, since = window
+
+        rows = SellerSales.objects.filter(period=period, bucket__gte=since)
+        first_month = buckets(timezone.now())[Period.DAY].replace(day=1)
+        for _ in range(11):
+            first_month = (first_month - timedelta(days=1)).replace(day=1)
+        monthly = (
+            SellerSales.objects.filter(period=Period.DAY, bucket__gte=first_month)
+            .annotate(month=TruncMonth('bucket')).values('month')
+            .annotate(**SALES, commission_amount=Sum('commission_amount')).order_by('-month')
+        )
+        return Response({
+            'period': period,
+            'since': since,
+            'totals': _totals(rows, commission_amount=Sum('commission_amount')),
+            'series': list(
+                rows.values('bucket').annotate(**SALES, commission_amount=Sum('commission_amount')).order_by('bucket')
+            ),
+            'monthly': list(monthly),
+            'top_sellers': _top(rows, 'seller_id', 'seller__seller_profile__business_name'),
+            'top_categories': _top(CategorySales.objects.filter(period=period, bucket__gte=since), 'category_id', 'category__name'),
+            'top_products': _top(ProductSales.objects.filter(period=period, bucket__gte=since), 'product_id', 'product__name'),
+        })
+
+
+class ExportView(APIView):
+    """
+    Streams orders, seller_orders or items as CSV or JSON Lines.
+    ?output=csv|jsonl&start=YYYY-MM-DD&end=YYYY-MM-DD (end excluded)
+    Admins may add &seller=<id>; sellers always get their own packets and items only.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, dataset):
+        is_admin = request.user.is_staff
+        if not is_admin and request.user.role != 'SELLER':
+            return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+        if dataset not in DATASETS or (not is_admin and dataset == 'orders'):
+            return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get('output', 'csv')
+        if output not in FORMATS:
+            return Response({'error': 'output must be csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = (
+                datetime.date.fromisoformat(request.query_params[key]) if request.query_params.get(key) else None
+                for key in ('start', 'end')
+            )
+            seller_id = int(request.query_params['seller']) if is_admin and request.query_params.get('seller') else None
+        except ValueError:
+            return Response({'error': 'start/end must be YYYY-MM-DD dates, seller a user id'}, status=status.HTTP_400_BAD_REQUEST)
+        if not is_admin:
+            seller_id = request.user.id
+
+        columns, rows = export_rows(dataset, start, end, seller_id)
+        response = StreamingHttpResponse(render(columns, rows, output), content_type=FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}-{start or "all"}-{end or "now"}.{output}"'
+        return response
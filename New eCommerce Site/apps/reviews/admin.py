@@ -14,8 +14,14 @@ class ReviewAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected reviews as Published')
     def mark_published(self, request, queryset):
-        queryset.update(status=Review.Status.PUBLISHED)
+        self._set_status(queryset, Review.Status.PUBLISHED)
 
     @admin.action(description='Mark selected reviews as Rejected')
     def mark_rejected(self, request, queryset):
-        queryset.update(status=Review.Status.REJECTED)
+        self._set_status(queryset, Review.Status.REJECTED)
+
+    def _set_status(self, queryset, status):
+        # Saved one by one so the rating signals apply each delta
+        for review in queryset.exclude(status=status):
+            review.status = status
+            review.save(update_fields=['status', 'updated_at'])
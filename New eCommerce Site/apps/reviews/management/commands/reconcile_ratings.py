@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.reviews.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute product rating totals from published reviews and repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Only check these products')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(options['product_ids'] or None)
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'{len(fixed)} products repaired: {fixed}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All product ratings are consistent.'))
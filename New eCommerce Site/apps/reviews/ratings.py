@@ -0,0 +1,77 @@
+# apps/reviews/ratings.py
+from django.db.models import F, Count, Q, Sum, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from apps.products.models import Product
+from apps.products.cache import invalidate_catalog, PRODUCTS
+from .models import Review
+
+STARS = range(1, 6)
+
+def contribution(product_id, status, rating):
+    """What a review adds to its product's totals: (product_id, rating) or None."""
+    if product_id and status == Review.Status.PUBLISHED and rating:
+        return (product_id, rating)
+    return None
+
+def apply_rating_change(old, new):
+    """
+    Move a review's contribution from `old` to `new` (both from contribution()).
+    Only the affected counters are touched, with F() expressions, so
+    concurrent writes don't overwrite each other and nothing else on the
+    product row is rewritten. No-op when nothing rating-related changed.
+    """
+    if old == new:
+        return
+    deltas = {} # { product_id: {column: delta} }
+    for change, sign in ((old, -1), (new, 1)):
+        if change is None:
+            continue
+        product_id, rating = change
+        columns = deltas.setdefault(product_id, {})
+        for column, value in (('review_count', 1), ('rating_sum', rating), (f'rating_count_{rating}', 1)):
+            columns[column] = columns.get(column, 0) + sign * value
+
+    for product_id, columns in deltas.items():
+        updates = {column: F(column) + delta for column, delta in columns.items() if delta}
+        # Right-hand side sees the pre-update values, so apply the same deltas here
+        new_sum = F('rating_sum') + columns.get('rating_sum', 0)
+        new_count = F('review_count') + columns.get('review_count', 0)
+        updates['average_rating'] = Coalesce(
+            Round(Cast(new_sum, FloatField()) / NullIf(new_count, 0), 2),
+            Value(0.0),
+        )
+        Product.objects.filter(pk=product_id).update(**updates)
+    invalidate_catalog(PRODUCTS)
+
+def reconcile_ratings(product_ids=None):
+    """
+    Recompute totals from the published reviews and fix products that drifted.
+    Returns the ids of the products that were corrected.
+    """
+    reviews = Review.objects.filter(status=Review.Status.PUBLISHED)
+    products = Product.objects.all()
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        products = products.filter(pk__in=product_ids)
+
+    actual = {
+        row.pop('product_id'): row for row in
+        reviews.values('product_id').annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_count_{star}': Count('id', filter=Q(rating=star)) for star in STARS}
+        )
+    }
+    columns = ['review_count', 'rating_sum'] + [f'rating_count_{star}' for star in STARS]
+    empty = {column: 0 for column in columns}
+
+    fixed = []
+    for row in products.values('id', 'average_rating', *columns).iterator():
+        expected = actual.get(row['id'], empty)
+        average = round(expected['rating_sum'] / expected['review_count'], 2) if expected['review_count'] else 0
+        if any(row[c] != expected[c] for c in columns) or float(row['average_rating']) != average:
+            Product.objects.filter(pk=row['id']).update(average_rating=average, **expected)
+            fixed.append(row['id'])
+    if fixed:
+        invalidate_catalog(PRODUCTS)
+    return fixed
@@ -1,15 +1,36 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg
 from .models import Review
+from .ratings import contribution, apply_rating_change
+from .tasks import reconcile_product_ratings
+
+# Each instance remembers what it contributed when it was loaded/saved,
+# so a save only applies the difference (no COUNT/AVG over all reviews).
+UNKNOWN = object()
+
+@receiver(post_init, sender=Review)
+def remember_rating(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._rating_contribution = None
+    elif {'product_id', 'status', 'rating'} - instance.__dict__.keys():
+        # Loaded with deferred fields, old state is not known
+        instance._rating_contribution = UNKNOWN
+    else:
+        instance._rating_contribution = contribution(instance.product_id, instance.status, instance.rating)
+
+def _apply(instance, new):
+    old = instance._rating_contribution
+    if old is UNKNOWN:
+        # Full recount of the product, off the request
+        reconcile_product_ratings.delay([instance.product_id])
+    else:
+        apply_rating_change(old, new)
+    instance._rating_contribution = new
 
 @receiver(post_save, sender=Review)
-@receiver(post_delete, sender=Review)
 def update_product_rating(sender, instance, **kwargs):
-    product = instance.product
-    reviews = product.reviews.filter(status=Review.Status.PUBLISHED)
-    
-    product.review_count = reviews.count()
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0.0
-    product.average_rating = round(avg_rating, 2)
-    product.save()
+    _apply(instance, contribution(instance.product_id, instance.status, instance.rating))
+
+@receiver(post_delete, sender=Review)
+def remove_product_rating(sender, instance, **kwargs):
+    _apply(instance, None)
@@ -0,0 +1,8 @@
+# apps/reviews/tasks.py
+from apps.tasks.queue import task
+from .ratings import reconcile_ratings
+
+@task
+def reconcile_product_ratings(product_ids):
+    """Recompute the rating aggregates of the given products from their reviews."""
+    reconcile_ratings(product_ids)
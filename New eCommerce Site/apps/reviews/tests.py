@@ -1,3 +1,60 @@
+# apps/reviews/tests.py
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from apps.products.models import Product
+from .models import Review
 
-# Create your tests here.
+User = get_user_model()
+
+class RatingAggregationTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='P', slug='p', status='ACTIVE')
+        self.users = [User.objects.create_user(email=f'u{i}@test.com', password='password') for i in range(3)]
+
+    def review(self, user, rating, status=Review.Status.PUBLISHED):
+        return Review.objects.create(product=self.product, author=user, rating=rating, comment='.', status=status)
+
+    def assertTotals(self, count, total, average, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, count)
+        self.assertEqual(self.product.rating_sum, total)
+        self.assertEqual(self.product.average_rating, Decimal(average))
+        self.assertEqual([getattr(self.product, f'rating_count_{s}') for s in range(1, 6)], histogram)
+
+    def test_deltas_follow_status_and_rating(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        pending = self.review(self.users[2], 1, status=Review.Status.PENDING)
+        self.assertTotals(2, 9, '4.50', [0, 0, 0, 1, 1])
+
+        pending.status = Review.Status.PUBLISHED
+        pending.save()
+        self.assertTotals(3, 10, '3.33', [1, 0, 0, 1, 1])
+
+        first.rating = 2
+        first.save()
+        self.assertTotals(3, 7, '2.33', [1, 1, 0, 1, 0])
+
+        first.delete()
+        self.assertTotals(2, 5, '2.50', [1, 0, 0, 1, 0])
+
+    def test_moderation_edit_does_not_touch_product(self):
+        review = self.review(self.users[0], 5)
+        review = Review.objects.get(pk=review.pk)
+        review.moderation_note = 'ok'
+        with CaptureQueriesContext(connection) as ctx:
+            review.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'products_product' in q['sql']])
+
+    def test_reconcile_repairs_drift(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        Product.objects.filter(pk=self.product.pk).update(review_count=7, rating_sum=1, average_rating=0)
+
+        call_command('reconcile_ratings', stdout=StringIO())
+        self.assertTotals(2, 8, '4.00', [0, 0, 1, 0, 1])
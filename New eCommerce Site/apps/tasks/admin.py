@@ -0,0 +1,19 @@
+# tasks/admin.py
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('name', 'args', 'kwargs', 'attempts', 'locked_by', 'locked_at', 'last_error', 'created_at', 'updated_at')
+    actions = ['retry_selected']
+
+    @admin.action(description='Seçili görevleri yeniden kuyruğa al')
+    def retry_selected(self, request, queryset):
+        count = queryset.exclude(status=Task.Status.RUNNING).update(
+            status=Task.Status.QUEUED, attempts=0, run_at=timezone.now(), updated_at=timezone.now(),
+        )
+        self.message_user(request, f'{count} görev yeniden kuyruğa alındı.')
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+from apps.tasks.queue import run_pending, requeue_stale, purge_done, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (keep one or more of these running next to the web server)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due now and exit')
+        parser.add_argument('--batch', type=int, default=20, help='Tasks claimed per query')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--keep-days', type=int, default=7, help='Finished tasks are deleted after this many days')
+
+    def handle(self, *args, **options):
+        worker = worker_id()
+        next_purge = timezone.now()
+        try:
+            while True:
+                try:
+                    requeue_stale()
+                    if timezone.now() >= next_purge:
+                        purge_done(timezone.now() - timedelta(days=options['keep_days']))
+                        next_purge = timezone.now() + timedelta(hours=1)
+
+                    succeeded, failed = run_pending(worker, options['batch'])
+                    if succeeded or failed:
+                        self.stdout.write(self.style.SUCCESS(f'{succeeded} tasks done, {failed} failed.'))
+                except OperationalError as exc:
+                    # e.g. 'database is locked' on SQLite while another worker claims: try again next round
+                    self.stderr.write(self.style.WARNING(f'Database busy, retrying: {exc}'))
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Worker stopped.'))
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='görev adı')),
+                ('args', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='argümanlar')),
+                ('kwargs', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='anahtar argümanlar')),
+                ('status', models.CharField(choices=[('QUEUED', 'Sırada'), ('RUNNING', 'Çalışıyor'), ('DONE', 'Tamamlandı'), ('FAILED', 'Başarısız')], default='QUEUED', max_length=20, verbose_name='durum')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='deneme sayısı')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='en fazla deneme')),
+                ('run_at', models.DateTimeField(verbose_name='çalışma zamanı')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='çalışan')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='alınma zamanı')),
+                ('last_error', models.TextField(blank=True, verbose_name='son hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='oluşturulma tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='güncellenme tarihi')),
+            ],
+            options={
+                'verbose_name': 'Görev',
+                'verbose_name_plural': 'Görevler',
+                'indexes': [models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# tasks/models.py
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+class Task(models.Model):
+    """A queued call of a registered @task function (see tasks/queue.py)."""
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', _('Sırada')
+        RUNNING = 'RUNNING', _('Çalışıyor')
+        DONE = 'DONE', _('Tamamlandı')
+        FAILED = 'FAILED', _('Başarısız')
+
+    name = models.CharField(_('görev adı'), max_length=200)
+    args = models.JSONField(_('argümanlar'), default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(_('anahtar argümanlar'), default=dict, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(_('durum'), max_length=20, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(_('deneme sayısı'), default=0)
+    max_attempts = models.PositiveIntegerField(_('en fazla deneme'), default=5)
+    run_at = models.DateTimeField(_('çalışma zamanı'))
+    locked_by = models.CharField(_('çalışan'), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_('alınma zamanı'), null=True, blank=True)
+    last_error = models.TextField(_('son hata'), blank=True)
+
+    created_at = models.DateTimeField(_('oluşturulma tarihi'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('güncellenme tarihi'), auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Worker poll: WHERE status = 'QUEUED' AND run_at <= now ORDER BY run_at
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+        verbose_name = _('Görev')
+        verbose_name_plural = _('Görevler')
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
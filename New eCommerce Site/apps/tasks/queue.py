@@ -0,0 +1,194 @@
+# apps/tasks/queue.py
+"""
+Durable, database-backed task queue.
+
+    @task(max_attempts=5)
+    def notify_buyer(seller_order_id, content): ...
+
+    notify_buyer.delay(seller_order.id, 'Siparişiniz onaylandı')
+
+.delay() inserts a Task row in the caller's transaction, so a task exists
+exactly when the change that caused it is committed. Workers
+(`manage.py run_tasks`) claim due rows with SELECT ... FOR UPDATE SKIP LOCKED
+and run every task in one transaction together with marking it done, so
+database side effects happen once. Long tasks that commit their work in
+steps themselves (@task(atomic=False)) run outside that transaction and must
+be safe to run again. Failures are retried with exponential
+backoff; arguments must be JSON serializable.
+
+A task RUNNING longer than its timeout (@task(timeout=...), default
+TASKS_VISIBILITY_TIMEOUT, counted from the moment it starts) is assumed lost
+with its worker and queued again. Every status change is conditional on the
+worker still holding the row, so a run that outlived its timeout cannot mark
+the new run's row done or failed; its transaction is rolled back instead.
+
+With TASKS_EAGER = True (tests) .delay() runs the function inline instead.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+class TaskLost(Exception):
+    """The task's row was queued again (or taken by another worker) while it ran."""
+
+
+class TaskFunction:
+    def __init__(self, func, name, max_attempts, timeout=None, atomic=True):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.atomic = atomic
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, max_attempts=self.max_attempts)
+
+
+def task(func=None, *, name=None, max_attempts=5, timeout=None, atomic=True):
+    """
+    Register a function as a task; usable as @task or @task(max_attempts=...).
+    `timeout` (seconds) replaces TASKS_VISIBILITY_TIMEOUT for tasks that run longer.
+    `atomic=False` runs the function outside the task's transaction, for tasks
+    that commit as they go (one transaction per chunk) and can be run again.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = TaskFunction(func, task_name, max_attempts, timeout, atomic)
+        return _registry[task_name]
+    return register(func) if func else register
+
+
+def enqueue(name, args=(), kwargs=None, countdown=0, max_attempts=5):
+    kwargs = kwargs or {}
+    if getattr(settings, 'TASKS_EAGER', False):
+        _registry[name](*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=name, args=list(args), kwargs=kwargs, max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def backoff(attempts):
+    """Seconds before retry n: base * 2^(n-1), capped, with +-20% jitter so retries spread out."""
+    base = getattr(settings, 'TASKS_RETRY_BASE_SECONDS', 5)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'TASKS_RETRY_MAX_SECONDS', 3600))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale():
+    """Tasks RUNNING longer than their timeout belong to a dead worker; queue them again."""
+    now = timezone.now()
+    by_timeout = defaultdict(list)
+    for func in _registry.values():
+        if func.timeout:
+            by_timeout[func.timeout].append(func.name)
+    default_cutoff = now - timedelta(seconds=getattr(settings, 'TASKS_VISIBILITY_TIMEOUT', 300))
+    stale = Q(locked_at__lt=default_cutoff) & ~Q(name__in=[name for names in by_timeout.values() for name in names])
+    for timeout, names in by_timeout.items():
+        stale |= Q(name__in=names, locked_at__lt=now - timedelta(seconds=timeout))
+    return Task.objects.filter(stale, status=Task.Status.RUNNING).update(
+        status=Task.Status.QUEUED, locked_by='', locked_at=None, updated_at=now,
+    )
+
+
+def claim(worker, batch_size):
+    """
+    Lock up to batch_size due tasks for this worker, oldest first.
+    SKIP LOCKED is a no-op on SQLite, so two workers may pick the same ids:
+    the UPDATE only takes rows still QUEUED, and only the rows this call
+    stamped (locked_by, locked_at) are returned.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.Status.QUEUED, run_at__lte=now)
+            .order_by('run_at').values_list('id', flat=True)[:batch_size]
+        )
+        Task.objects.filter(pk__in=ids, status=Task.Status.QUEUED).update(
+            status=Task.Status.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+    return list(Task.objects.filter(pk__in=ids, locked_by=worker, locked_at=now).order_by('run_at', 'id'))
+
+
+def run_task(task_row):
+    """Run one claimed task. Returns True when it succeeded, False when it failed, None when it was no longer ours."""
+    # The timeout runs from here, not from the claim of the whole batch
+    started = timezone.now()
+    claimed = Task.objects.filter(pk=task_row.pk, status=Task.Status.RUNNING, locked_by=task_row.locked_by)
+    if not claimed.filter(locked_at=task_row.locked_at).update(locked_at=started, updated_at=started):
+        logger.warning('Task %s #%s was queued again before it started; skipped', task_row.name, task_row.pk)
+        return None
+    owned = claimed.filter(locked_at=started)
+    try:
+        func = _registry.get(task_row.name)
+        if func is None:
+            raise LookupError(f'Unknown task {task_row.name}')
+        with transaction.atomic() if func.atomic else nullcontext():
+            func(*task_row.args, **task_row.kwargs)
+            if not owned.update(
+                status=Task.Status.DONE, last_error='', locked_by='', locked_at=None, updated_at=timezone.now(),
+            ):
+                raise TaskLost(task_row.pk) # Roll back: the row's new run does the work
+        return True
+    except TaskLost:
+        logger.warning(
+            'Task %s #%s outlived its timeout and was queued again%s', task_row.name, task_row.pk,
+            '; rolled back' if func.atomic else '',
+        )
+        return None
+    except Exception:
+        logger.exception('Task %s #%s failed (attempt %s)', task_row.name, task_row.pk, task_row.attempts)
+        now = timezone.now()
+        if task_row.attempts >= task_row.max_attempts:
+            changes = {'status': Task.Status.FAILED}
+        else:
+            changes = {'status': Task.Status.QUEUED, 'run_at': now + timedelta(seconds=backoff(task_row.attempts))}
+        owned.update(
+            last_error=traceback.format_exc()[-4000:], locked_by='', locked_at=None, updated_at=now, **changes,
+        )
+        return False
+
+
+def run_pending(worker=None, batch_size=20):
+    """Run due tasks until none is left. Returns (succeeded, failed)."""
+    worker = worker or worker_id()
+    succeeded = failed = 0
+    while True:
+        batch = claim(worker, batch_size)
+        if not batch:
+            return succeeded, failed
+        for task_row in batch:
+            result = run_task(task_row)
+            if result:
+                succeeded += 1
+            elif result is False:
+                failed += 1
+
+
+def purge_done(older_than):
+    """Delete finished tasks last updated before `older_than`."""
+    return Task.objects.filter(status=Task.Status.DONE, updated_at__lt=older_than).delete()[0]
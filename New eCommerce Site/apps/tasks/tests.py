@@ -0,0 +1,112 @@
+# apps/tasks/tests.py
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Task
+from .queue import task, run_pending, requeue_stale, claim, run_task
+
+calls = []
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky():
+    raise ValueError('boom')
+
+@task(name='tests.stepwise', max_attempts=1, atomic=False)
+def stepwise():
+    record.delay('committed step')
+    raise ValueError('later step failed')
+
+@task(name='tests.slow', timeout=7200)
+def slow():
+    pass
+
+@task(name='tests.overran')
+def overran():
+    record.delay('side effect')
+    # Meanwhile the row passed its timeout and another worker claimed it
+    Task.objects.filter(name='tests.overran').update(locked_by='worker:2', locked_at=timezone.now())
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_queues_and_worker_runs(self):
+        record.delay('a')
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(calls, ['a'])
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.attempts, row.locked_by), (Task.Status.DONE, 1, ''))
+        self.assertEqual(run_pending(), (0, 0))
+
+    def test_failure_backs_off_then_fails(self):
+        flaky.delay()
+        self.assertEqual(run_pending(), (0, 1))
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.attempts), (Task.Status.QUEUED, 1))
+        self.assertGreater(row.run_at, timezone.now())
+        self.assertIn('boom', row.last_error)
+        self.assertEqual(run_pending(), (0, 0)) # Not due yet
+
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Task.Status.FAILED, 2))
+
+    def test_claim_returns_only_rows_it_took(self):
+        record.delay('d')
+        first = claim('worker:1', 10)
+        self.assertEqual([row.locked_by for row in first], ['worker:1'])
+        # A second worker whose SELECT read the id before the first one's UPDATE (no SKIP LOCKED on SQLite)
+        stale_read = mock.MagicMock()
+        stale_read.filter.return_value.order_by.return_value.values_list.return_value.__getitem__.return_value = [first[0].pk]
+        with mock.patch.object(Task.objects, 'select_for_update', return_value=stale_read):
+            self.assertEqual(claim('worker:2', 10), [])
+        self.assertEqual(Task.objects.get().locked_by, 'worker:1')
+
+    def test_stale_running_task_is_requeued(self):
+        record.delay('b')
+        Task.objects.update(status=Task.Status.RUNNING, locked_by='dead:1', locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        run_pending()
+        self.assertEqual(calls, ['b'])
+
+    def test_task_timeout_replaces_the_default(self):
+        record.delay('e')
+        slow.delay()
+        Task.objects.update(status=Task.Status.RUNNING, locked_by='busy:1', locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Task.objects.get(name='tests.slow').status, Task.Status.RUNNING)
+
+    def test_requeued_task_is_not_started(self):
+        record.delay('f')
+        batch = claim('worker:1', 10)
+        Task.objects.update(locked_by='worker:2', locked_at=timezone.now())
+        self.assertIsNone(run_task(batch[0]))
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().locked_by, 'worker:2')
+
+    def test_task_that_lost_its_row_is_rolled_back(self):
+        overran.delay()
+        self.assertEqual(run_pending('worker:1'), (0, 0))
+        row = Task.objects.get() # The task it queued was rolled back with it
+        self.assertEqual((row.status, row.locked_by), (Task.Status.RUNNING, 'worker:1'))
+
+    def test_non_atomic_task_keeps_its_committed_steps(self):
+        stepwise.delay()
+        self.assertEqual(run_pending(), (1, 1)) # The step's own task ran too
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', 'status')),
+            [('tests.record', Task.Status.DONE), ('tests.stepwise', Task.Status.FAILED)],
+        )
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        record.delay('c')
+        self.assertEqual(calls, ['c'])
+        self.assertFalse(Task.objects.exists())
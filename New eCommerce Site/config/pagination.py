@@ -0,0 +1,65 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by (created_at, id), newest first.
+    DRF's cursor stores the position in the FIRST ordering field only (the
+    last seen created_at) plus an offset that counts the rows sharing that
+    value, so each page is a range query on an indexed column no matter how
+    deep the client pages, and rows inserted meanwhile land on the first page
+    instead of shifting the ones after it. `id` only fixes the order of rows
+    created in the same tick; those are skipped by offset, not by id.
+
+    Views can change the defaults with:
+      cursor_ordering = ('-updated_at', '-id')
+      max_page_size = 50
+
+    Compatibility mode (settings.API_PAGINATION_LEGACY_MODE, on by default):
+    requests that send neither `cursor` nor `page_size` get a plain JSON list
+    like before, bounded by LEGACY_PAGE_SIZE. `X-Has-More: true` tells that
+    the list was cut there, and the `Link` header holds the next page. Clients opt in to the {next, previous, results} envelope
+    by sending one of the two parameters.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    LEGACY_PAGE_SIZE = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = self.is_legacy_request(request)
+        self.view_max_page_size = getattr(view, 'max_page_size', None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_legacy_request(self, request):
+        if not getattr(settings, 'API_PAGINATION_LEGACY_MODE', True):
+            return False
+        params = request.query_params
+        return self.cursor_query_param not in params and self.page_size_query_param not in params
+
+    def get_page_size(self, request):
+        if self.legacy:
+            return self.LEGACY_PAGE_SIZE
+        page_size = super().get_page_size(request)
+        if self.view_max_page_size:
+            page_size = min(page_size, self.view_max_page_size)
+        return page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def get_paginated_response(self, data):
+        if self.legacy:
+            headers = {'X-Has-More': 'true' if self.has_next else 'false'}
+            next_link = self.get_next_link()
+            if next_link:
+                headers['Link'] = f'<{next_link}>; rel="next"'
+            return Response(data, headers=headers)
+        return super().get_paginated_response(data)
@@ -49,6 +49,9 @@ INSTALLED_APPS = [
     'apps.disputes',
     'apps.campaigns',
     'apps.reports',
+    'apps.tasks',
+    'apps.blobs',
+    'apps.assets',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -66,6 +69,8 @@ MIDDLEWARE = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Let cross-origin pages read the pagination headers (config/pagination.py, messaging windows)
+CORS_EXPOSE_HEADERS = ['Link', 'X-Has-More']
 CSRF_TRUSTED_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
 # Since frontend is served via file://, CORS_ALLOW_ALL_ORIGINS is necessary.
 # To make it work without CSRF issues for this simple demo:
@@ -123,9 +128,82 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = str(BASE_DIR / 'staticfiles')
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Public catalog responses (apps/products/cache.py). Per-process by default;
+    # use FileBasedCache (LOCATION=BASE_DIR / 'cache' / 'catalog') or RedisCache
+    # to share it between workers.
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog',
+    },
+}
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TIMEOUT = 300
+
+# Real-time messaging (apps/messaging/broker.py). InProcessBroker only reaches
+# clients connected to the same worker; with several ASGI workers use
+# 'apps.messaging.broker.RedisBroker' and MESSAGING_BROKER_OPTIONS = {'url': ...}.
+# Messages saved elsewhere (the `run_tasks` workers' order notifications) still reach
+# streams and long-polls within a couple of seconds: both re-check the database.
+MESSAGING_BROKER = 'apps.messaging.broker.InProcessBroker'
+MESSAGING_BROKER_OPTIONS = {}
+
+# Stock put back (cancellations, restocks) is spread over this many counter rows
+# per variant and folded in by `manage.py compact_inventory` (apps/products/inventory.py).
+INVENTORY_STOCK_SHARDS = 8
+
+# Stock held for a buyer entering checkout (apps/orders/holds.py); expired holds
+# are given back by `manage.py release_expired_holds`.
+CART_HOLD_SECONDS = 600
+
+# How long a completed request can be replayed by its Idempotency-Key
+# (apps/orders/idempotency.py); `manage.py purge_idempotency_keys` deletes older keys.
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+
+# Seller commission rates are cached this long (apps/orders/settlement.py);
+# a SellerProfile change drops its entry at once.
+COMMISSION_RATE_CACHE_TIMEOUT = 3600
+
+# Background tasks (apps/tasks/queue.py) are run by `manage.py run_tasks`.
+# Eager mode runs them inline at .delay() instead, for tests and quick local setups.
+TASKS_EAGER = False
+# A task RUNNING longer than this is assumed lost with its worker and queued again;
+# long tasks set their own with @task(timeout=...)
+TASKS_VISIBILITY_TIMEOUT = 300
+
+# Bulk product uploads up to this size are imported during the request,
+# bigger ones by the task queue (apps/products/imports.py).
+PRODUCT_IMPORT_INLINE_BYTES = 256 * 1024
+
+# Product and category images are re-encoded (WebP + JPEG) at these widths by the
+# task workers, in a pool of this many processes (apps/products/renditions.py).
+IMAGE_RENDITION_WIDTHS = (160, 320, 640, 1280)
+IMAGE_RENDITION_PROCESSES = 2
+
+# Resumable uploads (apps/blobs/uploads.py): largest file and chunk accepted, and how
+# long an untouched session is kept before `manage.py collect_blobs` removes it.
+UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+UPLOAD_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 3600
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = str(BASE_DIR / 'media')
 
+# /site/ serves FRONTEND_BUILD_ROOT once `manage.py build_frontend` has written it
+# (fingerprinted, precompressed), frontend/ as is until then (apps/assets/serving.py);
+# checked on every request. Rebuild after editing frontend/, or delete the build
+# to serve the sources again.
+FRONTEND_ROOT = str(BASE_DIR / 'frontend')
+FRONTEND_BUILD_ROOT = str(BASE_DIR / 'frontend_build')
+# Serve MEDIA_ROOT through Django; in production leave it to the web server
+SERVE_MEDIA = DEBUG
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'apps.accounts.authentication.UnsafeSessionAuthentication',
@@ -133,4 +211,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.CreatedAtCursorPagination',
 }
+
+# Clients that don't send `cursor`/`page_size` still get plain JSON lists
+# (see config/pagination.py). Turn off once the frontend reads `results`.
+API_PAGINATION_LEGACY_MODE = True
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.views.static import serve
 from django.views.generic import RedirectView
+from apps.assets.serving import serve, serve_frontend
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,12 +12,20 @@ urlpatterns = [
     path('api/messaging/', include('apps.messaging.urls')),
     path('api/reviews/', include('apps.reviews.urls')),
     path('api/disputes/', include('apps.disputes.urls')),
+    path('api/reports/', include('apps.reports.urls')),
+    path('api/uploads/', include('apps.blobs.urls')),
     
     # Serve Static Frontend for Demo
-    re_path(r'^site/(?P<path>.*)$', serve, {'document_root': str(settings.BASE_DIR / 'frontend')}),
+    re_path(r'^site/(?P<path>.*)$', serve_frontend),
     path('', RedirectView.as_view(url='/site/buyer/index.html', permanent=False)),
 ]
 
-from django.conf.urls.static import static
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.SERVE_MEDIA:
+    media = settings.MEDIA_URL.lstrip('/')
+    # Unfinished uploads (apps/blobs/uploads.py) are never served
+    private = ('blobs/tmp/',)
+    urlpatterns += [
+        # Blobs and renditions are named by their content hash: cached for good
+        re_path(rf'^{media}(?P<path>(?:blobs/|renditions/).*)$', serve, {'document_root': settings.MEDIA_ROOT, 'immutable': True, 'hidden': private}),
+        re_path(rf'^{media}(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT, 'hidden': private}),
+    ]
@@ -0,0 +1,12 @@
+// frontend/images.js
+// <picture> markup for an API image: WebP and JPEG renditions via srcset (see
+// apps/products/renditions.py), the original only until the renditions exist.
+function responsiveImage(src, srcset, sizes, attrs = '') {
+    if (!srcset || !srcset.jpeg) {
+        return `<img src="${src}" loading="lazy" ${attrs}>`;
+    }
+    const fallback = srcset.jpeg.split(', ')[0].split(' ')[0];
+    // display:contents keeps the page CSS applying to the <img> as if it stood alone
+    return `<picture style="display:contents">${srcset.webp ? `<source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}">` : ''}`
+        + `<img src="${fallback}" srcset="${srcset.jpeg}" sizes="${sizes}" loading="lazy" ${attrs}></picture>`;
+}
@@ -0,0 +1,127 @@
+// frontend/uploads.js
+// Resumable upload of a File (see apps/blobs/uploads.py): the file is sent in
+// chunks, a failed chunk is retried from the offset the server reports, and the
+// returned session id is then passed as `upload` to upload_image or a dispute message.
+const UPLOAD_API = 'http://127.0.0.1:8000/api/uploads';
+const UPLOAD_RETRIES = 5;
+const HASH_SLICE = 4 * 1024 * 1024; // Bytes of the file in memory at a time while hashing
+
+const SHA256_K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+]);
+
+// SHA-256 fed in pieces: crypto.subtle.digest only takes the whole input,
+// which would mean holding a large file in memory at once.
+class Sha256 {
+    constructor() {
+        this.state = new Uint32Array([0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19]);
+        this.words = new Uint32Array(64);
+        this.block = new Uint8Array(64);
+        this.used = 0; // Bytes waiting in this.block
+        this.length = 0;
+    }
+
+    update(bytes) {
+        this.length += bytes.length;
+        let i = 0;
+        if (this.used) {
+            i = Math.min(64 - this.used, bytes.length);
+            this.block.set(bytes.subarray(0, i), this.used);
+            this.used += i;
+            if (this.used < 64) return this;
+            this.compress(this.block, 0);
+        }
+        for (; i + 64 <= bytes.length; i += 64) this.compress(bytes, i);
+        this.block.set(bytes.subarray(i));
+        this.used = bytes.length - i;
+        return this;
+    }
+
+    compress(bytes, at) {
+        const w = this.words;
+        for (let t = 0; t < 16; t++, at += 4) {
+            w[t] = (bytes[at] << 24) | (bytes[at + 1] << 16) | (bytes[at + 2] << 8) | bytes[at + 3];
+        }
+        for (let t = 16; t < 64; t++) {
+            const x = w[t - 15], y = w[t - 2];
+            const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+            const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+            w[t] = w[t - 16] + s0 + w[t - 7] + s1; // Uint32Array keeps it mod 2^32
+        }
+        let [a, b, c, d, e, f, g, h] = this.state;
+        for (let t = 0; t < 64; t++) {
+            const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+            const t1 = (h + S1 + ((e & f) ^ (~e & g)) + SHA256_K[t] + w[t]) | 0;
+            const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+            const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+            h = g; g = f; f = e; e = (d + t1) | 0; d = c; c = b; b = a; a = (t1 + t2) | 0;
+        }
+        [a, b, c, d, e, f, g, h].forEach((value, n) => { this.state[n] += value; });
+    }
+
+    hex() {
+        const bits = this.length * 8;
+        const padding = new Uint8Array((this.used < 56 ? 64 : 128) - this.used);
+        padding[0] = 0x80;
+        const tail = new DataView(padding.buffer);
+        tail.setUint32(padding.length - 8, Math.floor(bits / 2 ** 32));
+        tail.setUint32(padding.length - 4, bits >>> 0);
+        this.update(padding);
+        return Array.from(this.state).map(word => word.toString(16).padStart(8, '0')).join('');
+    }
+}
+
+async function sha256Hex(file) {
+    const hash = new Sha256();
+    for (let offset = 0; offset < file.size; offset += HASH_SLICE) {
+        hash.update(new Uint8Array(await file.slice(offset, offset + HASH_SLICE).arrayBuffer()));
+    }
+    return hash.hex();
+}
+
+async function resumableUpload(file, token, onProgress = () => {}) {
+    const headers = { 'Authorization': `Bearer ${token}` };
+    let response = await fetch(`${UPLOAD_API}/`, {
+        method: 'POST',
+        headers: { ...headers, 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size, sha256: await sha256Hex(file) })
+    });
+    if (!response.ok) throw new Error('Yükleme başlatılamadı');
+    const session = await response.json();
+    const chunkSize = Math.min(session.max_chunk_size, 1024 * 1024);
+
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+        const end = Math.min(offset + chunkSize, file.size);
+        try {
+            response = await fetch(`${UPLOAD_API}/${session.id}/`, {
+                method: 'PUT',
+                headers: { ...headers, 'Content-Type': 'application/octet-stream', 'Content-Range': `bytes ${offset}-${end - 1}/${file.size}` },
+                body: file.slice(offset, end)
+            });
+            const body = await response.json();
+            if (!response.ok && response.status !== 409) throw new Error(body.error);
+            offset = body.received; // Server's offset, also after a 409
+            failures = 0;
+            onProgress(offset / file.size);
+        } catch (e) {
+            if (++failures > UPLOAD_RETRIES) throw e;
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+            // Ask where to resume: the chunk may have arrived before the connection dropped
+            const status = await fetch(`${UPLOAD_API}/${session.id}/`, { headers }).catch(() => null);
+            if (status && status.ok) offset = (await status.json()).received;
+        }
+    }
+
+    response = await fetch(`${UPLOAD_API}/${session.id}/complete/`, { method: 'POST', headers });
+    if (!response.ok) throw new Error((await response.json()).error || 'Yükleme tamamlanamadı');
+    return session.id;
+}